@@ -1,6 +1,7 @@
 import json
 import sys
 import os
+import time
 import requests
 
 from evalytics.mappers import Mapper
@@ -13,6 +14,7 @@ class FileManager:
 class EvalyticsRequests:
 
     BASE_URL = "http://evalytics:8080"
+    JOB_POLL_SECONDS = 2
 
     def employees(self):
         response = requests.get(
@@ -28,10 +30,10 @@ class EvalyticsRequests:
 
         return self.__get_data_response(response)
 
-    def reviewers(self):
+    def reviewers(self, params=None):
         response = requests.get(
             url="%s/reviewers" % self.BASE_URL,
-            params={})
+            params=params or {})
 
         return self.__get_data_response(response)
 
@@ -47,11 +49,15 @@ class EvalyticsRequests:
             url="%s/communications" % self.BASE_URL,
             data={
                 "reviewers": json_reviewers,
-                "kind": kind
+                "kind": kind,
+                "background": "true",
             }
         )
 
-        return self.__get_data_response(response)
+        success, response = self.__get_data_response(response)
+        if success:
+            success, response = self.__wait_for_job(response['job'])
+        return success, response
 
     def evalreports(
             self,
@@ -64,11 +70,41 @@ class EvalyticsRequests:
                 "uids": uids,
                 "managers": managers,
                 "area": area,
+                "background": "true",
             }
         )
 
+        success, response = self.__get_data_response(response)
+        if success:
+            success, response = self.__wait_for_job(response['job'])
+            if success:
+                response = {
+                    'evals_reports': response
+                }
+        return success, response
+
+    def jobs(self, job_id):
+        response = requests.get(
+            url="%s/jobs/%s" % (self.BASE_URL, job_id),
+            params={})
+
         return self.__get_data_response(response)
 
+    def __wait_for_job(self, job):
+        '''
+        Polls the background job until it's over, return its result
+        '''
+        while job['status'] in ('queued', 'running'):
+            time.sleep(self.JOB_POLL_SECONDS)
+            success, response = self.jobs(job['id'])
+            if not success:
+                return success, response
+            job = response['job']
+
+        if job['status'] == 'failed':
+            return False, {'error': job['error']}
+        return True, job['result']
+
     def __get_data_response(self, response):
         if response.ok:
             data = response.json()
@@ -84,6 +120,7 @@ class EvalyticsClient(EvalyticsRequests, Mapper, FileManager):
 
     EVALS_NOT_SENT_CSV = 'evals_not_sent.csv'
     EVALS_WHITELIST = 'evals_whitelist.csv'
+    REVIEWERS_STATS_PAGE_SIZE = 1000
 
     def get_employees(self):
         success, response = super().employees()
@@ -101,15 +138,35 @@ class EvalyticsClient(EvalyticsRequests, Mapper, FileManager):
         success, response = super().status()
         return self.__get_response(success, response, 'status')
 
-    def print_reviewers(self, show_stats: bool = False):
-        reviewers = self.get_reviewers()
-        print(json.dumps(reviewers, indent=2))
+    def get_reviewers_stats(self):
+        '''
+        return every reviewer with only its uid and number of evals,
+        requested page by page
+        '''
+        reviewers = []
+        params = {
+            'fields': 'employee.uid,evals_count',
+            'limit': self.REVIEWERS_STATS_PAGE_SIZE,
+        }
+        while True:
+            success, response = super().reviewers(params)
+            reviewers += self.__get_response(success, response, 'reviewers')
 
+            next_cursor = response.get('next_cursor') if success else None
+            if next_cursor is None:
+                return reviewers
+            params = dict(params, cursor=next_cursor)
+
+    def print_reviewers(self, show_stats: bool = False):
         if show_stats:
-            print('\n-----------')
+            print('-----------')
             print('|  STATS  |')
             print('-----------')
-            self.__print_reviewers_stats(reviewers)
+            self.__print_reviewers_stats(self.get_reviewers_stats())
+            return
+
+        reviewers = self.get_reviewers()
+        print(json.dumps(reviewers, indent=2))
 
     def print_status(self):
         status = self.get_status()
@@ -202,11 +259,21 @@ class EvalyticsClient(EvalyticsRequests, Mapper, FileManager):
 
             print("Reports created:")
             for uid, reports_created in created.items():
-                print(' - {} report will be shared with {}'.format(uid, reports_created['managers']))
+                if reports_created.get('skipped'):
+                    print(' - {} report is up to date'.format(uid))
+                else:
+                    print(' - {} report will be shared with {}'.format(uid, reports_created['managers']))
 
             print("Reports NOT created: %s" % not_created)
             for uid, reports_not_created in not_created.items():
-                print(' - {} report will be shared with {}'.format(uid, reports_not_created['managers']))
+                print(' - {} report will be shared with {}, error: {}'.format(
+                    uid,
+                    reports_not_created['managers'],
+                    reports_not_created.get('error')))
+
+            permissions = evals_reports.get('permissions')
+            if permissions is not None:
+                print("Commenter permissions: %s" % permissions)
 
     def get_whitelist(self):
         return self.__get_list_from_file(self.EVALS_WHITELIST)
@@ -232,7 +299,7 @@ class EvalyticsClient(EvalyticsRequests, Mapper, FileManager):
         reviewers_by_evals_numbers = {}
         for reviewer in all_reviewers:
             uid = reviewer['employee']['uid']
-            evals_number = len(reviewer['evals'])
+            evals_number = reviewer['evals_count']
 
             if evals_number in reviewers_by_evals_numbers:
                 reviewers_by_evals_numbers[evals_number].append(uid)
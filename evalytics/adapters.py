@@ -2,6 +2,7 @@ from evalytics.models import EvalKind, Eval, Reviewer, Employee
 from evalytics.models import ReviewerResponse
 from evalytics.config import Config
 from evalytics.exceptions import MissingDataException
+from evalytics.tracing import traced
 
 class EmployeeAdapter(Config):
 
@@ -30,10 +31,22 @@ class EmployeeAdapter(Config):
 
         return managers
 
+    @traced('EmployeeAdapter.build_reviewers')
     def build_reviewers(self, employees, peers_assignment, forms):
+        return {
+            reviewer.uid: reviewer
+            for reviewer in self.iter_reviewers(employees, peers_assignment, forms)
+        }
+
+    def iter_reviewers(self, employees, peers_assignment, forms):
+        '''
+        Yields the reviewer of every employee as soon as it's built.
+        Managers out of the org chart collect the evals of their reports
+        until the last employee, so they're yielded last.
+        '''
         employees_by_manager = self.get_employees_by_manager(employees)
 
-        reviewers = {}
+        top_managers = {}
         for uid, employee in employees.items():
             evals = []
 
@@ -83,8 +96,8 @@ class EmployeeAdapter(Config):
                         kind=EvalKind.MANAGER_PEER,
                         form=employee_forms[EvalKind.MANAGER_PEER.name])
 
-                    if employee.manager in reviewers:
-                        reviewer_manager = reviewers[employee.manager]
+                    if employee.manager in top_managers:
+                        reviewer_manager = top_managers[employee.manager]
                         reviewer_manager.evals.append(manager_peer_eval)
                     else:
                         manager = Employee(
@@ -98,7 +111,7 @@ class EmployeeAdapter(Config):
                             ]
                         )
 
-                    reviewers.update({
+                    top_managers.update({
                         reviewer_manager.uid: reviewer_manager
                     })
 
@@ -110,13 +123,12 @@ class EmployeeAdapter(Config):
                         kind=EvalKind.MANAGER_PEER,
                         form=employee_forms[EvalKind.MANAGER_PEER.name]))
 
-            reviewer = Reviewer(
+            yield Reviewer(
                 employee=employee,
                 evals=evals
             )
-            reviewers.update({reviewer.uid: reviewer})
 
-        return reviewers
+        yield from top_managers.values()
 
     def __check_area_exists_in_forms(self, forms, area):
         if area not in forms:
@@ -124,6 +136,7 @@ class EmployeeAdapter(Config):
 
 class ReviewerAdapter(EmployeeAdapter):
 
+    @traced('ReviewerAdapter.get_status_from_responses')
     def get_status_from_responses(self, reviewers, responses):
         '''
         args:
@@ -133,59 +146,68 @@ class ReviewerAdapter(EmployeeAdapter):
                 reviewerN.uid: reviewerN
             }
 
-            responses: [
-                ReviewerResponse(),
-                ReviewerResponse(),
-                ReviewerResponse()
-            ]
+            responses: iterable of ReviewerResponse, consumed as it is
+            produced, or responses grouped by reviewer: {
+                reviewer.uid: [ReviewerResponse(), ...],
+                ...
+            }
         '''
         completed = {}
-        pending = {}
         inconsistent = {}
 
         employees = {r.uid:r.employee for uid, r in reviewers.items()}
         employees_by_manager = super().get_employees_by_manager(employees)
 
-        # Completed/Inconsistent reviews
-        for uid, responses in responses.items():
-            completed_responses = {}
-            inconsistent_responses = {}
-            for response in responses:
-                if uid not in reviewers:
-                    continue
+        if isinstance(responses, dict):
+            responses_by_uid = (
+                (uid, response)
+                for uid, uid_responses in responses.items()
+                for response in uid_responses)
+        else:
+            responses_by_uid = (
+                (response.reviewer, response)
+                for response in responses)
 
-                reviewer = reviewers[uid]
-                inconsistent_reason = self.__get_reason_of_inconsistent_response(
-                    reviewer,
-                    response,
-                    employees_by_manager
-                )
+        # Completed/Inconsistent reviews
+        for uid, response in responses_by_uid:
+            if uid not in reviewers:
+                continue
+
+            reviewer = reviewers[uid]
+            inconsistent_reason = self.__get_reason_of_inconsistent_response(
+                reviewer,
+                response,
+                employees_by_manager
+            )
 
-                if inconsistent_reason is None:
-                    completed_responses.update({
-                        response.reviewee: {
-                            'kind': response.eval_kind.name,
-                        }
-                    })
-                else:
-                    inconsistent_responses.update({
-                        response.reviewee: {
-                            'kind': response.eval_kind.name,
-                            'reason': inconsistent_reason,
-                            'filename': response.filename,
-                            'line_number': response.line_number,
-                        }
-                    })
-            if len(completed_responses) > 0:
-                completed.update({
-                    uid: completed_responses
+            if inconsistent_reason is None:
+                completed.setdefault(uid, {}).update({
+                    response.reviewee: {
+                        'kind': response.eval_kind.name,
+                    }
                 })
-            if len(inconsistent_responses) > 0:
-                inconsistent.update({
-                    uid: inconsistent_responses
+            else:
+                inconsistent.setdefault(uid, {}).update({
+                    response.reviewee: {
+                        'kind': response.eval_kind.name,
+                        'reason': inconsistent_reason,
+                        'filename': response.filename,
+                        'line_number': response.line_number,
+                    }
                 })
 
-        # Pending reviews
+        pending = {
+            reviewer.uid: reviewer
+            for reviewer in self.iter_pending_reviewers(reviewers, completed)
+        }
+
+        return completed, pending, inconsistent
+
+    def iter_pending_reviewers(self, reviewers, completed):
+        '''
+        Yields every reviewer with the evals missing in completed, as
+        returned by get_status_from_responses, as soon as it's built
+        '''
         for uid, reviewer in reviewers.items():
             evals = reviewer.evals
             pending_evals = []
@@ -194,14 +216,10 @@ class ReviewerAdapter(EmployeeAdapter):
                     pending_evals.append(e)
 
             if len(pending_evals) > 0:
-                pending.update({
-                    reviewer.uid: Reviewer(
-                        employee=reviewer.employee,
-                        evals=pending_evals
-                    )
-                })
-
-        return completed, pending, inconsistent
+                yield Reviewer(
+                    employee=reviewer.employee,
+                    evals=pending_evals
+                )
 
     def __get_reason_of_inconsistent_response(self,
                                               reviewer: Reviewer,
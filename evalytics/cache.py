@@ -0,0 +1,439 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+from evalytics.config import GoogleDriveProviderConfig
+
+class SnapshotCache:
+    '''
+    Persistent snapshots of spreadsheet ranges stored in SQLite.
+
+    A snapshot is only served while the Drive modifiedTime of its file is
+    the one it was stored with and it is younger than ttl_seconds. Least
+    recently used snapshots are evicted once the stored values go over
+    max_size_bytes.
+    '''
+
+    def __init__(self, path: str, ttl_seconds: int, max_size_bytes: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_size_bytes = max_size_bytes
+
+        self.__lock = threading.Lock()
+        self.__stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+        }
+
+        directory = os.path.dirname(path)
+        if directory != '':
+            os.makedirs(directory, exist_ok=True)
+
+        with closing(self.__connect()) as connection, connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS snapshots ('
+                '    file_id TEXT NOT NULL,'
+                '    rows_range TEXT NOT NULL,'
+                '    modified_time TEXT NOT NULL,'
+                '    file_values TEXT NOT NULL,'
+                '    size INTEGER NOT NULL,'
+                '    stored_at REAL NOT NULL,'
+                '    last_used_at REAL NOT NULL,'
+                '    PRIMARY KEY (file_id, rows_range))')
+
+    def get(self, file_id: str, rows_range: str, modified_time: str):
+        '''
+        return the stored rows or None when there's no valid snapshot
+        '''
+        now = time.time()
+        with closing(self.__connect()) as connection, connection:
+            row = connection.execute(
+                'SELECT file_values FROM snapshots '
+                'WHERE file_id = ? AND rows_range = ? '
+                'AND modified_time = ? AND stored_at > ?',
+                (file_id, rows_range, modified_time, now - self.ttl_seconds)
+            ).fetchone()
+
+            if row is not None:
+                connection.execute(
+                    'UPDATE snapshots SET last_used_at = ? '
+                    'WHERE file_id = ? AND rows_range = ?',
+                    (now, file_id, rows_range))
+
+        self.__count('hits' if row is not None else 'misses')
+
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    def put(self, file_id: str, rows_range: str, modified_time: str, file_values):
+        file_values = json.dumps(file_values)
+        now = time.time()
+        with closing(self.__connect()) as connection, connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO snapshots '
+                '(file_id, rows_range, modified_time, file_values, size, stored_at, last_used_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (file_id, rows_range, modified_time, file_values,
+                 len(file_values), now, now))
+
+            evicted = self.__evict(connection)
+
+        if evicted > 0:
+            self.__count('evictions', evicted)
+
+    def invalidate(self, file_id: str = None):
+        with closing(self.__connect()) as connection, connection:
+            if file_id is None:
+                connection.execute('DELETE FROM snapshots')
+            else:
+                connection.execute(
+                    'DELETE FROM snapshots WHERE file_id = ?', (file_id,))
+
+    def get_stats(self):
+        with self.__lock:
+            return dict(self.__stats)
+
+    def __evict(self, connection):
+        total_size = connection.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM snapshots').fetchone()[0]
+        if total_size <= self.max_size_bytes:
+            return 0
+
+        evicted = 0
+        least_recently_used = connection.execute(
+            'SELECT file_id, rows_range, size FROM snapshots '
+            'ORDER BY last_used_at ASC').fetchall()
+        for file_id, rows_range, size in least_recently_used:
+            if total_size <= self.max_size_bytes:
+                break
+
+            connection.execute(
+                'DELETE FROM snapshots WHERE file_id = ? AND rows_range = ?',
+                (file_id, rows_range))
+            total_size -= size
+            evicted += 1
+
+        return evicted
+
+    def __connect(self):
+        # One connection per operation, so the cache can be shared between
+        # threads and processes
+        return sqlite3.connect(self.path, timeout=30)
+
+    def __count(self, stat, amount=1):
+        with self.__lock:
+            self.__stats[stat] += amount
+
+class EvalReportDigests:
+    '''
+    Digest of the content last written to every eval report document,
+    stored in SQLite, so unchanged reports don't need to be written again
+    '''
+
+    def __init__(self, path: str):
+        self.path = path
+
+        directory = os.path.dirname(path)
+        if directory != '':
+            os.makedirs(directory, exist_ok=True)
+
+        with closing(self.__connect()) as connection, connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS eval_report_digests ('
+                '    document_id TEXT NOT NULL PRIMARY KEY,'
+                '    digest TEXT NOT NULL,'
+                '    stored_at REAL NOT NULL)')
+
+    def get(self, document_id: str):
+        '''
+        return the digest of the last content written to document_id or None
+        '''
+        with closing(self.__connect()) as connection, connection:
+            row = connection.execute(
+                'SELECT digest FROM eval_report_digests WHERE document_id = ?',
+                (document_id,)
+            ).fetchone()
+
+        if row is None:
+            return None
+        return row[0]
+
+    def put(self, document_id: str, digest: str):
+        with closing(self.__connect()) as connection, connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO eval_report_digests '
+                '(document_id, digest, stored_at) VALUES (?, ?, ?)',
+                (document_id, digest, time.time()))
+
+    def invalidate(self, document_id: str = None):
+        with closing(self.__connect()) as connection, connection:
+            if document_id is None:
+                connection.execute('DELETE FROM eval_report_digests')
+            else:
+                connection.execute(
+                    'DELETE FROM eval_report_digests WHERE document_id = ?',
+                    (document_id,))
+
+    def __connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+class ResponseCache:
+    '''
+    Serialized responses of the read endpoints kept in memory for
+    ttl_seconds, together with the strong ETag of their body
+    '''
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+
+        self.__lock = threading.Lock()
+        self.__responses = {}
+        self.__stats = {
+            'hits': 0,
+            'misses': 0,
+            'invalidations': 0,
+        }
+
+    def get(self, key: str):
+        '''
+        return (body, etag) of the stored response or None when there's no
+        fresh one
+        '''
+        now = time.monotonic()
+        with self.__lock:
+            response = self.__responses.get(key)
+            if response is not None and response[2] <= now - self.ttl_seconds:
+                del self.__responses[key]
+                response = None
+
+            self.__stats['hits' if response is not None else 'misses'] += 1
+
+        if response is None:
+            return None
+        return response[0], response[1]
+
+    def put(self, key: str, body: bytes):
+        '''
+        return the ETag of body
+        '''
+        etag = '"%s"' % hashlib.sha256(body).hexdigest()
+        now = time.monotonic()
+        with self.__lock:
+            self.__responses.update({
+                key: (body, etag, now)
+            })
+
+        return etag
+
+    def invalidate(self):
+        with self.__lock:
+            self.__responses.clear()
+            self.__stats['invalidations'] += 1
+
+    def get_stats(self):
+        with self.__lock:
+            return dict(self.__stats)
+
+class RecordsIndex:
+    '''
+    Records computed by the read endpoints, sorted by uid and kept in
+    memory for ttl_seconds, so every page of a paginated endpoint is cut
+    from the same results instead of computing them again
+    '''
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+
+        self.__lock = threading.Lock()
+        self.__indexes = {}
+        self.__stats = {
+            'hits': 0,
+            'misses': 0,
+            'invalidations': 0,
+        }
+
+    def get(self, name: str):
+        '''
+        return (uids, records) sorted by uid or None when there's no fresh
+        index for name
+        '''
+        now = time.monotonic()
+        with self.__lock:
+            index = self.__indexes.get(name)
+            if index is not None and index[2] <= now - self.ttl_seconds:
+                del self.__indexes[name]
+                index = None
+
+            self.__stats['hits' if index is not None else 'misses'] += 1
+
+        if index is None:
+            return None
+        return index[0], index[1]
+
+    def put(self, name: str, records: dict):
+        '''
+        Indexes records, a dict by uid, return (uids, records) sorted by uid
+        '''
+        uids = sorted(records)
+        sorted_records = [records[uid] for uid in uids]
+        with self.__lock:
+            self.__indexes.update({
+                name: (uids, sorted_records, time.monotonic())
+            })
+
+        return uids, sorted_records
+
+    def invalidate(self):
+        with self.__lock:
+            self.__indexes.clear()
+            self.__stats['invalidations'] += 1
+
+    def get_stats(self):
+        with self.__lock:
+            return dict(self.__stats)
+
+class SharedResponseCache:
+    '''
+    ResponseCache stored in SQLite, so every server process serves and
+    invalidates the same responses
+    '''
+
+    def __init__(self, path: str, ttl_seconds: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+
+        self.__lock = threading.Lock()
+        self.__stats = {
+            'hits': 0,
+            'misses': 0,
+            'invalidations': 0,
+        }
+
+        directory = os.path.dirname(path)
+        if directory != '':
+            os.makedirs(directory, exist_ok=True)
+
+        with closing(self.__connect()) as connection, connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                '    response_key TEXT NOT NULL PRIMARY KEY,'
+                '    body BLOB NOT NULL,'
+                '    etag TEXT NOT NULL,'
+                '    stored_at REAL NOT NULL)')
+
+    def get(self, key: str):
+        '''
+        return (body, etag) of the stored response or None when there's no
+        fresh one
+        '''
+        with closing(self.__connect()) as connection, connection:
+            row = connection.execute(
+                'SELECT body, etag FROM responses '
+                'WHERE response_key = ? AND stored_at > ?',
+                (key, time.time() - self.ttl_seconds)
+            ).fetchone()
+
+        self.__count('hits' if row is not None else 'misses')
+
+        if row is None:
+            return None
+        return bytes(row[0]), row[1]
+
+    def put(self, key: str, body: bytes):
+        '''
+        return the ETag of body
+        '''
+        etag = '"%s"' % hashlib.sha256(body).hexdigest()
+        now = time.time()
+        with closing(self.__connect()) as connection, connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO responses '
+                '(response_key, body, etag, stored_at) VALUES (?, ?, ?, ?)',
+                (key, body, etag, now))
+            connection.execute(
+                'DELETE FROM responses WHERE stored_at <= ?',
+                (now - self.ttl_seconds,))
+
+        return etag
+
+    def invalidate(self):
+        with closing(self.__connect()) as connection, connection:
+            connection.execute('DELETE FROM responses')
+
+        self.__count('invalidations')
+
+    def get_stats(self):
+        with self.__lock:
+            return dict(self.__stats)
+
+    def __connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def __count(self, stat, amount=1):
+        with self.__lock:
+            self.__stats[stat] += amount
+
+class SnapshotCacheFactory(GoogleDriveProviderConfig):
+
+    __caches = {}
+    __lock = threading.Lock()
+
+    def get_snapshot_cache(self):
+        '''
+        return the process-wide SnapshotCache for the configured path or
+        None when the snapshot cache is disabled
+        '''
+        if not super().read_google_snapshot_cache_enabled():
+            return None
+
+        path = os.path.abspath(super().read_google_snapshot_cache_path())
+        ttl_seconds = super().read_google_snapshot_cache_ttl_seconds()
+        max_size_bytes = super().read_google_snapshot_cache_max_size_mb() * 1024 * 1024
+
+        with SnapshotCacheFactory.__lock:
+            cache = SnapshotCacheFactory.__caches.get(path)
+            if cache is None:
+                cache = SnapshotCache(path, ttl_seconds, max_size_bytes)
+                SnapshotCacheFactory.__caches.update({
+                    path: cache
+                })
+            else:
+                # Config may have been reloaded
+                cache.ttl_seconds = ttl_seconds
+                cache.max_size_bytes = max_size_bytes
+
+        return cache
+
+class EvalReportDigestsFactory(GoogleDriveProviderConfig):
+
+    __digests = {}
+    __lock = threading.Lock()
+
+    def get_eval_report_digests(self):
+        '''
+        return the process-wide EvalReportDigests for the configured path or
+        None when incremental eval reports are disabled
+        '''
+        if not super().read_google_incremental_eval_reports_enabled():
+            return None
+
+        path = os.path.abspath(super().read_google_incremental_eval_reports_path())
+
+        with EvalReportDigestsFactory.__lock:
+            digests = EvalReportDigestsFactory.__digests.get(path)
+            if digests is None:
+                digests = EvalReportDigests(path)
+                EvalReportDigestsFactory.__digests.update({
+                    path: digests
+                })
+
+        return digests
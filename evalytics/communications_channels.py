@@ -8,6 +8,7 @@ from evalytics.google_api import GoogleAPI
 from evalytics.models import Reviewer, EvalKind, CommunicationKind
 from evalytics.config import Config, ProvidersConfig
 from evalytics.exceptions import CommunicationChannelException
+from evalytics.metrics import Metrics
 
 class CommunicationChannelFactory(Config):
 
@@ -21,7 +22,7 @@ class CommunicationChannelFactory(Config):
 
         raise ValueError(communication_channel_provider)
 
-class SlackClient:
+class SlackClient(Metrics):
 
     __client = None
 
@@ -31,10 +32,11 @@ class SlackClient:
             channel,
             blocks,
             as_user):
-        return self.__get_client(token).chat_postMessage(
-            channel=channel,
-            blocks=blocks,
-            as_user=as_user)
+        with self.time_slack_call('chat.postMessage'):
+            return self.__get_client(token).chat_postMessage(
+                channel=channel,
+                blocks=blocks,
+                as_user=as_user)
 
     def __get_client(self, token):
         if self.__client is None:
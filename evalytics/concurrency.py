@@ -0,0 +1,110 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+class RateLimiter:
+    '''
+    Spaces calls so that at most requests_per_second of them start per second,
+    no matter how many threads share the limiter
+    '''
+
+    def __init__(self, requests_per_second=None):
+        self.__interval = 1.0 / requests_per_second if requests_per_second else 0
+        self.__next_slot = 0
+        self.__lock = threading.Lock()
+
+    def acquire(self):
+        '''
+        Blocks until the caller is allowed to start, returns seconds waited
+        '''
+        if self.__interval == 0:
+            return 0
+
+        with self.__lock:
+            now = time.monotonic()
+            slot = max(now, self.__next_slot)
+            self.__next_slot = slot + self.__interval
+
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+class TokenBucket:
+    '''
+    Token bucket filled with requests_per_second tokens per second up to
+    burst tokens. Callers taking more tokens than the bucket holds are
+    queued behind the earlier ones: the bucket goes into debt and every
+    caller waits until its tokens would have been refilled.
+    '''
+
+    def __init__(self, requests_per_second: float, burst: float = None):
+        self.requests_per_second = requests_per_second
+        self.burst = burst if burst is not None else max(1, requests_per_second)
+
+        self.__tokens = self.burst
+        self.__updated_at = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def reserve(self, tokens: int = 1):
+        '''
+        Takes tokens from the bucket, return seconds to wait before using them
+        '''
+        with self.__lock:
+            now = time.monotonic()
+            self.__tokens = min(
+                self.burst,
+                self.__tokens + (now - self.__updated_at) * self.requests_per_second)
+            self.__updated_at = now
+
+            self.__tokens -= tokens
+            if self.__tokens >= 0:
+                return 0
+            return -self.__tokens / self.requests_per_second
+
+    def acquire(self, tokens: int = 1):
+        '''
+        Blocks until tokens are available, returns seconds waited
+        '''
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+class ConcurrentMapper:
+
+    def concurrent_map(self,
+                       function,
+                       items,
+                       max_workers: int,
+                       requests_per_second=None):
+        '''
+        Applies function to every item using at most max_workers threads and
+        starting at most requests_per_second calls per second.
+
+        Results keep the order of items. The first exception raised by
+        function is raised once every submitted call has finished.
+
+        Every call runs in a copy of the caller context, so context
+        variables such as the current tracing span follow it.
+        '''
+        items = list(items)
+        if len(items) == 0:
+            return []
+
+        rate_limiter = RateLimiter(requests_per_second)
+
+        def limited_function(item):
+            rate_limiter.acquire()
+            return function(item)
+
+        # A context can't be entered by two threads at once, one copy per call
+        contexts = [contextvars.copy_context() for _ in items]
+
+        workers = max(1, min(max_workers, len(items)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(
+                lambda context, item: context.run(limited_function, item),
+                contexts,
+                items))
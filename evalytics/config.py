@@ -1,15 +1,245 @@
+import os
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional
+
 import yaml
 
+from evalytics.exceptions import MissingConfigException, InvalidConfigException
+
+@dataclass(frozen=True)
+class ProvidersSettings:
+    __slots__ = ('storage', 'communication_channel', 'forms_platform')
+
+    storage: str
+    communication_channel: str
+    forms_platform: str
+
+@dataclass(frozen=True)
+class EvalProcessSettings:
+    __slots__ = (
+        'id', 'due_date', 'is_add_comenter_to_eval_reports_enabled',
+        'is_send_eval_reports_as_pdf_enabled',
+        'reports_generation_mode', 'reports_generation_max_workers',
+        'reports_generation_reports_per_second',
+        'local_reports_path', 'local_reports_max_workers',
+        'local_reports_pdf_font', 'local_reports_pdf_bold_font')
+
+    id: str
+    due_date: str
+    is_add_comenter_to_eval_reports_enabled: bool
+    is_send_eval_reports_as_pdf_enabled: bool
+    reports_generation_mode: str
+    reports_generation_max_workers: int
+    reports_generation_reports_per_second: Optional[float]
+    local_reports_path: str
+    local_reports_max_workers: int
+    local_reports_pdf_font: Optional[str]
+    local_reports_pdf_bold_font: Optional[str]
+
+@dataclass(frozen=True)
+class SlackProviderSettings:
+    __slots__ = ('token', 'channel', 'is_direct_message', 'as_user', 'users_map')
+
+    token: str
+    channel: str
+    is_direct_message: bool
+    as_user: bool
+    users_map: Mapping
+
+@dataclass(frozen=True)
+class GmailProviderSettings:
+    __slots__ = ('mail_subject', 'reminder_mail_subject')
+
+    mail_subject: str
+    reminder_mail_subject: str
+
+@dataclass(frozen=True)
+class GoogleDriveProviderSettings:
+    __slots__ = (
+        'folder', 'assignments_folder', 'assignments_manager_forms_folder',
+        'org_chart', 'org_chart_range', 'form_map', 'form_map_range',
+        'assignments_peers_file', 'assignments_peers_range',
+        'form_responses_folder', 'responses_files_range',
+        'responses_reader_mode', 'responses_reader_max_workers',
+        'responses_reader_requests_per_second', 'responses_reader_page_size',
+        'snapshot_cache_enabled', 'snapshot_cache_path',
+        'snapshot_cache_ttl_seconds', 'snapshot_cache_max_size_mb',
+        'path_index_ttl_seconds',
+        'incremental_eval_reports_enabled', 'incremental_eval_reports_path',
+        'retry_max_attempts', 'retry_initial_delay_seconds',
+        'retry_max_delay_seconds', 'retry_idempotent_methods', 'rate_limits',
+        'eval_reports_folder', 'eval_report_template_id', 'eval_report_prefix',
+        'manager_eval_by_report_prefix', 'report_eval_by_manager_prefix',
+        'peer_eval_by_peer_prefix', 'self_eval_prefix')
+
+    folder: str
+    assignments_folder: str
+    assignments_manager_forms_folder: str
+    org_chart: str
+    org_chart_range: str
+    form_map: str
+    form_map_range: str
+    assignments_peers_file: str
+    assignments_peers_range: str
+    form_responses_folder: str
+    responses_files_range: Optional[str]
+    responses_reader_mode: str
+    responses_reader_max_workers: int
+    responses_reader_requests_per_second: int
+    responses_reader_page_size: int
+    snapshot_cache_enabled: bool
+    snapshot_cache_path: str
+    snapshot_cache_ttl_seconds: int
+    snapshot_cache_max_size_mb: int
+    path_index_ttl_seconds: int
+    incremental_eval_reports_enabled: bool
+    incremental_eval_reports_path: str
+    retry_max_attempts: int
+    retry_initial_delay_seconds: float
+    retry_max_delay_seconds: float
+    retry_idempotent_methods: tuple
+    rate_limits: Mapping
+    eval_reports_folder: str
+    eval_report_template_id: str
+    eval_report_prefix: str
+    manager_eval_by_report_prefix: str
+    report_eval_by_manager_prefix: str
+    peer_eval_by_peer_prefix: str
+    self_eval_prefix: str
+
+@dataclass(frozen=True)
+class CompanySettings:
+    __slots__ = ('domain', 'number_of_employees')
+
+    domain: str
+    number_of_employees: int
+
+@dataclass(frozen=True)
+class ServerSettings:
+    __slots__ = (
+        'max_workers', 'jobs_path', 'jobs_max_workers',
+        'jobs_orphans_check_seconds',
+        'response_cache_enabled', 'response_cache_ttl_seconds',
+        'response_cache_path', 'pagination_index_ttl_seconds',
+        'tracing_enabled', 'tracing_path')
+
+    max_workers: int
+    jobs_path: str
+    jobs_max_workers: int
+    jobs_orphans_check_seconds: int
+    response_cache_enabled: bool
+    response_cache_ttl_seconds: int
+    response_cache_path: str
+    pagination_index_ttl_seconds: int
+    tracing_enabled: bool
+    tracing_path: str
+
+@dataclass(frozen=True)
+class Settings:
+    '''
+    Immutable view of config.yaml, validated when it is resolved.
+    Slack and Gmail settings are only resolved for the configured
+    communication channel and are None otherwise.
+    '''
+    __slots__ = (
+        'providers', 'eval_process', 'company',
+        'google_drive', 'gmail', 'slack', 'server')
+
+    providers: ProvidersSettings
+    eval_process: EvalProcessSettings
+    company: CompanySettings
+    google_drive: GoogleDriveProviderSettings
+    gmail: Optional[GmailProviderSettings]
+    slack: Optional[SlackProviderSettings]
+    server: ServerSettings
+
 class ConfigReader:
+    '''
+    Reads config.yaml keeping a process-wide parsed snapshot per file.
+
+    A snapshot is reused while the file keeps the same inode, mtime and size,
+    so every read_* accessor is a dict lookup plus a stat call, and edits
+    to config.yaml are still picked up without restarting the server.
+
+    The snapshot is shared by the whole process, so it's returned read-only:
+    mappings are MappingProxyType and lists are tuples.
+    '''
 
     CONFIG_FILE = 'config.yaml'
 
+    __snapshots = {}
+    __lock = threading.Lock()
+    __stats = {
+        'parses': 0,
+        'hits': 0,
+        'reloads': 0,
+    }
+
     def read(self):
-        with open(self.CONFIG_FILE, 'r') as stream:
-            data_loaded = yaml.safe_load(stream)
+        path = os.path.abspath(self.CONFIG_FILE)
+        signature = self.__get_file_signature(path)
+
+        with ConfigReader.__lock:
+            snapshot = ConfigReader.__snapshots.get(path, None)
+            if snapshot is not None and snapshot[0] == signature:
+                ConfigReader.__stats['hits'] += 1
+                return snapshot[1]
+
+            with open(path, 'r') as stream:
+                data_loaded = self.__freeze(yaml.safe_load(stream))
+
+            ConfigReader.__snapshots.update({
+                path: (signature, data_loaded)
+            })
+            ConfigReader.__stats['parses'] += 1
 
         return data_loaded
 
+    def reload(self):
+        '''
+        Drops the cached snapshot of the config file and parses it again
+        '''
+        path = os.path.abspath(self.CONFIG_FILE)
+        with ConfigReader.__lock:
+            ConfigReader.__snapshots.pop(path, None)
+            ConfigReader.__stats['reloads'] += 1
+
+        return self.read()
+
+    def read_required(self, key_path, accessor):
+        '''
+        Returns accessor() or raises MissingConfigException naming key_path
+        when the value, or any section on its way, is missing
+        '''
+        try:
+            value = accessor()
+        except (AttributeError, KeyError, TypeError):
+            value = None
+
+        if value is None:
+            raise MissingConfigException('Missing config key: {}'.format(key_path))
+
+        return value
+
+    def get_read_stats(self):
+        with ConfigReader.__lock:
+            return dict(ConfigReader.__stats)
+
+    def __freeze(self, value):
+        if isinstance(value, dict):
+            return MappingProxyType({
+                key: self.__freeze(item) for key, item in value.items()
+            })
+        if isinstance(value, list):
+            return tuple(self.__freeze(item) for item in value)
+        return value
+
+    def __get_file_signature(self, path):
+        stat = os.stat(path)
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
 class ProvidersConfig(ConfigReader):
 
     PROVIDERS = 'providers'
@@ -37,6 +267,18 @@ class ProvidersConfig(ConfigReader):
         config = super().read()
         return config.get(self.PROVIDERS).get(self.FORMS_PLATFORM)
 
+    def read_providers_settings(self):
+        return ProvidersSettings(
+            storage=self.read_required(
+                'providers.storage',
+                self.read_storage_provider),
+            communication_channel=self.read_required(
+                'providers.communication_channel',
+                self.read_communication_channel_provider),
+            forms_platform=self.read_required(
+                'providers.forms_platform',
+                self.read_forms_platform_provider))
+
 class EvalProcessConfig(ConfigReader):
 
     EVAL_PROCESS = 'eval_process'
@@ -46,6 +288,26 @@ class EvalProcessConfig(ConfigReader):
 
     FEATURE_DISABLING = 'feature_disabling'
     ADD_COMENTER_TO_EVAL_REPORT = 'add_comenter_to_eval_reports'
+    SEND_EVAL_REPORTS_AS_PDF = 'send_eval_reports_as_pdf'
+
+    REPORTS_GENERATION = 'reports_generation'
+    REPORTS_GENERATION_MODE = 'mode'
+    REPORTS_GENERATION_MAX_WORKERS = 'max_workers'
+    REPORTS_GENERATION_REPORTS_PER_SECOND = 'reports_per_second'
+
+    REPORTS_GENERATION_MODE_SERIAL = 'serial'
+    REPORTS_GENERATION_MODE_CONCURRENT = 'concurrent'
+    DEFAULT_REPORTS_GENERATION_MAX_WORKERS = 8
+    DEFAULT_REPORTS_GENERATION_REPORTS_PER_SECOND = 2
+
+    LOCAL_REPORTS = 'local_reports'
+    LOCAL_REPORTS_PATH = 'path'
+    LOCAL_REPORTS_MAX_WORKERS = 'max_workers'
+    LOCAL_REPORTS_PDF_FONT = 'pdf_font'
+    LOCAL_REPORTS_PDF_BOLD_FONT = 'pdf_bold_font'
+
+    DEFAULT_LOCAL_REPORTS_PATH = 'reports'
+    DEFAULT_LOCAL_REPORTS_MAX_WORKERS = 8
 
     def read_eval_process_id(self):
         config = super().read()
@@ -62,6 +324,80 @@ class EvalProcessConfig(ConfigReader):
                 self.FEATURE_DISABLING).get(
                     self.ADD_COMENTER_TO_EVAL_REPORT)
 
+    def read_is_send_eval_reports_as_pdf_enabled(self):
+        config = super().read()
+        return config.get(
+            self.EVAL_PROCESS).get(
+                self.FEATURE_DISABLING).get(
+                    self.SEND_EVAL_REPORTS_AS_PDF, False)
+
+    def read_reports_generation_mode(self):
+        config = super().read()
+        return config.get(
+            self.EVAL_PROCESS).get(self.REPORTS_GENERATION, {}).get(
+                self.REPORTS_GENERATION_MODE,
+                self.REPORTS_GENERATION_MODE_SERIAL)
+
+    def read_reports_generation_max_workers(self):
+        config = super().read()
+        return config.get(
+            self.EVAL_PROCESS).get(self.REPORTS_GENERATION, {}).get(
+                self.REPORTS_GENERATION_MAX_WORKERS,
+                self.DEFAULT_REPORTS_GENERATION_MAX_WORKERS)
+
+    def read_reports_generation_reports_per_second(self):
+        config = super().read()
+        return config.get(
+            self.EVAL_PROCESS).get(self.REPORTS_GENERATION, {}).get(
+                self.REPORTS_GENERATION_REPORTS_PER_SECOND,
+                self.DEFAULT_REPORTS_GENERATION_REPORTS_PER_SECOND)
+
+    def read_local_reports_path(self):
+        config = super().read()
+        return config.get(
+            self.EVAL_PROCESS).get(self.LOCAL_REPORTS, {}).get(
+                self.LOCAL_REPORTS_PATH,
+                self.DEFAULT_LOCAL_REPORTS_PATH)
+
+    def read_local_reports_max_workers(self):
+        config = super().read()
+        return config.get(
+            self.EVAL_PROCESS).get(self.LOCAL_REPORTS, {}).get(
+                self.LOCAL_REPORTS_MAX_WORKERS,
+                self.DEFAULT_LOCAL_REPORTS_MAX_WORKERS)
+
+    def read_local_reports_pdf_font(self):
+        config = super().read()
+        return config.get(
+            self.EVAL_PROCESS).get(self.LOCAL_REPORTS, {}).get(
+                self.LOCAL_REPORTS_PDF_FONT)
+
+    def read_local_reports_pdf_bold_font(self):
+        config = super().read()
+        return config.get(
+            self.EVAL_PROCESS).get(self.LOCAL_REPORTS, {}).get(
+                self.LOCAL_REPORTS_PDF_BOLD_FONT)
+
+    def read_eval_process_settings(self):
+        return EvalProcessSettings(
+            id=self.read_required(
+                'eval_process.id',
+                self.read_eval_process_id),
+            due_date=self.read_required(
+                'eval_process.due_date',
+                self.read_eval_process_due_date),
+            is_add_comenter_to_eval_reports_enabled=self.read_required(
+                'eval_process.feature_disabling.add_comenter_to_eval_reports',
+                self.read_is_add_comenter_to_eval_reports_enabled),
+            is_send_eval_reports_as_pdf_enabled=self.read_is_send_eval_reports_as_pdf_enabled(),
+            reports_generation_mode=self.read_reports_generation_mode(),
+            reports_generation_max_workers=self.read_reports_generation_max_workers(),
+            reports_generation_reports_per_second=self.read_reports_generation_reports_per_second(),
+            local_reports_path=self.read_local_reports_path(),
+            local_reports_max_workers=self.read_local_reports_max_workers(),
+            local_reports_pdf_font=self.read_local_reports_pdf_font(),
+            local_reports_pdf_bold_font=self.read_local_reports_pdf_bold_font())
+
 class SlackProviderConfig(ConfigReader):
 
     SLACK_PROVIDER = 'slack_provider'
@@ -94,6 +430,24 @@ class SlackProviderConfig(ConfigReader):
         config = super().read()
         return config.get(self.SLACK_PROVIDER, []).get(self.USERS_MAP, [])
 
+    def read_slack_provider_settings(self):
+        return SlackProviderSettings(
+            token=self.read_required(
+                'slack_provider.token',
+                self.get_slack_token),
+            channel=self.read_required(
+                'slack_provider.params.channel',
+                self.get_slack_channel_param),
+            is_direct_message=self.read_required(
+                'slack_provider.is_direct_message',
+                self.slack_message_is_direct),
+            as_user=self.read_required(
+                'slack_provider.params.as_user',
+                self.slack_message_as_user_param),
+            users_map=MappingProxyType(dict(self.read_required(
+                'slack_provider.users_map',
+                self.get_slack_users_map))))
+
 class GmailProviderConfig(ConfigReader):
 
     GMAIL_PROVIDER = 'gmail_provider'
@@ -109,6 +463,15 @@ class GmailProviderConfig(ConfigReader):
         config = super().read()
         return config.get(self.GMAIL_PROVIDER).get(self.REMINDER_MAIL_SUBJECT)
 
+    def read_gmail_provider_settings(self):
+        return GmailProviderSettings(
+            mail_subject=self.read_required(
+                'gmail_provider.mail_subject',
+                self.read_mail_subject),
+            reminder_mail_subject=self.read_required(
+                'gmail_provider.reminder_mail_subject',
+                self.read_reminder_mail_subject))
+
 class GoogleDriveProviderConfig(ConfigReader):
 
     GOOGLE_DRIVE_PROVIDER = 'google_drive_provider'
@@ -126,6 +489,56 @@ class GoogleDriveProviderConfig(ConfigReader):
     ASSIGNMENTS_PEERS_RANGE = 'assignments_peers_range'
     RESPONSES_FILES_RANGE = 'responses_files_range'
 
+    RESPONSES_READER = 'responses_reader'
+    RESPONSES_READER_MODE = 'mode'
+    RESPONSES_READER_MAX_WORKERS = 'max_workers'
+    RESPONSES_READER_REQUESTS_PER_SECOND = 'requests_per_second'
+    RESPONSES_READER_PAGE_SIZE = 'page_size'
+
+    RESPONSES_READER_MODE_BATCH = 'batch'
+    RESPONSES_READER_MODE_CONCURRENT = 'concurrent'
+    DEFAULT_RESPONSES_READER_MAX_WORKERS = 8
+    DEFAULT_RESPONSES_READER_REQUESTS_PER_SECOND = 10
+    DEFAULT_RESPONSES_READER_PAGE_SIZE = 500
+
+    SNAPSHOT_CACHE = 'snapshot_cache'
+    SNAPSHOT_CACHE_ENABLED = 'enabled'
+    SNAPSHOT_CACHE_PATH = 'path'
+    SNAPSHOT_CACHE_TTL_SECONDS = 'ttl_seconds'
+    SNAPSHOT_CACHE_MAX_SIZE_MB = 'max_size_mb'
+
+    DEFAULT_SNAPSHOT_CACHE_PATH = 'cache/snapshots.sqlite'
+    DEFAULT_SNAPSHOT_CACHE_TTL_SECONDS = 3600
+    DEFAULT_SNAPSHOT_CACHE_MAX_SIZE_MB = 256
+
+    PATH_INDEX = 'path_index'
+    PATH_INDEX_TTL_SECONDS = 'ttl_seconds'
+
+    DEFAULT_PATH_INDEX_TTL_SECONDS = 60
+
+    INCREMENTAL_EVAL_REPORTS = 'incremental_eval_reports'
+    INCREMENTAL_EVAL_REPORTS_ENABLED = 'enabled'
+    INCREMENTAL_EVAL_REPORTS_PATH = 'path'
+
+    DEFAULT_INCREMENTAL_EVAL_REPORTS_PATH = 'cache/eval_reports.sqlite'
+
+    RETRY = 'retry'
+    RETRY_MAX_ATTEMPTS = 'max_attempts'
+    RETRY_INITIAL_DELAY_SECONDS = 'initial_delay_seconds'
+    RETRY_MAX_DELAY_SECONDS = 'max_delay_seconds'
+    RETRY_IDEMPOTENT_METHODS = 'idempotent_methods'
+
+    DEFAULT_RETRY_MAX_ATTEMPTS = 5
+    DEFAULT_RETRY_INITIAL_DELAY_SECONDS = 1
+    DEFAULT_RETRY_MAX_DELAY_SECONDS = 32
+    # Methods with side effects, retried after a server error they could
+    # be applied twice
+    NON_IDEMPOTENT_METHOD_NAMES = ('batchUpdate', 'create', 'copy', 'insert', 'send')
+
+    RATE_LIMITS = 'rate_limits'
+    RATE_LIMIT_REQUESTS_PER_SECOND = 'requests_per_second'
+    RATE_LIMIT_BURST = 'burst'
+
     EVAL_REPORTS_FOLDER = 'eval_reports_folder'
     EVAL_REPORT_TEMPLATE_ID = 'eval_report_template_id'
     EVAL_REPORT_PREFIX_NAME = 'eval_report_prefix_name'
@@ -181,6 +594,141 @@ class GoogleDriveProviderConfig(ConfigReader):
         config = super().read()
         return config.get(self.GOOGLE_DRIVE_PROVIDER).get(self.RESPONSES_FILES_RANGE)
 
+    def read_google_responses_reader_mode(self):
+        config = super().read()
+        return config.get(
+            self.GOOGLE_DRIVE_PROVIDER).get(self.RESPONSES_READER, {}).get(
+                self.RESPONSES_READER_MODE, self.RESPONSES_READER_MODE_BATCH)
+
+    def read_google_responses_reader_max_workers(self):
+        config = super().read()
+        return config.get(
+            self.GOOGLE_DRIVE_PROVIDER).get(self.RESPONSES_READER, {}).get(
+                self.RESPONSES_READER_MAX_WORKERS,
+                self.DEFAULT_RESPONSES_READER_MAX_WORKERS)
+
+    def read_google_responses_reader_requests_per_second(self):
+        config = super().read()
+        return config.get(
+            self.GOOGLE_DRIVE_PROVIDER).get(self.RESPONSES_READER, {}).get(
+                self.RESPONSES_READER_REQUESTS_PER_SECOND,
+                self.DEFAULT_RESPONSES_READER_REQUESTS_PER_SECOND)
+
+    def read_google_responses_reader_page_size(self):
+        config = super().read()
+        return config.get(
+            self.GOOGLE_DRIVE_PROVIDER).get(self.RESPONSES_READER, {}).get(
+                self.RESPONSES_READER_PAGE_SIZE,
+                self.DEFAULT_RESPONSES_READER_PAGE_SIZE)
+
+    def read_google_snapshot_cache_enabled(self):
+        config = super().read()
+        return config.get(
+            self.GOOGLE_DRIVE_PROVIDER).get(self.SNAPSHOT_CACHE, {}).get(
+                self.SNAPSHOT_CACHE_ENABLED, False)
+
+    def read_google_snapshot_cache_path(self):
+        config = super().read()
+        return config.get(
+            self.GOOGLE_DRIVE_PROVIDER).get(self.SNAPSHOT_CACHE, {}).get(
+                self.SNAPSHOT_CACHE_PATH,
+                self.DEFAULT_SNAPSHOT_CACHE_PATH)
+
+    def read_google_snapshot_cache_ttl_seconds(self):
+        config = super().read()
+        return config.get(
+            self.GOOGLE_DRIVE_PROVIDER).get(self.SNAPSHOT_CACHE, {}).get(
+                self.SNAPSHOT_CACHE_TTL_SECONDS,
+                self.DEFAULT_SNAPSHOT_CACHE_TTL_SECONDS)
+
+    def read_google_snapshot_cache_max_size_mb(self):
+        config = super().read()
+        return config.get(
+            self.GOOGLE_DRIVE_PROVIDER).get(self.SNAPSHOT_CACHE, {}).get(
+                self.SNAPSHOT_CACHE_MAX_SIZE_MB,
+                self.DEFAULT_SNAPSHOT_CACHE_MAX_SIZE_MB)
+
+    def read_google_path_index_ttl_seconds(self):
+        config = super().read()
+        return config.get(
+            self.GOOGLE_DRIVE_PROVIDER).get(self.PATH_INDEX, {}).get(
+                self.PATH_INDEX_TTL_SECONDS,
+                self.DEFAULT_PATH_INDEX_TTL_SECONDS)
+
+    def read_google_incremental_eval_reports_enabled(self):
+        config = super().read()
+        return config.get(
+            self.GOOGLE_DRIVE_PROVIDER).get(self.INCREMENTAL_EVAL_REPORTS, {}).get(
+                self.INCREMENTAL_EVAL_REPORTS_ENABLED, False)
+
+    def read_google_incremental_eval_reports_path(self):
+        config = super().read()
+        return config.get(
+            self.GOOGLE_DRIVE_PROVIDER).get(self.INCREMENTAL_EVAL_REPORTS, {}).get(
+                self.INCREMENTAL_EVAL_REPORTS_PATH,
+                self.DEFAULT_INCREMENTAL_EVAL_REPORTS_PATH)
+
+    def read_google_retry_max_attempts(self):
+        config = super().read()
+        return config.get(
+            self.GOOGLE_DRIVE_PROVIDER).get(self.RETRY, {}).get(
+                self.RETRY_MAX_ATTEMPTS,
+                self.DEFAULT_RETRY_MAX_ATTEMPTS)
+
+    def read_google_retry_initial_delay_seconds(self):
+        config = super().read()
+        return config.get(
+            self.GOOGLE_DRIVE_PROVIDER).get(self.RETRY, {}).get(
+                self.RETRY_INITIAL_DELAY_SECONDS,
+                self.DEFAULT_RETRY_INITIAL_DELAY_SECONDS)
+
+    def read_google_retry_max_delay_seconds(self):
+        config = super().read()
+        return config.get(
+            self.GOOGLE_DRIVE_PROVIDER).get(self.RETRY, {}).get(
+                self.RETRY_MAX_DELAY_SECONDS,
+                self.DEFAULT_RETRY_MAX_DELAY_SECONDS)
+
+    def read_google_retry_idempotent_methods(self):
+        config = super().read()
+        idempotent_methods = tuple(config.get(
+            self.GOOGLE_DRIVE_PROVIDER).get(self.RETRY, {}).get(
+                self.RETRY_IDEMPOTENT_METHODS, []))
+
+        for method_id in idempotent_methods:
+            if method_id.split('.')[-1] in self.NON_IDEMPOTENT_METHOD_NAMES:
+                raise InvalidConfigException(
+                    'Config key {}.{}.{} can\'t list {}, it has side effects'.format(
+                        self.GOOGLE_DRIVE_PROVIDER,
+                        self.RETRY,
+                        self.RETRY_IDEMPOTENT_METHODS,
+                        method_id))
+
+        return idempotent_methods
+
+    def read_google_rate_limits(self):
+        '''
+        return {quota: (requests per second, burst)} of the Google API
+        quotas having a limit, burst defaults to a second of requests
+        '''
+        config = super().read()
+        rate_limits = config.get(
+            self.GOOGLE_DRIVE_PROVIDER).get(self.RATE_LIMITS, {})
+
+        limits = {}
+        for quota, limit in rate_limits.items():
+            requests_per_second = self.read_required(
+                '{}.{}.{}.{}'.format(
+                    self.GOOGLE_DRIVE_PROVIDER, self.RATE_LIMITS,
+                    quota, self.RATE_LIMIT_REQUESTS_PER_SECOND),
+                lambda: limit[self.RATE_LIMIT_REQUESTS_PER_SECOND])
+            limits.update({
+                quota: (
+                    requests_per_second,
+                    limit.get(self.RATE_LIMIT_BURST, max(1, requests_per_second)))
+            })
+        return limits
+
     def read_eval_reports_folder(self):
         config = super().read()
         return config.get(self.GOOGLE_DRIVE_PROVIDER).get(self.EVAL_REPORTS_FOLDER)
@@ -214,6 +762,74 @@ class GoogleDriveProviderConfig(ConfigReader):
         return config.get(
             self.GOOGLE_DRIVE_PROVIDER).get(self.FILE_PREFIXES).get(self.SELF_EVAL)
 
+    def read_google_drive_provider_settings(self):
+        prefixes_path = '{}.{}'.format(self.GOOGLE_DRIVE_PROVIDER, self.FILE_PREFIXES)
+        return GoogleDriveProviderSettings(
+            folder=self.__read_required(
+                self.FOLDER, self.read_google_folder),
+            assignments_folder=self.__read_required(
+                self.ASSIGNMENTS_FOLDER, self.read_assignments_folder),
+            assignments_manager_forms_folder=self.__read_required(
+                self.ASSIGNMENTS_MANAGER_FORMS_FOLDER,
+                self.read_assignments_manager_forms_folder),
+            org_chart=self.__read_required(
+                self.ORG_CHART, self.read_google_orgchart),
+            org_chart_range=self.__read_required(
+                self.ORG_CHART_RANGE, self.read_google_orgchart_range),
+            form_map=self.__read_required(
+                self.FORM_MAP, self.read_google_form_map),
+            form_map_range=self.__read_required(
+                self.FORM_MAP_RANGE, self.read_google_form_map_range),
+            assignments_peers_file=self.__read_required(
+                self.ASSIGNMENTS_PEERS_FILE, self.read_assignments_peers_file),
+            assignments_peers_range=self.__read_required(
+                self.ASSIGNMENTS_PEERS_RANGE, self.read_assignments_peers_range),
+            form_responses_folder=self.__read_required(
+                self.FORM_RESPONSES_FOLDER, self.read_google_responses_folder),
+            # Only needed when reading peers assignment forms
+            responses_files_range=self.read_google_responses_files_range(),
+            responses_reader_mode=self.read_google_responses_reader_mode(),
+            responses_reader_max_workers=self.read_google_responses_reader_max_workers(),
+            responses_reader_requests_per_second=self.read_google_responses_reader_requests_per_second(),
+            responses_reader_page_size=self.read_google_responses_reader_page_size(),
+            snapshot_cache_enabled=self.read_google_snapshot_cache_enabled(),
+            snapshot_cache_path=self.read_google_snapshot_cache_path(),
+            snapshot_cache_ttl_seconds=self.read_google_snapshot_cache_ttl_seconds(),
+            snapshot_cache_max_size_mb=self.read_google_snapshot_cache_max_size_mb(),
+            path_index_ttl_seconds=self.read_google_path_index_ttl_seconds(),
+            incremental_eval_reports_enabled=self.read_google_incremental_eval_reports_enabled(),
+            incremental_eval_reports_path=self.read_google_incremental_eval_reports_path(),
+            retry_max_attempts=self.read_google_retry_max_attempts(),
+            retry_initial_delay_seconds=self.read_google_retry_initial_delay_seconds(),
+            retry_max_delay_seconds=self.read_google_retry_max_delay_seconds(),
+            retry_idempotent_methods=self.read_google_retry_idempotent_methods(),
+            rate_limits=MappingProxyType(self.read_google_rate_limits()),
+            eval_reports_folder=self.__read_required(
+                self.EVAL_REPORTS_FOLDER, self.read_eval_reports_folder),
+            eval_report_template_id=self.__read_required(
+                self.EVAL_REPORT_TEMPLATE_ID,
+                self.read_google_eval_report_template_id),
+            eval_report_prefix=self.read_required(
+                '{}.{}'.format(prefixes_path, self.EVAL_REPORT),
+                self.read_google_eval_report_prefix),
+            manager_eval_by_report_prefix=self.read_required(
+                '{}.{}'.format(prefixes_path, self.MANAGER_EVAL_BY_REPORT),
+                self.read_google_manager_eval_by_report_prefix),
+            report_eval_by_manager_prefix=self.read_required(
+                '{}.{}'.format(prefixes_path, self.REPORT_EVAL_BY_MANAGER),
+                self.read_google_report_eval_by_manager_prefix),
+            peer_eval_by_peer_prefix=self.read_required(
+                '{}.{}'.format(prefixes_path, self.PEER_EVAL_BY_PEER),
+                self.read_google_peer_eval_by_peer_prefix),
+            self_eval_prefix=self.read_required(
+                '{}.{}'.format(prefixes_path, self.SELF_EVAL),
+                self.read_google_self_eval_prefix))
+
+    def __read_required(self, key, accessor):
+        return self.read_required(
+            '{}.{}'.format(self.GOOGLE_DRIVE_PROVIDER, key),
+            accessor)
+
 class CompanyConfig(ConfigReader):
 
     COMPANY = 'company'
@@ -228,11 +844,136 @@ class CompanyConfig(ConfigReader):
         config = super().read()
         return config.get(self.COMPANY).get(self.NUMBER_OF_EMPLOYEES)
 
+    def read_company_settings(self):
+        return CompanySettings(
+            domain=self.read_required(
+                'company.domain',
+                self.read_company_domain),
+            number_of_employees=self.read_required(
+                'company.number_of_employees',
+                self.read_company_number_of_employees))
+
+class ServerConfig(ConfigReader):
+
+    SERVER = 'server'
+    MAX_WORKERS = 'max_workers'
+    JOBS = 'jobs'
+    JOBS_PATH = 'path'
+    JOBS_MAX_WORKERS = 'max_workers'
+    JOBS_ORPHANS_CHECK_SECONDS = 'orphans_check_seconds'
+    RESPONSE_CACHE = 'response_cache'
+    RESPONSE_CACHE_ENABLED = 'enabled'
+    RESPONSE_CACHE_TTL_SECONDS = 'ttl_seconds'
+    RESPONSE_CACHE_PATH = 'path'
+    PAGINATION = 'pagination'
+    PAGINATION_INDEX_TTL_SECONDS = 'index_ttl_seconds'
+    TRACING = 'tracing'
+    TRACING_ENABLED = 'enabled'
+    TRACING_PATH = 'path'
+
+    DEFAULT_MAX_WORKERS = 16
+    DEFAULT_JOBS_PATH = 'cache/jobs.sqlite'
+    DEFAULT_JOBS_MAX_WORKERS = 2
+    DEFAULT_JOBS_ORPHANS_CHECK_SECONDS = 30
+    DEFAULT_RESPONSE_CACHE_ENABLED = False
+    DEFAULT_RESPONSE_CACHE_TTL_SECONDS = 60
+    DEFAULT_RESPONSE_CACHE_PATH = 'cache/responses.sqlite'
+    DEFAULT_PAGINATION_INDEX_TTL_SECONDS = 300
+    DEFAULT_TRACING_ENABLED = False
+    DEFAULT_TRACING_PATH = 'traces/spans.json'
+
+    def read_server_max_workers(self):
+        config = super().read()
+        return config.get(self.SERVER, {}).get(
+            self.MAX_WORKERS, self.DEFAULT_MAX_WORKERS)
+
+    def read_server_jobs_path(self):
+        config = super().read()
+        return config.get(self.SERVER, {}).get(self.JOBS, {}).get(
+            self.JOBS_PATH, self.DEFAULT_JOBS_PATH)
+
+    def read_server_jobs_max_workers(self):
+        config = super().read()
+        return config.get(self.SERVER, {}).get(self.JOBS, {}).get(
+            self.JOBS_MAX_WORKERS, self.DEFAULT_JOBS_MAX_WORKERS)
+
+    def read_server_jobs_orphans_check_seconds(self):
+        config = super().read()
+        return config.get(self.SERVER, {}).get(self.JOBS, {}).get(
+            self.JOBS_ORPHANS_CHECK_SECONDS, self.DEFAULT_JOBS_ORPHANS_CHECK_SECONDS)
+
+    def read_server_response_cache_enabled(self):
+        config = super().read()
+        return config.get(self.SERVER, {}).get(self.RESPONSE_CACHE, {}).get(
+            self.RESPONSE_CACHE_ENABLED, self.DEFAULT_RESPONSE_CACHE_ENABLED)
+
+    def read_server_response_cache_ttl_seconds(self):
+        config = super().read()
+        return config.get(self.SERVER, {}).get(self.RESPONSE_CACHE, {}).get(
+            self.RESPONSE_CACHE_TTL_SECONDS, self.DEFAULT_RESPONSE_CACHE_TTL_SECONDS)
+
+    def read_server_response_cache_path(self):
+        config = super().read()
+        return config.get(self.SERVER, {}).get(self.RESPONSE_CACHE, {}).get(
+            self.RESPONSE_CACHE_PATH, self.DEFAULT_RESPONSE_CACHE_PATH)
+
+    def read_server_pagination_index_ttl_seconds(self):
+        config = super().read()
+        return config.get(self.SERVER, {}).get(self.PAGINATION, {}).get(
+            self.PAGINATION_INDEX_TTL_SECONDS, self.DEFAULT_PAGINATION_INDEX_TTL_SECONDS)
+
+    def read_server_tracing_enabled(self):
+        config = super().read()
+        return config.get(self.SERVER, {}).get(self.TRACING, {}).get(
+            self.TRACING_ENABLED, self.DEFAULT_TRACING_ENABLED)
+
+    def read_server_tracing_path(self):
+        config = super().read()
+        return config.get(self.SERVER, {}).get(self.TRACING, {}).get(
+            self.TRACING_PATH, self.DEFAULT_TRACING_PATH)
+
+    def read_server_settings(self):
+        return ServerSettings(
+            max_workers=self.read_server_max_workers(),
+            jobs_path=self.read_server_jobs_path(),
+            jobs_max_workers=self.read_server_jobs_max_workers(),
+            jobs_orphans_check_seconds=self.read_server_jobs_orphans_check_seconds(),
+            response_cache_enabled=self.read_server_response_cache_enabled(),
+            response_cache_ttl_seconds=self.read_server_response_cache_ttl_seconds(),
+            response_cache_path=self.read_server_response_cache_path(),
+            pagination_index_ttl_seconds=self.read_server_pagination_index_ttl_seconds(),
+            tracing_enabled=self.read_server_tracing_enabled(),
+            tracing_path=self.read_server_tracing_path())
+
 class Config(
         ProvidersConfig,
         EvalProcessConfig,
         SlackProviderConfig,
         GmailProviderConfig,
         GoogleDriveProviderConfig,
-        CompanyConfig):
+        CompanyConfig,
+        ServerConfig):
     'Composition of configs'
+
+    def read_settings(self):
+        '''
+        Resolves and validates the whole config once, raising
+        MissingConfigException for the first missing key
+        '''
+        providers = self.read_providers_settings()
+
+        gmail = None
+        slack = None
+        if providers.communication_channel == ProvidersConfig.GMAIL:
+            gmail = self.read_gmail_provider_settings()
+        elif providers.communication_channel == ProvidersConfig.SLACK:
+            slack = self.read_slack_provider_settings()
+
+        return Settings(
+            providers=providers,
+            eval_process=self.read_eval_process_settings(),
+            company=self.read_company_settings(),
+            google_drive=self.read_google_drive_provider_settings(),
+            gmail=gmail,
+            slack=slack,
+            server=self.read_server_settings())
@@ -37,3 +37,18 @@ class NotExistentEmployeeException(CustomException):
 
     def __str__(self):
         return super().get_str('NotExistentEmployeeException')
+
+class MissingConfigException(CustomException):
+
+    def __str__(self):
+        return super().get_str('MissingConfigException')
+
+class InvalidConfigException(CustomException):
+
+    def __str__(self):
+        return super().get_str('InvalidConfigException')
+
+class UnsupportedCharacterException(CustomException):
+
+    def __str__(self):
+        return super().get_str('UnsupportedCharacterException')
@@ -1,8 +1,10 @@
 
 from .exceptions import NotExistentEmployeeException
+from .tracing import traced
 
 class ReviewerResponseFilter:
 
+    @traced('ReviewerResponseFilter.filter_reviewees')
     def filter_reviewees(self,
                          reviewee_evaluations,
                          employees,
@@ -2,15 +2,18 @@ from evalytics.models import PeersAssignment
 from evalytics.models import ReviewerResponse, ReviewerResponseBuilder
 from evalytics.mappers import ResponseFileNameToEvalKind
 from evalytics.google_api import GoogleAPI
-from evalytics.config import Config, ProvidersConfig
+from evalytics.cache import SnapshotCacheFactory
+from evalytics.config import Config, ProvidersConfig, GoogleDriveProviderConfig
 from evalytics.exceptions import MissingDataException
 
-class FormsPlatformFactory(Config):
+class FormsPlatformFactory(SnapshotCacheFactory, Config):
 
-    def get_forms_platform(self):
+    def get_forms_platform(self, force_refresh: bool = False):
         forms_platform = super().read_forms_platform_provider()
         if forms_platform == ProvidersConfig.GOOGLE_FORMS:
-            return GoogleForms()
+            google_forms = GoogleForms()
+            google_forms.set_snapshot_cache(super().get_snapshot_cache(), force_refresh)
+            return google_forms
 
         raise ValueError(forms_platform)
 
@@ -33,40 +36,45 @@ class ReviewerResponseKeyDictStrategy:
 
 class GoogleForms(GoogleAPI, ResponseFileNameToEvalKind, Config):
 
+    FILES_PER_READ = 20
+
     def get_peers_assignment(self):
         files = self.__get_peers_assignment_response_files()
         return self.__read_peers_assignment(files)
 
     def get_responses(self):
-        response_kind = ReviewerResponseKeyDictStrategy.REVIEWER_RESPONSE
-        return self.__get_reviewer_responses(response_kind)
+        return self.group_responses(
+            self.iter_responses(),
+            ReviewerResponseKeyDictStrategy.REVIEWER_RESPONSE)
 
     def get_evaluations(self):
-        response_kind = ReviewerResponseKeyDictStrategy.REVIEWEE_EVALUATION
-        return self.__get_reviewer_responses(response_kind)
+        return self.group_responses(
+            self.iter_responses(),
+            ReviewerResponseKeyDictStrategy.REVIEWEE_EVALUATION)
 
-    def __get_reviewer_responses(self, response_kind):
+    def iter_responses(self):
         '''
-        return {
-            key_1: ReviewerResponse(...),
-            ...
-            key_N: ReviewerResponse(...),
-        }
+        Yields a ReviewerResponse per response line, file by file and line
+        by line, skipping blank lines. Files are read page by page while
+        the responses are consumed until an empty page: first pages are
+        read FILES_PER_READ files at a time, so at most a page of
+        FILES_PER_READ files is kept in memory.
         '''
-        key_strategy = response_kind
-        responses = {}
-        responses_by_filename = self.__get_responses_by_filename()
-        for filename, file_content in responses_by_filename.items():
+        for filename, file_content in self.__iter_responses_by_filename():
 
             questions = file_content['questions']
-            file_responses = file_content['responses']
             eval_kind = file_content['eval_kind']
 
             line_number = 2
-            for line in file_responses:
+            for line in file_content['responses']:
+
+                # Blank rows, e.g. deleted responses, are skipped
+                if len(line) == 0:
+                    line_number += 1
+                    continue
 
                 self.__check_response_line(filename, line)
-                reviewer_response = ReviewerResponseBuilder().build(
+                yield ReviewerResponseBuilder().build(
                     questions,
                     filename,
                     eval_kind,
@@ -74,19 +82,24 @@ class GoogleForms(GoogleAPI, ResponseFileNameToEvalKind, Config):
                     line_number,
                 )
 
-                key = ReviewerResponseKeyDictStrategy().get_key(
-                    key_strategy,
-                    reviewer_response
-                )
+                line_number += 1
 
-                acc_responses = responses.get(key, [])
-                acc_responses.append(reviewer_response)
-                responses.update({
-                    key: acc_responses
-                })
+    def group_responses(self, reviewer_responses, response_kind):
+        '''
+        reviewer_responses: iterable of ReviewerResponse
+        response_kind: ReviewerResponseKeyDictStrategy data kind
 
-                line_number += 1
-            line_number = 2
+        return {
+            key_1: [ReviewerResponse(...), ...],
+            ...
+            key_N: [ReviewerResponse(...), ...],
+        }
+        '''
+        key_strategy = ReviewerResponseKeyDictStrategy()
+        responses = {}
+        for reviewer_response in reviewer_responses:
+            key = key_strategy.get_key(response_kind, reviewer_response)
+            responses.setdefault(key, []).append(reviewer_response)
 
         return responses
 
@@ -96,42 +109,79 @@ class GoogleForms(GoogleAPI, ResponseFileNameToEvalKind, Config):
                 "Missing data in response file: '%s' in line %s" % (
                     filename, line))
 
-    def __get_responses_by_filename(self):
+    def __iter_responses_by_filename(self):
         google_folder = super().read_google_folder()
         responses_folder = super().read_google_responses_folder()
 
         folder_path = f"/{google_folder}/{responses_folder}"
         files = super().googledrive_ls(folder_path)
 
-        # TODO: read responses in batches, read til there's no more responses
-        responses_range = 'A1:V' + str(1000)
-
-        responses_by_file = {}
-        for file in files:
+        # Last file wins when two files have the same name
+        response_files = {}
+        for file in sorted(files, key=lambda file: (file.name, file.id)):
             eval_kind = super().response_file_name_to_eval_kind(file.name)
 
             if eval_kind is None:
                 continue
 
-            rows = super().get_file_values(
-                spreadsheet_id=file.id,
-                rows_range=responses_range)
+            response_files.update({
+                file.name: (file, eval_kind)
+            })
+        response_files = list(response_files.values())
 
-            if len(rows) < 1:
-                raise MissingDataException("Missing data in response file: %s" % (file.name))
+        # First pages are read FILES_PER_READ files at once, the header found
+        # there tells how many columns the following pages have to read
+        page_size = super().read_google_responses_reader_page_size()
+        first_page_range = super().get_rows_range(1, page_size)
+        for start in range(0, len(response_files), self.FILES_PER_READ):
+            window = response_files[start:start + self.FILES_PER_READ]
+            first_pages = self.__read_files_values([
+                (file.id, first_page_range)
+                for file, _ in window
+            ])
 
-            questions = rows[0][3:]
-            file_responses = rows[1:]
+            for file, eval_kind in window:
+                first_page = first_pages.pop((file.id, first_page_range), [])
 
-            responses_by_file.update({
-                file.name: {
+                if len(first_page) < 1:
+                    raise MissingDataException("Missing data in response file: %s" % (file.name))
+
+                questions = first_page[0][3:]
+
+                yield file.name, {
                     'questions': questions,
-                    'responses': file_responses,
+                    'responses': self.__iter_file_responses(file.id, first_page, page_size),
                     'eval_kind': eval_kind,
                 }
-            })
 
-        return responses_by_file
+    def __iter_file_responses(self, file_id, first_page, page_size):
+        yield from first_page[1:]
+
+        # Blank rows may end a page, only an empty page ends the file
+        empty_rows = page_size - len(first_page)
+        last_column = super().get_column_letter(len(first_page[0]))
+        for page in super().iter_file_values_pages(
+                file_id,
+                first_row=page_size + 1,
+                last_column=last_column,
+                page_size=page_size):
+            yield from [[]] * empty_rows
+            empty_rows = 0
+            yield from page
+
+    def __read_files_values(self, spreadsheet_ranges):
+        mode = super().read_google_responses_reader_mode()
+
+        if mode == GoogleDriveProviderConfig.RESPONSES_READER_MODE_CONCURRENT:
+            return super().concurrent_get_file_values(
+                spreadsheet_ranges,
+                max_workers=super().read_google_responses_reader_max_workers(),
+                requests_per_second=super().read_google_responses_reader_requests_per_second())
+
+        elif mode == GoogleDriveProviderConfig.RESPONSES_READER_MODE_BATCH:
+            return super().batch_get_file_values(spreadsheet_ranges)
+
+        raise ValueError(mode)
 
     def __get_peers_assignment_response_files(self):
         google_folder = super().read_google_folder()
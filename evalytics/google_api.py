@@ -1,8 +1,23 @@
-from googledrive.api import GoogleService
+import threading
+import time
+
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
+
+from googledrive.api import GoogleAuth, GoogleService
 from googledrive.api import GoogleDrive, SheetsService
 from googledrive.exceptions import MissingGoogleDriveFileException
+from googledrive.models import GoogleFile
 
-from evalytics.models import EvalKind
+from evalytics.renderers import ReportDocument, ReportDocumentBuilder
+from evalytics.mappers import HttpErrorToException
+from evalytics.concurrency import ConcurrentMapper
+from evalytics.tracing import Span, trace_public_methods
+from evalytics.retry import GoogleApiRetry
+from evalytics.rate_limits import GoogleApiRateLimiter
 
 
 # If modifying these scopes, delete the file token.pickle.
@@ -23,7 +38,205 @@ SCOPES = [
 
 CREDENTIALS = 'credentials.json'
 
-class GmailService(GoogleService):
+class GoogleServiceBuilder:
+
+    def get_credentials(self, credentials_file, scopes):
+        return GoogleAuth().authenticate(credentials_file, scopes)
+
+    def build_service(self, service_id, service_version, http, request_builder):
+        return build(
+            service_id,
+            service_version,
+            http=http,
+            requestBuilder=request_builder,
+            cache_discovery=False)
+
+class MeasuredHttpRequest(HttpRequest, GoogleApiRetry, GoogleApiRateLimiter):
+    '''
+    Request recording its calls and latency by service and method, e.g.
+    service 'sheets' and method 'spreadsheets.values.get', and tracing them
+    when tracing is on. Every attempt waits for its rate limit and failed
+    calls are retried as the retry policy says, the recorded latency
+    includes both.
+    '''
+
+    def execute(self, *args, **kwargs):
+        method_id = self.methodId or 'unknown'
+        service, _, method = method_id.partition('.')
+        with self.trace(
+                method_id,
+                Span.KIND_CLIENT,
+                {'rpc.service': service, 'rpc.method': method, 'http.method': self.method}), \
+                self.time_google_api_call(service, method):
+            return self.call_with_retry(
+                lambda: self.__execute(method_id, *args, **kwargs),
+                method_id,
+                self.retry_policy.is_idempotent(method_id, self.method))
+
+    def __execute(self, method_id, *args, **kwargs):
+        self.acquire_google_api_quota(method_id, self.method)
+        return super().execute(*args, **kwargs)
+
+class GoogleApiBatchExecutor(GoogleApiRetry, GoogleApiRateLimiter):
+
+    def execute_batch(self, new_batch, calls, method_id: str, idempotent: bool):
+        '''
+        Executes calls, a list of (request, callback) to method_id, in a
+        batch built by new_batch, once the rate limit allows every call.
+
+        A failed batch is retried whole. Calls failing inside it with an
+        error the retry policy retries are sent again in a new batch, after
+        the policy's wait for the longest of them. Their callbacks only get
+        the errors that can't be retried or whose attempts are exhausted.
+        '''
+        retry_policy = GoogleApiRetry.retry_policy
+        service, _, method = method_id.partition('.')
+        batch_method_id = '%s.batch.%s' % (service, method)
+
+        attempt = 1
+        while len(calls) > 0:
+            retryable = attempt < retry_policy.max_attempts
+            failed_calls = []
+
+            batch = new_batch()
+            for request, callback in calls:
+                batch.add(
+                    request,
+                    callback=self.__build_retry_callback(
+                        request, callback, idempotent, retryable, failed_calls))
+
+            with self.time_google_api_call(service, 'batch.' + method):
+                self.call_with_retry(
+                    lambda: self.__execute_batch(batch, method_id, len(calls), failed_calls),
+                    batch_method_id,
+                    idempotent)
+
+            if len(failed_calls) == 0:
+                return
+
+            reason, delay = max(
+                (
+                    (retry_policy.get_retry_reason(error, idempotent),
+                     retry_policy.get_delay_seconds(attempt, error))
+                    for _, _, error in failed_calls
+                ),
+                key=lambda reason_delay: reason_delay[1])
+            self.wait_before_retry(method_id, reason, attempt, delay)
+
+            calls = [(request, callback) for request, callback, _ in failed_calls]
+            attempt += 1
+
+    def __execute_batch(self, batch, method_id, requests, failed_calls):
+        # Google counts every call of a batch against its quota
+        self.acquire_google_api_quota(method_id, requests=requests)
+        # A batch retried whole reports its calls again
+        del failed_calls[:]
+        batch.execute()
+
+    def __build_retry_callback(self, request, callback, idempotent, retryable, failed_calls):
+        retry_policy = GoogleApiRetry.retry_policy
+
+        def retry_callback(request_id, response, exception):
+            if exception is not None and retryable and \
+                    retry_policy.get_retry_reason(exception, idempotent) is not None:
+                failed_calls.append((request, callback, exception))
+                return
+
+            callback(request_id, response, exception)
+        return retry_callback
+
+class GoogleServiceRegistry(GoogleServiceBuilder):
+    '''
+    Builds each (service id, version, credentials) client once per process.
+
+    Built clients are shared between threads: every request they create is
+    executed through an authorized http connection owned by the calling
+    thread, so connections are kept alive and reused per thread and never
+    shared, as httplib2 is not thread-safe.
+    '''
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+        self.__credentials = {}
+        self.__services = {}
+        self.__stats = {
+            'builds': 0,
+            'reuses': 0,
+        }
+
+    def get_service(self, service_id, service_version, credentials_file, scopes):
+        key = (service_id, service_version, credentials_file, tuple(scopes))
+
+        with self.__lock:
+            service = self.__services.get(key, None)
+            if service is not None:
+                self.__stats['reuses'] += 1
+                return service
+
+            credentials = self.__get_registry_credentials(credentials_file, scopes)
+            service = super().build_service(
+                service_id,
+                service_version,
+                http=self.__get_thread_http(credentials),
+                request_builder=self.__get_request_builder(credentials))
+
+            self.__services.update({key: service})
+            self.__stats['builds'] += 1
+
+        return service
+
+    def get_stats(self):
+        with self.__lock:
+            return dict(self.__stats)
+
+    def __get_registry_credentials(self, credentials_file, scopes):
+        key = (credentials_file, tuple(scopes))
+        if key not in self.__credentials:
+            self.__credentials.update({
+                key: super().get_credentials(credentials_file, scopes)
+            })
+        return self.__credentials[key]
+
+    def __get_thread_http(self, credentials):
+        thread_https = getattr(self.__local, 'https', None)
+        if thread_https is None:
+            thread_https = {}
+            self.__local.https = thread_https
+
+        http = thread_https.get(id(credentials), None)
+        if http is None:
+            http = AuthorizedHttp(credentials, http=httplib2.Http())
+            thread_https.update({id(credentials): http})
+
+        return http
+
+    def __get_request_builder(self, credentials):
+        def build_request(http, *args, **kwargs):
+            return MeasuredHttpRequest(self.__get_thread_http(credentials), *args, **kwargs)
+        return build_request
+
+class SharedGoogleService(GoogleService):
+    '''
+    Hands out clients from a process-wide registry instead of building them
+    per GoogleService instance, so fresh storages, forms platforms and
+    communication channels reuse the same clients
+    '''
+
+    service_registry = GoogleServiceRegistry()
+
+    def get_service(self, service_id, service_version):
+        return self.service_registry.get_service(
+            service_id,
+            service_version,
+            CREDENTIALS,
+            SCOPES)
+
+    def get_service_registry_stats(self):
+        return self.service_registry.get_stats()
+
+@trace_public_methods
+class GmailService(SharedGoogleService):
 
     GMAIL_SERVICE_ID = 'gmail'
     GMAIL_SERVICE_VERSION = 'v1'
@@ -40,7 +253,697 @@ class GmailService(GoogleService):
             userId=user_id,
             body=body).execute()
 
-class DocsService(GoogleService):
+@trace_public_methods
+class DriveMetadataService(GoogleDrive, HttpErrorToException, GoogleApiBatchExecutor):
+
+    # Google recommends to keep HTTP batches small, 50 calls at most
+    BATCH_MAX_REQUESTS = 50
+
+    MODIFIED_TIME = 'modifiedTime'
+    FIELDS_MODIFIED_TIME = f'id, {MODIFIED_TIME}'
+
+    def get_files_modified_time(self, file_ids):
+        '''
+        Reads the last modification time of several files sending the
+        files.get calls together in HTTP batches.
+
+        return {
+            file_id: modified_time,
+            ...
+        }
+        '''
+        file_ids = list(dict.fromkeys(file_ids))
+
+        drive_service = super().get_service(
+            self.DRIVE_SERVICE_ID,
+            self.DRIVE_SERVICE_VERSION
+        )
+
+        modified_times = {}
+        for chunk_start in range(0, len(file_ids), self.BATCH_MAX_REQUESTS):
+            chunk = file_ids[chunk_start:chunk_start + self.BATCH_MAX_REQUESTS]
+            errors = []
+
+            calls = [
+                (
+                    drive_service.files().get(
+                        fileId=file_id,
+                        fields=self.FIELDS_MODIFIED_TIME),
+                    self.__build_modified_time_callback(
+                        file_id, modified_times, errors)
+                )
+                for file_id in chunk
+            ]
+            self.execute_batch(
+                drive_service.new_batch_http_request, calls,
+                'drive.files.get', idempotent=True)
+
+            if len(errors) > 0:
+                raise errors[0]
+
+        return modified_times
+
+    def __build_modified_time_callback(self, file_id, modified_times, errors):
+        def callback(request_id, response, exception):
+            if exception is not None:
+                errors.append(self.http_error_to_exception(exception))
+                return
+
+            modified_times.update({
+                file_id: response.get(self.MODIFIED_TIME)
+            })
+        return callback
+
+@trace_public_methods
+class DrivePermissionsService(GoogleDrive, HttpErrorToException, GoogleApiBatchExecutor):
+
+    # Google recommends to keep HTTP batches small, 50 calls at most
+    BATCH_MAX_REQUESTS = 50
+
+    # Roles that already allow a user to comment a file
+    COMMENTING_ROLES = ('owner', 'organizer', 'fileOrganizer', 'writer', 'commenter')
+
+    # Largest page permissions.list allows
+    PERMISSIONS_PAGE_SIZE = 100
+
+    PERMISSIONS = 'permissions'
+    NEXT_PAGE_TOKEN = 'nextPageToken'
+    FIELDS_PERMISSIONS = 'nextPageToken, permissions(emailAddress, role)'
+
+    def get_files_permissions(self, file_ids):
+        '''
+        Lists the user permissions of several files sending the
+        permissions.list calls together in HTTP batches, a batch per page.
+
+        A failing file doesn't stop the others, return (
+            {
+                file_id: {
+                    lowercase_email_address: role,
+                    ...
+                },
+                ...
+            },
+            {
+                file_id: exception,
+                ...
+            }
+        )
+        '''
+        drive_service = super().get_service(
+            self.DRIVE_SERVICE_ID,
+            self.DRIVE_SERVICE_VERSION
+        )
+
+        permissions = {}
+        errors = {}
+        page_tokens = {file_id: None for file_id in file_ids}
+        while len(page_tokens) > 0:
+            pages = list(page_tokens.items())
+            page_tokens = {}
+            for chunk_start in range(0, len(pages), self.BATCH_MAX_REQUESTS):
+                chunk = pages[chunk_start:chunk_start + self.BATCH_MAX_REQUESTS]
+
+                calls = [
+                    (
+                        self.__build_permissions_request(
+                            drive_service, file_id, page_token),
+                        self.__build_permissions_callback(
+                            file_id, permissions, page_tokens, errors)
+                    )
+                    for file_id, page_token in chunk
+                ]
+                self.execute_batch(
+                    drive_service.new_batch_http_request, calls,
+                    'drive.permissions.list', idempotent=True)
+
+        return permissions, errors
+
+    def batch_create_permissions(self, permissions, role: str):
+        '''
+        Grants role to every (file_id, email_address) in permissions sending
+        the permissions.create calls together in HTTP batches.
+
+        A failing grant doesn't stop the others, return {
+            (file_id, email_address): exception,
+            ...
+        }
+        '''
+        permissions = list(dict.fromkeys(permissions))
+
+        drive_service = super().get_service(
+            self.DRIVE_SERVICE_ID,
+            self.DRIVE_SERVICE_VERSION
+        )
+
+        errors = {}
+        for chunk_start in range(0, len(permissions), self.BATCH_MAX_REQUESTS):
+            chunk = permissions[chunk_start:chunk_start + self.BATCH_MAX_REQUESTS]
+
+            calls = [
+                (
+                    drive_service.permissions().create(
+                        fileId=file_id,
+                        body={
+                            'type': 'user',
+                            'emailAddress': email_address,
+                            'role': role,
+                        }),
+                    self.__build_create_permission_callback(
+                        (file_id, email_address), errors)
+                )
+                for file_id, email_address in chunk
+            ]
+            self.execute_batch(
+                drive_service.new_batch_http_request, calls,
+                'drive.permissions.create', idempotent=False)
+
+        return errors
+
+    def __build_permissions_request(self, drive_service, file_id, page_token):
+        arguments = {
+            'fileId': file_id,
+            'pageSize': self.PERMISSIONS_PAGE_SIZE,
+            'fields': self.FIELDS_PERMISSIONS,
+        }
+        if page_token is not None:
+            arguments.update({'pageToken': page_token})
+
+        return drive_service.permissions().list(**arguments)
+
+    def __build_permissions_callback(self, file_id, permissions, page_tokens, errors):
+        def callback(request_id, response, exception):
+            if exception is not None:
+                # The pages already read of the file aren't all of them
+                permissions.pop(file_id, None)
+                errors.update({
+                    file_id: self.http_error_to_exception(exception)
+                })
+                return
+
+            permissions.setdefault(file_id, {}).update({
+                permission.get('emailAddress', '').lower(): permission.get('role')
+                for permission in response.get(self.PERMISSIONS, [])
+            })
+
+            page_token = response.get(self.NEXT_PAGE_TOKEN)
+            if page_token:
+                page_tokens.update({file_id: page_token})
+        return callback
+
+    def __build_create_permission_callback(self, permission, errors):
+        def callback(request_id, response, exception):
+            if exception is not None:
+                errors.update({
+                    permission: self.http_error_to_exception(exception)
+                })
+        return callback
+
+class DrivePathIndex:
+    '''
+    Process-wide index of Drive folder listings by slash path.
+
+    Listings are kept ttl_seconds so files created or renamed outside
+    Evalytics show up after a while.
+    '''
+
+    DEFAULT_TTL_SECONDS = 60
+
+    def __init__(self, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+
+        self.__lock = threading.Lock()
+        self.__listings = {}
+        self.__stats = {
+            'hits': 0,
+            'misses': 0,
+            'invalidations': 0,
+        }
+
+    def get_files(self, folder_path: str):
+        '''
+        return the files of a folder or None when the folder isn't indexed
+        '''
+        with self.__lock:
+            listing = self.__listings.get(folder_path)
+            if listing is not None and time.monotonic() - listing[0] > self.ttl_seconds:
+                listing = None
+                del self.__listings[folder_path]
+
+            self.__stats['hits' if listing is not None else 'misses'] += 1
+
+        if listing is None:
+            return None
+        return list(listing[1])
+
+    def set_files(self, folder_path: str, files):
+        files = list(files)
+        with self.__lock:
+            self.__listings.update({
+                folder_path: (time.monotonic(), files, self.__get_folder_id(files))
+            })
+
+    def add_copy(self, file_id: str, copy: GoogleFile):
+        '''
+        Adds copy to the listings holding file_id, Drive copies a file
+        into the folders of the original
+        '''
+        with self.__lock:
+            for _, files, _ in self.__listings.values():
+                for google_file in files:
+                    if google_file.id == file_id:
+                        files.append(GoogleFile(
+                            name=copy.name,
+                            id=copy.id,
+                            parents=list(google_file.parents),
+                            mime_type=copy.mime_type,
+                            export_links=copy.export_links))
+                        break
+
+    def move_file(self, file_id: str, current_parent: str, new_parent: str):
+        '''
+        Moves file_id from the listing of current_parent to the listing of
+        new_parent. Listings whose folder isn't known, and the listing of
+        new_parent when file_id isn't indexed, are dropped: they could be
+        of either folder and can't be patched without guessing.
+        '''
+        with self.__lock:
+            moved_file = None
+            for _, files, _ in self.__listings.values():
+                for google_file in files:
+                    if google_file.id == file_id:
+                        moved_file = google_file
+                        break
+
+            for folder_path, (_, files, folder_id) in list(self.__listings.items()):
+                if folder_id == current_parent:
+                    files[:] = [f for f in files if f.id != file_id]
+                elif folder_id == new_parent and moved_file is not None:
+                    files.append(GoogleFile(
+                        name=moved_file.name,
+                        id=moved_file.id,
+                        parents=[
+                            parent for parent in moved_file.parents
+                            if parent != current_parent
+                        ] + [new_parent],
+                        mime_type=moved_file.mime_type,
+                        export_links=moved_file.export_links))
+                elif folder_id == new_parent or folder_id is None:
+                    del self.__listings[folder_path]
+                    self.__stats['invalidations'] += 1
+
+    def __get_folder_id(self, files):
+        # Every file of a folder has it as parent, the folder is only
+        # known when that leaves a single candidate
+        candidates = None
+        for google_file in files:
+            parents = set(google_file.parents)
+            candidates = parents if candidates is None else candidates & parents
+
+        if candidates is None or len(candidates) != 1:
+            return None
+        return next(iter(candidates))
+
+    def invalidate(self):
+        with self.__lock:
+            self.__listings.clear()
+            self.__stats['invalidations'] += 1
+
+    def get_stats(self):
+        with self.__lock:
+            return dict(self.__stats)
+
+@trace_public_methods
+class DrivePathIndexService:
+    '''
+    Resolves slash paths with a shared DrivePathIndex: a folder is listed
+    once and every file lookup inside it is answered from that listing.
+    Copying or moving files updates the listings of their folders.
+    '''
+
+    drive_path_index = DrivePathIndex()
+
+    @staticmethod
+    def configure_path_index(ttl_seconds: int):
+        DrivePathIndexService.drive_path_index = DrivePathIndex(ttl_seconds)
+
+    def googledrive_ls(self, path: str):
+        folder_path = self.__normalize_path(path)
+
+        files = self.drive_path_index.get_files(folder_path)
+        if files is None:
+            files = super().googledrive_ls(path)
+            self.drive_path_index.set_files(folder_path, files)
+
+        return files
+
+    def googledrive_get_file(self, path: str):
+        path_elements = self.__normalize_path(path).split('/')
+
+        # Top-level paths aren't inside a folder to index
+        if len(path_elements) < 3:
+            return super().googledrive_get_file(path)
+
+        folder_path = '/'.join(path_elements[:-1])
+        filename = path_elements[-1]
+
+        for google_file in self.googledrive_ls(folder_path):
+            if google_file.name == filename:
+                return google_file
+        return None
+
+    def copy_file(self, file_id, new_filename):
+        new_file_id = super().copy_file(file_id, new_filename)
+        self.drive_path_index.add_copy(file_id, GoogleFile(
+            name=new_filename,
+            id=new_file_id,
+            parents=[],
+            mime_type=GoogleDrive.MIMETYPE_DOCUMENT,
+            export_links={}))
+        return new_file_id
+
+    def update_file_parent(self, file_id, current_parent, new_parent):
+        super().update_file_parent(file_id, current_parent, new_parent)
+        self.drive_path_index.move_file(file_id, current_parent, new_parent)
+
+    def __normalize_path(self, path: str):
+        return '/' + '/'.join(
+            path_element
+            for path_element in path.split('/')
+            if path_element != '')
+
+@trace_public_methods
+class SheetsBatchService(SheetsService, HttpErrorToException, ConcurrentMapper, GoogleApiBatchExecutor):
+
+    # Google recommends to keep HTTP batches small, 50 calls at most
+    BATCH_MAX_REQUESTS = 50
+
+    VALUE_RANGES = 'valueRanges'
+    VALUES = 'values'
+
+    def batch_get_file_values(self, spreadsheet_ranges):
+        '''
+        Reads several ranges of several spreadsheets in as few round trips
+        as possible: ranges sharing a spreadsheet are read with one
+        values.batchGet call and calls to different spreadsheets are sent
+        together in HTTP batches.
+
+        spreadsheet_ranges: [(spreadsheet_id, rows_range), ...]
+
+        return {
+            (spreadsheet_id, rows_range): [row_1, ..., row_N],
+            ...
+        }
+        '''
+        ranges_by_spreadsheet = {}
+        for spreadsheet_id, rows_range in spreadsheet_ranges:
+            if spreadsheet_id is None:
+                raise MissingGoogleDriveFileException('Missing file: {}'.format(spreadsheet_id))
+
+            ranges = ranges_by_spreadsheet.setdefault(spreadsheet_id, [])
+            if rows_range not in ranges:
+                ranges.append(rows_range)
+
+        sheets_service = super().get_service(
+            self.SHEETS_SERVICE_ID,
+            self.SHEETS_SERVICE_VERSION
+        )
+
+        values = {}
+        spreadsheet_ids = list(ranges_by_spreadsheet.keys())
+        for chunk_start in range(0, len(spreadsheet_ids), self.BATCH_MAX_REQUESTS):
+            chunk = spreadsheet_ids[chunk_start:chunk_start + self.BATCH_MAX_REQUESTS]
+            errors = []
+
+            calls = [
+                (
+                    self.__build_get_values_request(
+                        sheets_service, spreadsheet_id, ranges_by_spreadsheet[spreadsheet_id]),
+                    self.__build_get_values_callback(
+                        spreadsheet_id, ranges_by_spreadsheet[spreadsheet_id], values, errors)
+                )
+                for spreadsheet_id in chunk
+            ]
+            self.execute_batch(
+                sheets_service.new_batch_http_request, calls,
+                'sheets.spreadsheets.values.batchGet', idempotent=True)
+
+            if len(errors) > 0:
+                raise errors[0]
+
+        return values
+
+    def concurrent_get_file_values(self,
+                                   spreadsheet_ranges,
+                                   max_workers: int,
+                                   requests_per_second=None):
+        '''
+        Reads several ranges with one values.get call per range, running
+        at most max_workers calls at a time and starting at most
+        requests_per_second of them per second.
+
+        Returns the same structure as batch_get_file_values
+        '''
+        spreadsheet_ranges = list(dict.fromkeys(spreadsheet_ranges))
+        for spreadsheet_id, _ in spreadsheet_ranges:
+            if spreadsheet_id is None:
+                raise MissingGoogleDriveFileException('Missing file: {}'.format(spreadsheet_id))
+
+        sheets_service = super().get_service(
+            self.SHEETS_SERVICE_ID,
+            self.SHEETS_SERVICE_VERSION
+        )
+
+        def get_values(spreadsheet_range):
+            spreadsheet_id, rows_range = spreadsheet_range
+            return self.__execute_get_values(sheets_service, spreadsheet_id, rows_range)
+
+        values = super().concurrent_map(
+            get_values,
+            spreadsheet_ranges,
+            max_workers=max_workers,
+            requests_per_second=requests_per_second)
+
+        return dict(zip(spreadsheet_ranges, values))
+
+    def iter_file_values_pages(self,
+                               spreadsheet_id,
+                               first_row: int,
+                               last_column: str,
+                               page_size: int):
+        '''
+        Reads a spreadsheet from first_row on in windows of page_size rows
+        between columns A and last_column, yielding every window as soon as
+        it arrives. Stops at the first empty window.
+
+        Sheets API omits the trailing empty rows of a window, they're given
+        back as empty rows at the start of the next window that isn't
+        empty, so every row keeps its position.
+        '''
+        empty_rows = 0
+        page_first_row = first_row
+        while True:
+            rows_range = self.get_rows_range(
+                page_first_row, page_first_row + page_size - 1, last_column)
+            rows = self.read_file_values(spreadsheet_id, rows_range)
+
+            if len(rows) == 0:
+                return
+
+            yield [[]] * empty_rows + rows
+
+            empty_rows = page_size - len(rows)
+            page_first_row += page_size
+
+    def read_file_values(self, spreadsheet_id, rows_range):
+        '''
+        Reads a range with one values.get call. Unlike get_file_values the
+        rows are not kept in memory for the rest of the process.
+        '''
+        if spreadsheet_id is None:
+            raise MissingGoogleDriveFileException('Missing file: {}'.format(spreadsheet_id))
+
+        sheets_service = super().get_service(
+            self.SHEETS_SERVICE_ID,
+            self.SHEETS_SERVICE_VERSION
+        )
+        return self.__execute_get_values(sheets_service, spreadsheet_id, rows_range)
+
+    def get_rows_range(self, first_row: int, last_row: int, last_column: str = None):
+        '''
+        A1 notation of rows first_row to last_row, every column when
+        last_column is None
+        '''
+        if last_column is None:
+            return '{}:{}'.format(first_row, last_row)
+
+        return 'A{}:{}{}'.format(first_row, last_column, last_row)
+
+    def get_column_letter(self, column_number: int):
+        '''
+        1 -> A, 26 -> Z, 27 -> AA, ...
+        '''
+        letters = ''
+        while column_number > 0:
+            column_number, remainder = divmod(column_number - 1, 26)
+            letters = chr(ord('A') + remainder) + letters
+        return letters
+
+    def __execute_get_values(self, sheets_service, spreadsheet_id, rows_range):
+        request = self.__build_get_values_request(
+            sheets_service, spreadsheet_id, [rows_range])
+        try:
+            return request.execute().get(self.VALUES, [])
+        except HttpError as e:
+            raise self.http_error_to_exception(e)
+
+    def __build_get_values_request(self, sheets_service, spreadsheet_id, ranges):
+        if len(ranges) == 1:
+            return sheets_service.spreadsheets().values().get(
+                spreadsheetId=spreadsheet_id,
+                range=ranges[0])
+
+        return sheets_service.spreadsheets().values().batchGet(
+            spreadsheetId=spreadsheet_id,
+            ranges=ranges)
+
+    def __build_get_values_callback(self, spreadsheet_id, ranges, values, errors):
+        def callback(request_id, response, exception):
+            if exception is not None:
+                errors.append(self.http_error_to_exception(exception))
+                return
+
+            if len(ranges) == 1:
+                value_ranges = [response]
+            else:
+                value_ranges = response.get(self.VALUE_RANGES, [])
+
+            for rows_range, value_range in zip(ranges, value_ranges):
+                values.update({
+                    (spreadsheet_id, rows_range): value_range.get(self.VALUES, [])
+                })
+        return callback
+
+@trace_public_methods
+class SnapshotCachedSheetsService:
+    '''
+    Serves spreadsheet reads from a SnapshotCache once one is set.
+
+    Every read costs a batched Drive metadata check, ranges of files whose
+    modifiedTime didn't change are returned from the snapshots and only the
+    rest are downloaded. With force_refresh every range is downloaded and
+    its snapshot replaced.
+    '''
+
+    snapshot_cache = None
+    force_refresh = False
+
+    def set_snapshot_cache(self, snapshot_cache, force_refresh: bool = False):
+        self.snapshot_cache = snapshot_cache
+        self.force_refresh = force_refresh
+        self.__modified_times = {}
+
+    def get_file_values(self, spreadsheet_id, rows_range):
+        if self.snapshot_cache is None:
+            return super().get_file_values(spreadsheet_id, rows_range)
+
+        # googledrive keeps whatever it reads in memory for the rest of the
+        # process, the snapshots replace that cache
+        return self.read_file_values(spreadsheet_id, rows_range)
+
+    def read_file_values(self, spreadsheet_id, rows_range):
+        if self.snapshot_cache is None:
+            return super().read_file_values(spreadsheet_id, rows_range)
+
+        spreadsheet_range = (spreadsheet_id, rows_range)
+        values, missing = self.__get_snapshots([spreadsheet_range])
+        if len(missing) > 0:
+            values.update({
+                spreadsheet_range: super().read_file_values(spreadsheet_id, rows_range)
+            })
+            self.__put_snapshots(values)
+
+        return values[spreadsheet_range]
+
+    def batch_get_file_values(self, spreadsheet_ranges):
+        if self.snapshot_cache is None:
+            return super().batch_get_file_values(spreadsheet_ranges)
+
+        values, missing = self.__get_snapshots(spreadsheet_ranges)
+        if len(missing) > 0:
+            downloaded_values = super().batch_get_file_values(missing)
+            self.__put_snapshots(downloaded_values)
+            values.update(downloaded_values)
+
+        return values
+
+    def concurrent_get_file_values(self,
+                                   spreadsheet_ranges,
+                                   max_workers: int,
+                                   requests_per_second=None):
+        if self.snapshot_cache is None:
+            return super().concurrent_get_file_values(
+                spreadsheet_ranges, max_workers, requests_per_second)
+
+        values, missing = self.__get_snapshots(spreadsheet_ranges)
+        if len(missing) > 0:
+            downloaded_values = super().concurrent_get_file_values(
+                missing, max_workers, requests_per_second)
+            self.__put_snapshots(downloaded_values)
+            values.update(downloaded_values)
+
+        return values
+
+    def update_file_values(self, spreadsheet_id, rows_range, value_input_option, values):
+        response = super().update_file_values(
+            spreadsheet_id, rows_range, value_input_option, values)
+
+        if self.snapshot_cache is not None:
+            self.__modified_times.pop(spreadsheet_id, None)
+            self.snapshot_cache.invalidate(spreadsheet_id)
+
+        return response
+
+    def __get_snapshots(self, spreadsheet_ranges):
+        spreadsheet_ranges = list(dict.fromkeys(spreadsheet_ranges))
+
+        # Modification times are checked once per instance, storages and
+        # forms platforms are built per request
+        unchecked_file_ids = [
+            spreadsheet_id
+            for spreadsheet_id, _ in spreadsheet_ranges
+            if spreadsheet_id is not None and spreadsheet_id not in self.__modified_times
+        ]
+        if len(unchecked_file_ids) > 0:
+            self.__modified_times.update(
+                super().get_files_modified_time(unchecked_file_ids))
+
+        values = {}
+        missing = []
+        for spreadsheet_range in spreadsheet_ranges:
+            spreadsheet_id, rows_range = spreadsheet_range
+            modified_time = self.__modified_times.get(spreadsheet_id)
+
+            snapshot = None
+            if modified_time is not None and not self.force_refresh:
+                snapshot = self.snapshot_cache.get(spreadsheet_id, rows_range, modified_time)
+
+            if snapshot is None:
+                missing.append(spreadsheet_range)
+            else:
+                values.update({
+                    spreadsheet_range: snapshot
+                })
+
+        return values, missing
+
+    def __put_snapshots(self, values):
+        for (spreadsheet_id, rows_range), rows in values.items():
+            modified_time = self.__modified_times.get(spreadsheet_id)
+            if modified_time is not None:
+                self.snapshot_cache.put(spreadsheet_id, rows_range, modified_time, rows)
+
+@trace_public_methods
+class DocsService(SharedGoogleService):
 
     DOCS_SERVICE_ID = 'docs'
     DOCS_SERVICE_VERSION = 'v1'
@@ -74,30 +977,10 @@ class DocsService(GoogleService):
             documentId=document_id,
             body={'requests': requests}).execute()
 
-    def get_delete_tokens_requests(self, tokens):
-        delete_tokens_requests = []
-        for _, tokens in tokens.items():
-            delete_tokens_requests.append({
-                    'replaceAllText': {
-                    'containsText': {
-                        'text': '%{}%'.format(tokens['start']),
-                        'matchCase':  'true'
-                    },
-                    'replaceText': '',
-                }
-            })
-            delete_tokens_requests.append({
-                    'replaceAllText': {
-                    'containsText': {
-                        'text': '%{}%'.format(tokens['end']),
-                        'matchCase':  'true'
-                    },
-                    'replaceText': '',
-                }
-            })
-        return delete_tokens_requests
+@trace_public_methods
+class FilesAPI(DocsService, ReportDocumentBuilder):
 
-class FilesAPI(DocsService):
+    __template_eval_report_ranges = None
 
     def get_file_rows_from_folder(self,
                                   foldername: str,
@@ -143,39 +1026,97 @@ class FilesAPI(DocsService):
                                        eval_process_id,
                                        document_id,
                                        reviewee,
-                                       reviewee_evaluations):
-        eval_report_with_tokens = self.__build_eval_report_with_tokens(
-            eval_process_id,
-            reviewee_evaluations)
-        self.__insert_eval_report_with_tokens(
-            document_id,
-            eval_report_with_tokens,
-            reviewee)
-        self.__apply_eval_report_style(document_id)
-        self.__delete_tokens_from_document(document_id)
-
-    def __get_eval_report_style_tokens(self):
-        return {
-            'eval_title': {
-                'start': 'start-eval-title',
-                'end': 'end-eval-title'
-            },
-            'reviewer': {
-                'start': 'start-reviewer',
-                'end': 'end-reviewer',
-            },
-            'question': {
-                'start': 'start-question',
-                'end': 'end-question',
-            },
-            'answer': {
-                'start': 'start-answer',
-                'end': 'end-answer',
+                                       reviewee_evaluations,
+                                       template_id=None):
+        '''
+        Replaces what follows the first horizontal rule of the document with
+        the eval report using one documents.get and one documents.batchUpdate
+        call. Text and style ranges are computed locally.
+
+        When the document is a fresh copy of template_id the layout of the
+        template is read once and reused for every copy, so rendering the
+        report costs a single documents.batchUpdate call.
+        '''
+        if template_id is None:
+            document = super().get_document(document_id)
+            insert_index, end_index = self.__get_eval_report_range(document)
+        else:
+            insert_index, end_index = self.__get_template_eval_report_range(template_id)
+
+        requests = []
+        if end_index is not None:
+            requests.append({
+                'deleteContentRange':{
+                    'range': {
+                        'segmentId': '',
+                        'startIndex': insert_index,
+                        'endIndex': end_index
+                    }
+                }
+            })
+
+        document = super().build_report_document(eval_process_id, reviewee_evaluations)
+        requests.append({
+            'insertText': {
+                'text': document.get_text(),
+                'location': {
+                    'index': insert_index,
+                }
+            }
+        })
+
+        for span in document.get_spans():
+            style_request = self.__get_eval_report_style(
+                span.kind,
+                insert_index + span.offset,
+                insert_index + span.offset + span.length)
+            if style_request is not None:
+                requests.append(style_request)
+
+        # Header placeholders go last, they may change the length of the text
+        # before the report and every index above is computed without them
+        requests.append({
+            'replaceAllText': {
+                'containsText': {
+                    'text': '{{employee-name}}',
+                    'matchCase':  'true'
+                },
+                'replaceText': reviewee,
             },
-        }
+        })
+
+        super().batch_update(document_id=document_id, requests=requests)
+
+    def __get_eval_report_range(self, document):
+        '''
+        return (insert_index, end_index), end_index is None when there's
+        nothing after the first horizontal rule
+        '''
+        content = document.get('body').get('content')
+        start_index = self.__get_indext_after_firt_horizontal_rule(content)
+        end_index = self.__get_last_end_index(content)
+
+        # Empty file
+        if end_index in range(0, 2) or \
+            start_index >= end_index:
+            return start_index, None
+
+        return start_index, end_index
+
+    def __get_template_eval_report_range(self, template_id):
+        if self.__template_eval_report_ranges is None:
+            self.__template_eval_report_ranges = {}
+
+        if template_id not in self.__template_eval_report_ranges:
+            template = super().get_document(template_id)
+            self.__template_eval_report_ranges.update({
+                template_id: self.__get_eval_report_range(template)
+            })
+
+        return self.__template_eval_report_ranges[template_id]
 
     def __get_eval_report_style(self, kind, start_index, end_index):
-        if kind == 'question':
+        if kind == ReportDocument.QUESTION:
             return {
                 'updateTextStyle': {
                     'range': {
@@ -192,7 +1133,7 @@ class FilesAPI(DocsService):
                     'fields': '*'
                 }
             }
-        elif kind == 'reviewer':
+        elif kind == ReportDocument.REVIEWER:
             return {
                 'updateTextStyle': {
                     'range': {
@@ -209,7 +1150,7 @@ class FilesAPI(DocsService):
                     'fields': '*'
                 }
             }
-        elif kind == 'eval_title':
+        elif kind == ReportDocument.EVAL_TITLE:
             return {
                 'updateTextStyle': {
                     'range': {
@@ -226,113 +1167,11 @@ class FilesAPI(DocsService):
                     'fields': '*'
                 }
             }
-        elif kind == 'answer':
+        elif kind == ReportDocument.ANSWER:
             return None
         else:
             raise NotImplementedError("eval report style not implemented")
 
-    def ___build_styled_eval_report_element(self, element, content):
-        style_tokens = self.__get_eval_report_style_tokens()
-        element_style = style_tokens.get(element, {'start':'', 'end':''})
-        return '%{}%{}%{}%'.format(element_style['start'], content, element_style['end'])
-
-    def __build_eval_report_with_tokens(self, eval_process_id, reviewee_evaluations):
-        styled_title = self.___build_styled_eval_report_element('eval_title', eval_process_id)
-        styled_eval_report = ''
-
-        for reviewer_response in reviewee_evaluations:
-            eval_kind = self.__get_human_readable_eval_kind(reviewer_response.eval_kind)
-            styled_reviewer = self.___build_styled_eval_report_element(
-                'reviewer',
-                'Reviewer: %s, kind: %s' % (reviewer_response.reviewer, eval_kind))
-
-            styled_responses = ''
-            for question, answer in reviewer_response.eval_response:
-                styled_question = self.___build_styled_eval_report_element('question', question)
-                styled_answer = self.___build_styled_eval_report_element('answer', answer)
-                styled_responses = '{}\n{}\n{}\n'.format(styled_responses, styled_question, styled_answer)
-
-            styled_eval_report = '{}\n\n{}\n{}'.format(styled_eval_report, styled_reviewer, styled_responses)
-
-        return '{}\n{}'.format(styled_title, styled_eval_report)
-
-    def __get_human_readable_eval_kind(self, eval_kind):
-        if eval_kind == EvalKind.SELF:
-            return 'Self evaluation'
-        elif eval_kind == EvalKind.PEER_MANAGER:
-            return 'Report by direct report'
-        elif eval_kind == EvalKind.MANAGER_PEER:
-            return 'Report by direct manager'
-        elif eval_kind == EvalKind.PEER_TO_PEER:
-            return 'Report by peer'
-        else:
-            return ''
-
-    def __insert_eval_report_with_tokens(self, document_id, eval_report_with_tokens, reviewee):
-        document = super().get_document(document_id)
-        content = document.get('body').get('content')
-        insert_index = self.__get_indext_after_firt_horizontal_rule(content)
-
-        requests = [
-            {
-                'insertText': {
-                    "text": '\n{{EVAL}}\n',
-                    "location": {
-                        # object (Location)
-                        "index": insert_index,
-                    }
-                }
-            },
-            {
-                'replaceAllText': {
-                    'containsText': {
-                        'text': '{{EVAL}}',
-                        'matchCase':  'true'
-                    },
-                    'replaceText': eval_report_with_tokens,
-                }
-            },
-            {
-                'replaceAllText': {
-                    'containsText': {
-                        'text': '{{employee-name}}',
-                        'matchCase':  'true'
-                    },
-                    'replaceText': reviewee,
-                },
-            }
-        ]
-        super().batch_update(document_id=document_id, requests=requests)
-
-    def __apply_eval_report_style(self, document_id):
-        document = super().get_document(document_id)
-        content = document.get('body').get('content')
-
-        style_requests = []
-        for item in content:
-            if DocsService.PARAGRAPH in item:
-                for element in item.get(DocsService.PARAGRAPH).get(DocsService.ELEMENTS):
-                    if DocsService.TEXT_RUN in element and DocsService.CONTENT in element.get(DocsService.TEXT_RUN):
-                        content = element.get(DocsService.TEXT_RUN).get(DocsService.CONTENT)
-                        possible_tokens = content.split('%')
-
-                        for token_uid, tokens in self.__get_eval_report_style_tokens().items():
-                            if tokens['start'] in possible_tokens and tokens['end']:
-                                start_index = element.get(DocsService.START_INDEX)
-                                end_index = element.get(DocsService.END_INDEX)
-                                style_request = self.__get_eval_report_style(token_uid, start_index, end_index)
-                                if style_request is not None:
-                                    style_requests.append(style_request)
-
-        super().batch_update(document_id=document_id, requests=style_requests)
-
-    def __delete_tokens_from_document(self, document_id):
-        tokens = self.__get_eval_report_style_tokens()
-        delete_token_requests = super().get_delete_tokens_requests(tokens)
-        super().batch_update(
-            document_id=document_id,
-            requests=delete_token_requests)
-
     def __get_indext_after_firt_horizontal_rule(self, content):
         horizontal_rule_was_seen = False
         for item in content:
@@ -361,6 +1200,7 @@ class FilesAPI(DocsService):
 
         return end_index
 
+@trace_public_methods
 class GmailAPI(GmailService):
 
     AUTHENTICATED_USER = 'me'
@@ -382,5 +1222,12 @@ class GmailAPI(GmailService):
         )
         return message
 
-class GoogleAPI(FilesAPI, GoogleDrive, SheetsService, GmailAPI):
+class GoogleAPI(
+        FilesAPI,
+        DrivePathIndexService,
+        SnapshotCachedSheetsService,
+        DriveMetadataService,
+        DrivePermissionsService,
+        SheetsBatchService,
+        GmailAPI):
     'Composition of google APIs'
@@ -1,3 +1,11 @@
+import bisect
+import contextvars
+import itertools
+from urllib.parse import urlencode
+
+import tornado.escape
+import tornado.ioloop
+import tornado.log
 import tornado.web
 
 from googledrive.exceptions import GoogleApiClientHttpErrorException
@@ -9,20 +17,486 @@ from evalytics.usecases import GetReviewersUseCase
 from evalytics.usecases import GetResponseStatusUseCase
 from evalytics.usecases import GetEvalReportsUseCase
 from evalytics.usecases import GenerateEvalReportsUseCase
+from evalytics.usecases import RenderEvalReportsUseCase
 from evalytics.usecases import GetPeersAssignmentUseCase
 from evalytics.usecases import UpdatePeersAssignmentUseCase
 from evalytics.usecases import SendCommunicationUseCase
+from evalytics.jobs import EvalReportsJob, CommunicationsJob
 from evalytics.mappers import Mapper
+from evalytics.metrics import Metrics, CallbackCounter, CallbackGauge
+from evalytics.tracing import Tracing, Span
+from evalytics.cache import SnapshotCacheFactory
+from evalytics.config import ConfigReader
+from evalytics.google_api import DrivePathIndexService, SharedGoogleService
 from evalytics.models import CommunicationKind
 from evalytics.exceptions import MissingDataException, NoFormsException
 
+class JsonGZipContentEncoding(tornado.web.GZipContentEncoding):
+    '''
+    Gzips the responses of clients accepting it, streamed NDJSON included
+    '''
+
+    CONTENT_TYPES = tornado.web.GZipContentEncoding.CONTENT_TYPES | {
+        'application/x-ndjson',
+    }
+
+class UseCaseHandler(tornado.web.RequestHandler, Tracing):
+    '''
+    Runs the blocking use cases outside of the IOLoop, in the executor
+    given to the application as the 'executor' setting or in the IOLoop
+    default executor, so a slow Google API call doesn't stop the server
+    from serving other requests.
+
+    With tracing on, every request is the root span of a trace whose id is
+    returned in the X-Trace-Id header.
+    '''
+
+    TRACE_ID_HEADER = 'X-Trace-Id'
+
+    request_span = None
+
+    def prepare(self):
+        route = getattr(type(self), 'path', self.request.path)
+        self.request_span = self.start_span(
+            '%s %s' % (self.request.method, route),
+            Span.KIND_SERVER,
+            {
+                'http.method': self.request.method,
+                'http.route': route,
+                'http.target': self.request.uri,
+            })
+        if self.request_span is not None:
+            self.set_header(self.TRACE_ID_HEADER, self.request_span.trace_id)
+
+    def on_finish(self):
+        Metrics.handler_latency.observe(
+            self.request.request_time(),
+            type(self).__name__,
+            self.request.method,
+            str(self.get_status()))
+
+        if self.request_span is not None:
+            self.request_span.set_attribute('http.status_code', self.get_status())
+            self.end_span(self.request_span)
+
+    async def run_use_case(self, function, *args):
+        executor = self.application.settings.get('executor')
+        # The executor threads don't inherit the request context, nor its span
+        context = contextvars.copy_context()
+        return await tornado.ioloop.IOLoop.current().run_in_executor(
+            executor, context.run, function, *args)
+
+    async def submit_job(self, kind, params):
+        '''
+        Queues a background job in the 'job_queue' application setting and
+        finishes the request with the queued job, to be followed in /jobs
+        '''
+        job_queue = self.application.settings.get('job_queue')
+        if job_queue is None:
+            self.finish({
+                'success': False,
+                'response': {
+                    'error': 'Background jobs are not enabled',
+                }
+            })
+            return
+
+        job_id = await self.run_use_case(job_queue.submit, kind, params)
+        job = await self.run_use_case(job_queue.get_job, job_id)
+        self.finish({
+            'success': True,
+            'response': {
+                'job': job
+            }
+        })
+
+class CachedResponseHandler(UseCaseHandler):
+    '''
+    Serves GET requests from the 'response_cache' application setting while
+    their response is fresh. force_refresh=true always computes the response
+    again and refreshes the cached one.
+
+    Responses carry a strong ETag of their body, so a client sending it
+    back in If-None-Match gets a 304 while the data doesn't change.
+    '''
+
+    FORCE_REFRESH = 'force_refresh'
+
+    def prepare(self):
+        super().prepare()
+
+        response_cache = self.application.settings.get('response_cache')
+        if response_cache is None or not self.is_cacheable():
+            return
+
+        force_refresh = Mapper().str_to_bool(
+            self.get_argument(self.FORCE_REFRESH, 'false', strip=False))
+        if force_refresh:
+            return
+
+        cached_response = response_cache.get(self.get_cache_key())
+        if cached_response is not None:
+            body, etag = cached_response
+            self.__finish_with_etag(body, etag)
+
+    def finish(self, chunk=None):
+        response_cache = self.application.settings.get('response_cache')
+        if response_cache is not None and \
+                self.is_cacheable() and \
+                isinstance(chunk, dict) and chunk.get('success'):
+            body = tornado.escape.utf8(tornado.escape.json_encode(chunk))
+            etag = response_cache.put(self.get_cache_key(), body)
+            return self.__finish_with_etag(body, etag)
+
+        return super().finish(chunk)
+
+    def is_cacheable(self):
+        return self.request.method == 'GET'
+
+    def get_cache_key(self):
+        arguments = []
+        for name in sorted(self.request.query_arguments):
+            if name == self.FORCE_REFRESH:
+                continue
+            for value in self.request.query_arguments[name]:
+                arguments.append((name, value))
+
+        return '%s?%s' % (self.request.path, urlencode(arguments))
+
+    def __finish_with_etag(self, body, etag):
+        # Tornado only answers 304 by itself for the ETags it computes
+        self.set_header('Content-Type', 'application/json; charset=UTF-8')
+        self.set_header('Etag', etag)
+        if self.check_etag_header():
+            self.set_status(304)
+            body = None
+
+        return super().finish(body)
+
+class StreamedResponseHandler(CachedResponseHandler):
+    '''
+    With stream=json the response is written as it's serialized, flushing
+    every FLUSH_EVERY records, instead of serializing it whole in memory.
+    With stream=ndjson every record is written as a JSON line.
+
+    Streamed responses are never cached.
+    '''
+
+    STREAM = 'stream'
+    STREAM_JSON = 'json'
+    STREAM_NDJSON = 'ndjson'
+
+    FLUSH_EVERY = 100
+
+    def get_stream_format(self):
+        stream_format = self.get_argument(self.STREAM, None, strip=False)
+        if stream_format not in (self.STREAM_JSON, self.STREAM_NDJSON):
+            return None
+        return stream_format
+
+    def is_cacheable(self):
+        return super().is_cacheable() and self.get_stream_format() is None
+
+    async def stream_json(self, prefix: str, records, suffix: str):
+        '''
+        Writes prefix, every record of records as an item of a JSON list
+        and suffix, then finishes the request
+        '''
+        await self.__stream(
+            'application/json; charset=UTF-8',
+            prefix, records, ', ', '', suffix)
+
+    async def stream_ndjson(self, records):
+        '''
+        Writes every record of records as a JSON line, then finishes the
+        request
+        '''
+        await self.__stream(
+            'application/x-ndjson; charset=UTF-8',
+            '', records, '', '\n', '')
+
+    async def __stream(
+            self, content_type, prefix, records, separator, terminator, suffix):
+        # records may be built lazily by a use case, so they're pulled
+        # FLUSH_EVERY at a time out of the IOLoop. Nothing is written until
+        # the first ones are built, so errors before that are raised to be
+        # answered as usual. Once a chunk is flushed the status is sent, so
+        # errors only can abort the stream to tell the client it's broken.
+        written = 0
+        while True:
+            try:
+                chunk = await self.run_use_case(self.__next_records, records)
+            except Exception:
+                if written == 0:
+                    raise
+                tornado.log.app_log.exception(
+                    'Aborting stream of %s after %d records',
+                    self.request.uri, written)
+                self.request.connection.close()
+                return
+
+            if written == 0:
+                self.set_header('Content-Type', content_type)
+                self.write(prefix)
+
+            for record in chunk:
+                if written > 0:
+                    self.write(separator)
+                self.write(tornado.escape.json_encode(record))
+                self.write(terminator)
+                written += 1
+
+            if len(chunk) < self.FLUSH_EVERY:
+                break
+            await self.flush()
+
+        self.write(suffix)
+        self.finish()
+
+    def __next_records(self, records):
+        return list(itertools.islice(records, self.FLUSH_EVERY))
+
+class PagedResponseHandler(CachedResponseHandler):
+    '''
+    limit and cursor page the records of the response, sorted by uid, and
+    fields projects every record to the given comma separated dotted paths.
+
+    Records are computed once and kept in the 'records_index' application
+    setting, so the following pages are cut from the same results.
+    '''
 
-class EmployeesHandler(tornado.web.RequestHandler):
+    LIMIT = 'limit'
+    CURSOR = 'cursor'
+    FIELDS = 'fields'
+
+    def is_paged(self):
+        for argument in (self.LIMIT, self.CURSOR, self.FIELDS):
+            if self.get_argument(argument, None, strip=False) is not None:
+                return True
+        return False
+
+    async def get_page(self, compute_records, force_refresh: bool):
+        '''
+        return (uids, records, next_cursor) of the requested page.
+        compute_records is a blocking function returning every record in a
+        dict by uid. next_cursor is None in the last page.
+        '''
+        limit = self.__get_limit()
+        cursor = self.get_argument(self.CURSOR, None, strip=False)
+
+        uids, records = await self.__get_indexed_records(compute_records, force_refresh)
+
+        start = 0
+        if cursor is not None:
+            start = bisect.bisect_right(uids, Mapper().cursor_to_uid(cursor))
+        end = len(uids)
+        if limit is not None:
+            end = min(end, start + limit)
+
+        next_cursor = None
+        if end < len(uids):
+            next_cursor = Mapper().uid_to_cursor(uids[end - 1])
+
+        return uids[start:end], records[start:end], next_cursor
+
+    def project(self, records, computed_fields=None):
+        '''
+        return records projected to the requested fields, computed_fields
+        are extra fields computed from every record
+        '''
+        fields_arg = self.get_argument(self.FIELDS, None, strip=False)
+        if fields_arg is None:
+            return records
+
+        fields = [field.strip() for field in fields_arg.split(',') if field.strip() != '']
+        projected = []
+        for record in records:
+            projected.append(Mapper().project_json(record, fields, computed_fields))
+        return projected
+
+    def __get_limit(self):
+        limit_arg = self.get_argument(self.LIMIT, None, strip=False)
+        if limit_arg is None:
+            return None
+
+        try:
+            limit = int(limit_arg)
+        except ValueError as e:
+            raise ValueError('Invalid limit: {}'.format(limit_arg)) from e
+        if limit < 1:
+            raise ValueError('Invalid limit: {}'.format(limit_arg))
+        return limit
+
+    async def __get_indexed_records(self, compute_records, force_refresh: bool):
+        records_index = self.application.settings.get('records_index')
+        if records_index is not None and not force_refresh:
+            indexed_records = records_index.get(self.request.path)
+            if indexed_records is not None:
+                return indexed_records
+
+        records = await self.run_use_case(compute_records)
+        if records_index is not None:
+            return records_index.put(self.request.path, records)
+
+        uids = sorted(records)
+        return uids, [records[uid] for uid in uids]
+
+class JobsHandler(UseCaseHandler):
+    path = r"/jobs/([0-9a-f]+)"
+
+    async def get(self, job_id):
+        job_queue = self.application.settings.get('job_queue')
+        job = None
+        if job_queue is not None:
+            job = await self.run_use_case(job_queue.get_job, job_id)
+
+        if job is None:
+            self.finish({
+                'success': False,
+                'response': {
+                    'error': 'Job not found: {}'.format(job_id),
+                }
+            })
+        else:
+            self.finish({
+                'success': True,
+                'response': {
+                    'job': job
+                }
+            })
+
+class MetricsHandler(UseCaseHandler):
+    '''
+    Metrics of this server process in the Prometheus text exposition
+    format. Cache, config and job queue stats are read at scrape time.
+    '''
+    path = r"/metrics"
+
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+    async def get(self):
+        body = await self.run_use_case(self.expose_metrics)
+        self.set_header('Content-Type', self.CONTENT_TYPE)
+        self.finish(body)
+
+    def expose_metrics(self):
+        cache_stats = self.get_cache_stats()
+        return Metrics.registry.expose([
+            CallbackCounter(
+                'evalytics_cache_lookups_total',
+                'Cache lookups by cache and result',
+                ('cache', 'result'),
+                lambda: self.__get_cache_lookups(cache_stats)),
+            CallbackGauge(
+                'evalytics_cache_hit_ratio',
+                'Ratio of the cache lookups that were hits',
+                ('cache',),
+                lambda: self.__get_cache_hit_ratios(cache_stats)),
+            CallbackCounter(
+                'evalytics_google_service_clients_total',
+                'Google API clients built and reused',
+                ('result',),
+                self.__get_google_service_clients),
+            CallbackCounter(
+                'evalytics_config_reads_total',
+                'config.yaml reads answered by parsing, the parsed copy or a reload',
+                ('result',),
+                self.__get_config_reads),
+            CallbackGauge(
+                'evalytics_jobs',
+                'Background jobs waiting or running',
+                ('status',),
+                self.__get_jobs_depth),
+        ])
+
+    def get_cache_stats(self):
+        '''
+        return {cache name: stats with hits and misses} of the caches of
+        this process
+        '''
+        cache_stats = {
+            'drive_path_index': DrivePathIndexService.drive_path_index.get_stats(),
+        }
+
+        snapshot_cache = self.get_snapshot_cache()
+        if snapshot_cache is not None:
+            cache_stats.update({'snapshot': snapshot_cache.get_stats()})
+
+        for name in ['response_cache', 'records_index']:
+            cache = self.application.settings.get(name)
+            if cache is not None:
+                cache_stats.update({name: cache.get_stats()})
+
+        return cache_stats
+
+    def get_snapshot_cache(self):
+        return SnapshotCacheFactory().get_snapshot_cache()
+
+    def __get_cache_lookups(self, cache_stats):
+        lookups = {}
+        for name, stats in cache_stats.items():
+            lookups.update({
+                (name, 'hit'): stats['hits'],
+                (name, 'miss'): stats['misses'],
+            })
+        return lookups
+
+    def __get_cache_hit_ratios(self, cache_stats):
+        ratios = {}
+        for name, stats in cache_stats.items():
+            lookups = stats['hits'] + stats['misses']
+            if lookups > 0:
+                ratios.update({(name,): stats['hits'] / lookups})
+        return ratios
+
+    def __get_google_service_clients(self):
+        stats = SharedGoogleService.service_registry.get_stats()
+        return {
+            ('build',): stats['builds'],
+            ('reuse',): stats['reuses'],
+        }
+
+    def __get_config_reads(self):
+        stats = ConfigReader().get_read_stats()
+        return {
+            ('parse',): stats['parses'],
+            ('hit',): stats['hits'],
+            ('reload',): stats['reloads'],
+        }
+
+    def __get_jobs_depth(self):
+        job_queue = self.application.settings.get('job_queue')
+        if job_queue is None:
+            return {}
+
+        return {
+            (status,): count
+            for status, count in job_queue.get_depth().items()
+        }
+
+class EmployeesHandler(PagedResponseHandler):
     path = r"/employees"
 
     async def get(self):
         try:
-            employees = GetEmployeesUseCase().get_employees()
+            force_refresh = Mapper().str_to_bool(
+                self.get_argument('force_refresh', 'false', strip=False))
+
+            if self.is_paged():
+                _, employees, next_cursor = await self.get_page(
+                    lambda: self.__get_employees_records(force_refresh),
+                    force_refresh)
+                self.finish({
+                    'success': True,
+                    'response': {
+                        'employees': self.project(employees),
+                        'next_cursor': next_cursor
+                    }
+                })
+                return
+
+            employees = await self.run_use_case(
+                GetEmployeesUseCase().get_employees, force_refresh)
 
             self.finish({
                 'success': True,
@@ -45,14 +519,34 @@ class EmployeesHandler(tornado.web.RequestHandler):
                     'error': exception.message,
                 }
             })
+        except ValueError as e:
+            self.finish({
+                'success': False,
+                'response': {
+                    'error': str(e),
+                }
+            })
+
+    def __get_employees_records(self, force_refresh):
+        employees = GetEmployeesUseCase().get_employees(force_refresh)
+
+        records = {}
+        for uid, employee in employees.items():
+            records.update({
+                uid: Mapper().employee_to_json(employee)
+            })
+        return records
 
 
-class SurveysHandler(tornado.web.RequestHandler):
+class SurveysHandler(CachedResponseHandler):
     path = r"/surveys"
 
     async def get(self):
         try:
-            surveys = GetSurveysUseCase().get_surveys()
+            force_refresh = Mapper().str_to_bool(
+                self.get_argument('force_refresh', 'false', strip=False))
+            surveys = await self.run_use_case(
+                GetSurveysUseCase().get_surveys, force_refresh)
 
             self.finish({
                 'success': True,
@@ -76,13 +570,16 @@ class SurveysHandler(tornado.web.RequestHandler):
                 }
             })
 
-class PeersAssignmentHandler(tornado.web.RequestHandler):
+class PeersAssignmentHandler(CachedResponseHandler):
     path = r"/peers"
 
     async def get(self):
         try:
+            force_refresh = Mapper().str_to_bool(
+                self.get_argument('force_refresh', 'false', strip=False))
 
-            peers_assignment = GetPeersAssignmentUseCase().get_peers()
+            peers_assignment = await self.run_use_case(
+                GetPeersAssignmentUseCase().get_peers, force_refresh)
 
             self.finish({
                 'success': True,
@@ -119,7 +616,16 @@ class PeersAssignmentHandler(tornado.web.RequestHandler):
     async def post(self):
         try:
 
-            peers_assignment = UpdatePeersAssignmentUseCase().update()
+            peers_assignment = await self.run_use_case(
+                UpdatePeersAssignmentUseCase().update)
+
+            # Reviewers and status depend on the peers assignment too
+            response_cache = self.application.settings.get('response_cache')
+            if response_cache is not None:
+                response_cache.invalidate()
+            records_index = self.application.settings.get('records_index')
+            if records_index is not None:
+                records_index.invalidate()
 
             self.finish({
                 'success': True,
@@ -154,12 +660,48 @@ class PeersAssignmentHandler(tornado.web.RequestHandler):
                 'response': Mapper().google_api_client_http_error_to_json(error)
             })
 
-class ReviewersHandler(tornado.web.RequestHandler):
+class ReviewersHandler(PagedResponseHandler, StreamedResponseHandler):
     path = r"/reviewers"
 
+    # fields=employee.uid,evals_count is all reviewers stats need
+    COMPUTED_FIELDS = {
+        'evals_count': lambda reviewer: len(reviewer['evals']),
+    }
+
     async def get(self):
         try:
-            reviewers = GetReviewersUseCase().get_reviewers()
+            force_refresh = Mapper().str_to_bool(
+                self.get_argument('force_refresh', 'false', strip=False))
+
+            if self.is_paged():
+                _, reviewers, next_cursor = await self.get_page(
+                    lambda: self.__get_reviewers_records(force_refresh),
+                    force_refresh)
+                self.finish({
+                    'success': True,
+                    'response': {
+                        'reviewers': self.project(reviewers, self.COMPUTED_FIELDS),
+                        'next_cursor': next_cursor
+                    }
+                })
+                return
+
+            stream_format = self.get_stream_format()
+            if stream_format is not None:
+                reviewers = await self.run_use_case(
+                    GetReviewersUseCase().stream_reviewers, force_refresh)
+                records = (Mapper().reviewer_to_json(r) for r in reviewers)
+                if stream_format == self.STREAM_NDJSON:
+                    await self.stream_ndjson(records)
+                else:
+                    await self.stream_json(
+                        '{"success": true, "response": {"reviewers": [',
+                        records,
+                        ']}}')
+                return
+
+            reviewers = await self.run_use_case(
+                GetReviewersUseCase().get_reviewers, force_refresh)
             reviewers = [
                 Mapper().reviewer_to_json(r)
                 for uid, r in reviewers.items()]
@@ -185,8 +727,25 @@ class ReviewersHandler(tornado.web.RequestHandler):
                     'error': exception.message,
                 }
             })
+        except ValueError as e:
+            self.finish({
+                'success': False,
+                'response': {
+                    'error': str(e),
+                }
+            })
+
+    def __get_reviewers_records(self, force_refresh):
+        reviewers = GetReviewersUseCase().get_reviewers(force_refresh)
 
-class CommunicationHandler(tornado.web.RequestHandler):
+        records = {}
+        for uid, reviewer in reviewers.items():
+            records.update({
+                uid: Mapper().reviewer_to_json(reviewer)
+            })
+        return records
+
+class CommunicationHandler(UseCaseHandler):
     path = r"/communications"
 
     async def post(self):
@@ -197,7 +756,17 @@ class CommunicationHandler(tornado.web.RequestHandler):
             reviewers = Mapper().json_to_reviewers(reviewers_arg)
             kind = CommunicationKind.from_str(kind_arg)
 
-            comms_sent, comms_not_sent = SendCommunicationUseCase().send(reviewers, kind=kind)
+            background = Mapper().str_to_bool(
+                self.get_argument('background', 'false', strip=False))
+            if background:
+                await self.submit_job(CommunicationsJob.KIND, {
+                    'reviewers': reviewers_arg,
+                    'kind': kind_arg,
+                })
+                return
+
+            comms_sent, comms_not_sent = await self.run_use_case(
+                SendCommunicationUseCase().send, reviewers, kind)
             self.finish({
                 'success': True,
                 'response': {
@@ -217,12 +786,70 @@ class CommunicationHandler(tornado.web.RequestHandler):
                 }
             })
 
-class ResponseStatusHandler(tornado.web.RequestHandler):
+class ResponseStatusHandler(PagedResponseHandler, StreamedResponseHandler):
     path = r"/status"
 
+    COMPUTED_FIELDS = ReviewersHandler.COMPUTED_FIELDS
+
     async def get(self):
         try:
-            completed, pending, inconsistent = GetResponseStatusUseCase().get_response_status()
+            force_refresh = Mapper().str_to_bool(
+                self.get_argument('force_refresh', 'false', strip=False))
+
+            if self.is_paged():
+                uids, records, next_cursor = await self.get_page(
+                    lambda: self.__get_status_records(force_refresh),
+                    force_refresh)
+                completed = {}
+                pending = []
+                inconsistent = {}
+                for uid, record in zip(uids, records):
+                    if 'completed' in record:
+                        completed.update({uid: record['completed']})
+                    if 'pending' in record:
+                        pending.append(record['pending'])
+                    if 'inconsistent' in record:
+                        inconsistent.update({uid: record['inconsistent']})
+
+                self.finish({
+                    'success': True,
+                    'response': {
+                        'status': {
+                            'completed': completed,
+                            'pending': self.project(pending, self.COMPUTED_FIELDS),
+                            'inconsistent': inconsistent
+                        },
+                        'next_cursor': next_cursor
+                    }
+                })
+                return
+
+            stream_format = self.get_stream_format()
+            if stream_format is not None:
+                completed, pending, inconsistent = await self.run_use_case(
+                    GetResponseStatusUseCase().stream_response_status,
+                    force_refresh)
+                pending = (Mapper().reviewer_to_json(r) for r in pending)
+
+            if stream_format == self.STREAM_NDJSON:
+                # Completed and inconsistent first, then a line per pending reviewer
+                records = itertools.chain(
+                    [{'completed': completed}, {'inconsistent': inconsistent}],
+                    ({'pending': r} for r in pending))
+                await self.stream_ndjson(records)
+                return
+            elif stream_format == self.STREAM_JSON:
+                await self.stream_json(
+                    '{"success": true, "response": {"status": {'
+                    '"completed": %s, "inconsistent": %s, "pending": [' % (
+                        tornado.escape.json_encode(completed),
+                        tornado.escape.json_encode(inconsistent)),
+                    pending,
+                    ']}}}')
+                return
+
+            completed, pending, inconsistent = await self.run_use_case(
+                GetResponseStatusUseCase().get_response_status, force_refresh)
 
             self.finish({
                 'success': True,
@@ -249,8 +876,32 @@ class ResponseStatusHandler(tornado.web.RequestHandler):
                     'error': e.message,
                 }
             })
+        except ValueError as e:
+            self.finish({
+                'success': False,
+                'response': {
+                    'error': str(e),
+                }
+            })
+
+    def __get_status_records(self, force_refresh):
+        '''
+        return the completed, pending and inconsistent status of every
+        employee in a record by uid
+        '''
+        completed, pending, inconsistent = GetResponseStatusUseCase().get_response_status(
+            force_refresh)
+
+        records = {}
+        for uid, completed_evals in completed.items():
+            records.setdefault(uid, {}).update({'completed': completed_evals})
+        for uid, reviewer in pending.items():
+            records.setdefault(uid, {}).update({'pending': Mapper().reviewer_to_json(reviewer)})
+        for uid, inconsistent_evals in inconsistent.items():
+            records.setdefault(uid, {}).update({'inconsistent': inconsistent_evals})
+        return records
 
-class EvalReportsHandler(tornado.web.RequestHandler):
+class EvalReportsHandler(UseCaseHandler):
     path = r"/evalreports"
 
     async def get(self):
@@ -262,10 +913,15 @@ class EvalReportsHandler(tornado.web.RequestHandler):
             managers = Mapper().json_to_list(managers_arg)
             employee_uids = Mapper().json_to_list(employee_uids_arg)
 
-            reviewees_evaluations = GetEvalReportsUseCase().get(
+            force_refresh = Mapper().str_to_bool(
+                self.get_argument('force_refresh', 'false', strip=False))
+
+            reviewees_evaluations = await self.run_use_case(
+                GetEvalReportsUseCase().get,
                 area,
                 managers,
-                employee_uids
+                employee_uids,
+                force_refresh
             )
 
             reviewees_evaluations_json = {}
@@ -314,10 +970,30 @@ class EvalReportsHandler(tornado.web.RequestHandler):
             managers = Mapper().json_to_list(managers_arg)
             employee_uids = Mapper().json_to_list(employee_uids_arg)
 
-            created, not_created = GenerateEvalReportsUseCase().generate(
+            force_refresh = Mapper().str_to_bool(
+                self.get_argument('force_refresh', 'false', strip=False))
+            force = Mapper().str_to_bool(
+                self.get_argument('force', 'false', strip=False))
+
+            background = Mapper().str_to_bool(
+                self.get_argument('background', 'false', strip=False))
+            if background:
+                await self.submit_job(EvalReportsJob.KIND, {
+                    'area': area,
+                    'managers': managers,
+                    'uids': employee_uids,
+                    'force_refresh': force_refresh,
+                    'force': force,
+                })
+                return
+
+            created, not_created, permissions = await self.run_use_case(
+                GenerateEvalReportsUseCase().generate,
                 area,
                 managers,
-                employee_uids
+                employee_uids,
+                force_refresh,
+                force
             )
 
             self.finish({
@@ -326,9 +1002,74 @@ class EvalReportsHandler(tornado.web.RequestHandler):
                     'evals_reports': {
                         'created': created,
                         'not_created': not_created,
+                        'permissions': permissions,
+                    }
+                }
+            })
+        except (MissingGoogleDriveFolderException,
+                MissingGoogleDriveFileException) as e:
+            self.finish({
+                'success': False,
+                'response': {
+                    'error': e.message,
+                }
+            })
+        except MissingDataException as e:
+            if hasattr(e, 'message'):
+                message = e.message
+            else:
+                message = str(e)
+            self.finish({
+                'success': False,
+                'response': {
+                    'error': message,
+                }
+            })
+
+class EvalReportsRenderHandler(UseCaseHandler):
+    path = r"/evalreports/render"
+
+    DEFAULT_FORMATS = '["markdown", "html", "pdf"]'
+
+    async def post(self):
+        try:
+            area = self.get_argument('area', None, strip=False)
+            managers_arg = self.get_argument('managers', None, strip=False)
+            employee_uids_arg = self.get_argument('uids', None, strip=False)
+            formats_arg = self.get_argument('formats', self.DEFAULT_FORMATS, strip=False)
+
+            managers = Mapper().json_to_list(managers_arg)
+            employee_uids = Mapper().json_to_list(employee_uids_arg)
+            report_formats = Mapper().json_to_list(formats_arg)
+
+            force_refresh = Mapper().str_to_bool(
+                self.get_argument('force_refresh', 'false', strip=False))
+
+            rendered, not_rendered = await self.run_use_case(
+                RenderEvalReportsUseCase().render,
+                area,
+                managers,
+                employee_uids,
+                report_formats,
+                force_refresh
+            )
+
+            self.finish({
+                'success': True,
+                'response': {
+                    'evals_reports': {
+                        'rendered': rendered,
+                        'not_rendered': not_rendered,
                     }
                 }
             })
+        except ValueError as e:
+            self.finish({
+                'success': False,
+                'response': {
+                    'error': 'Report format not supported: {}'.format(e),
+                }
+            })
         except (MissingGoogleDriveFolderException,
                 MissingGoogleDriveFileException) as e:
             self.finish({
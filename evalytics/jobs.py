@@ -0,0 +1,420 @@
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import closing
+
+from evalytics.mappers import Mapper
+from evalytics.models import CommunicationKind
+from evalytics.usecases import GenerateEvalReportsUseCase
+from evalytics.usecases import SendCommunicationUseCase
+
+class JobStore:
+    '''
+    Background jobs and the outcome of every one of their items, stored in
+    SQLite so unfinished jobs can be resumed after a server restart.
+
+    Every unfinished job is owned by the process running it, or that queued
+    it, so jobs of a process that's gone can be told apart and claimed by
+    another one.
+    '''
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FINISHED = 'finished'
+    FAILED = 'failed'
+
+    ITEM_PENDING = 'pending'
+    ITEM_DONE = 'done'
+    ITEM_FAILED = 'failed'
+
+    def __init__(self, path: str):
+        self.path = path
+
+        directory = os.path.dirname(path)
+        if directory != '':
+            os.makedirs(directory, exist_ok=True)
+
+        with closing(self.__connect()) as connection, connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS jobs ('
+                '    job_id TEXT NOT NULL PRIMARY KEY,'
+                '    kind TEXT NOT NULL,'
+                '    params TEXT NOT NULL,'
+                '    status TEXT NOT NULL,'
+                '    result TEXT,'
+                '    error TEXT,'
+                '    created_at REAL NOT NULL,'
+                '    started_at REAL,'
+                '    finished_at REAL,'
+                '    owner_pid INTEGER)')
+            # Jobs files created before jobs had an owner
+            columns = [
+                row[1] for row in connection.execute('PRAGMA table_info(jobs)')
+            ]
+            if 'owner_pid' not in columns:
+                connection.execute('ALTER TABLE jobs ADD COLUMN owner_pid INTEGER')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS job_items ('
+                '    job_id TEXT NOT NULL,'
+                '    item TEXT NOT NULL,'
+                '    status TEXT NOT NULL,'
+                '    result TEXT,'
+                '    PRIMARY KEY (job_id, item))')
+
+    def create(self, kind: str, params: dict):
+        job_id = uuid.uuid4().hex
+        with closing(self.__connect()) as connection, connection:
+            connection.execute(
+                'INSERT INTO jobs (job_id, kind, params, status, created_at, owner_pid) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, kind, json.dumps(params), self.QUEUED, time.time(), os.getpid()))
+
+        return job_id
+
+    def start(self, job_id: str):
+        with closing(self.__connect()) as connection, connection:
+            # A resumed job keeps the time it was first started at
+            connection.execute(
+                'UPDATE jobs SET status = ?, started_at = COALESCE(started_at, ?), '
+                'owner_pid = ? WHERE job_id = ?',
+                (self.RUNNING, time.time(), os.getpid(), job_id))
+
+    def finish(self, job_id: str, result: dict = None, error: str = None):
+        status = self.FAILED if error is not None else self.FINISHED
+        with closing(self.__connect()) as connection, connection:
+            connection.execute(
+                'UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? '
+                'WHERE job_id = ?',
+                (status, json.dumps(result), error, time.time(), job_id))
+
+    def add_items(self, job_id: str, items):
+        with closing(self.__connect()) as connection, connection:
+            connection.executemany(
+                'INSERT OR IGNORE INTO job_items (job_id, item, status) '
+                'VALUES (?, ?, ?)',
+                [(job_id, item, self.ITEM_PENDING) for item in items])
+
+    def complete_item(self, job_id: str, item: str, result, failed: bool = False):
+        status = self.ITEM_FAILED if failed else self.ITEM_DONE
+        with closing(self.__connect()) as connection, connection:
+            # Upsert keeps the rowid, so items keep the order they were added in
+            connection.execute(
+                'INSERT INTO job_items (job_id, item, status, result) '
+                'VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (job_id, item) DO UPDATE SET '
+                'status = excluded.status, result = excluded.result',
+                (job_id, item, status, json.dumps(result)))
+
+    def get(self, job_id: str):
+        '''
+        return the job as a dict with its items as [(item, status, result)]
+        in the order they were added, or None when it doesn't exist
+        '''
+        with closing(self.__connect()) as connection, connection:
+            row = connection.execute(
+                'SELECT job_id, kind, params, status, result, error, '
+                'created_at, started_at, finished_at FROM jobs WHERE job_id = ?',
+                (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            items = connection.execute(
+                'SELECT item, status, result FROM job_items '
+                'WHERE job_id = ? ORDER BY rowid',
+                (job_id,)
+            ).fetchall()
+
+        return {
+            'id': row[0],
+            'kind': row[1],
+            'params': json.loads(row[2]),
+            'status': row[3],
+            'result': json.loads(row[4]) if row[4] is not None else None,
+            'error': row[5],
+            'created_at': row[6],
+            'started_at': row[7],
+            'finished_at': row[8],
+            'items': [
+                (item, status, json.loads(result) if result is not None else None)
+                for item, status, result in items
+            ],
+        }
+
+    def get_unfinished(self):
+        '''
+        return the ids of the queued and running jobs, oldest first
+        '''
+        with closing(self.__connect()) as connection, connection:
+            rows = connection.execute(
+                'SELECT job_id FROM jobs WHERE status IN (?, ?) '
+                'ORDER BY created_at',
+                (self.QUEUED, self.RUNNING)
+            ).fetchall()
+
+        return [row[0] for row in rows]
+
+    def release_unfinished(self):
+        '''
+        Leaves the unfinished jobs without owner, to be called when the
+        server starts: no process of the last run is running them, even if
+        a new process got the pid of an old one
+        '''
+        with closing(self.__connect()) as connection, connection:
+            connection.execute(
+                'UPDATE jobs SET owner_pid = NULL WHERE status IN (?, ?)',
+                (self.QUEUED, self.RUNNING))
+
+    def claim_orphaned(self):
+        '''
+        Makes the calling process the owner of the unfinished jobs without
+        owner or whose owner process is gone, return their ids, oldest
+        first. A job is claimed by a single process.
+        '''
+        with closing(self.__connect()) as connection, connection:
+            rows = connection.execute(
+                'SELECT job_id, owner_pid FROM jobs WHERE status IN (?, ?) '
+                'ORDER BY created_at',
+                (self.QUEUED, self.RUNNING)
+            ).fetchall()
+
+        claimed = []
+        for job_id, owner_pid in rows:
+            if self.__is_process_alive(owner_pid):
+                continue
+
+            with closing(self.__connect()) as connection, connection:
+                # Other processes may be claiming it too, only one updates it
+                cursor = connection.execute(
+                    'UPDATE jobs SET owner_pid = ? '
+                    'WHERE job_id = ? AND owner_pid IS ?',
+                    (os.getpid(), job_id, owner_pid))
+            if cursor.rowcount == 1:
+                claimed.append(job_id)
+
+        return claimed
+
+    def count_by_status(self):
+        '''
+        return {status: number of jobs} of the statuses having jobs
+        '''
+        with closing(self.__connect()) as connection, connection:
+            rows = connection.execute(
+                'SELECT status, COUNT(*) FROM jobs GROUP BY status'
+            ).fetchall()
+
+        return dict(rows)
+
+    def __connect(self):
+        # One connection per operation, job items are completed from many threads
+        return sqlite3.connect(self.path, timeout=30)
+
+    def __is_process_alive(self, pid):
+        if pid is None:
+            return False
+
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            # It exists, but belongs to another user
+            return True
+        return True
+
+class JobProgress:
+    '''
+    Handed to a use case to record the items of a job as they're finished
+    '''
+
+    def __init__(self, store: JobStore, job_id: str):
+        self.__store = store
+        self.__job_id = job_id
+
+    def set_items(self, items):
+        self.__store.add_items(self.__job_id, items)
+
+    def add_result(self, item, result, failed: bool = False):
+        self.__store.complete_item(self.__job_id, item, result, failed)
+
+class EvalReportsJob:
+    'POST /evalreports run in the background'
+
+    KIND = 'evalreports'
+
+    def run(self, params, pending_items, progress):
+        area = params.get('area')
+        managers = params.get('managers')
+        employee_uids = params.get('uids')
+        if pending_items is not None:
+            area = None
+            managers = None
+            employee_uids = pending_items
+
+        _, _, permissions = GenerateEvalReportsUseCase().generate(
+            area,
+            managers,
+            employee_uids,
+            params.get('force_refresh', False),
+            params.get('force', False),
+            progress)
+
+        return {
+            'permissions': permissions
+        }
+
+    def get_result(self, done, failed, result):
+        return {
+            'created': done,
+            'not_created': failed,
+            'permissions': result.get('permissions') if result is not None else None,
+        }
+
+class CommunicationsJob:
+    'POST /communications run in the background'
+
+    KIND = 'communications'
+
+    def run(self, params, pending_items, progress):
+        reviewers = Mapper().json_to_reviewers(params['reviewers'])
+        if pending_items is not None:
+            reviewers = {
+                uid: reviewer
+                for uid, reviewer in reviewers.items()
+                if uid in pending_items
+            }
+
+        SendCommunicationUseCase().send(
+            reviewers,
+            CommunicationKind.from_str(params['kind']),
+            progress)
+
+        return None
+
+    def get_result(self, done, failed, result):
+        return {
+            'comms_sent': list(done.keys()),
+            'comms_not_sent': list(failed.keys()),
+        }
+
+class JobQueue:
+    '''
+    Runs jobs in the background in executor, recording their progress in a
+    JobStore. An unfinished job whose process is gone is resumed with the
+    items it hadn't finished, or from the start when it never got to know
+    its items.
+    '''
+
+    RUNNERS = {
+        EvalReportsJob.KIND: EvalReportsJob(),
+        CommunicationsJob.KIND: CommunicationsJob(),
+    }
+
+    def __init__(self, store: JobStore, executor, runners=None):
+        self.__store = store
+        self.__executor = executor
+        self.__runners = runners if runners is not None else self.RUNNERS
+
+    def submit(self, kind: str, params: dict):
+        '''
+        return the id of the queued job
+        '''
+        if kind not in self.__runners:
+            raise ValueError(kind)
+
+        job_id = self.__store.create(kind, params)
+        self.__executor.submit(self.__run, job_id)
+
+        return job_id
+
+    def resume(self):
+        '''
+        Queues again the unfinished jobs whose process is gone, or that
+        were left without owner when the server started, return their ids
+        '''
+        orphaned = self.__store.claim_orphaned()
+
+        for job_id in orphaned:
+            self.__executor.submit(self.__run, job_id)
+
+        return orphaned
+
+    def get_depth(self):
+        '''
+        return the number of queued and running jobs
+        '''
+        counts = self.__store.count_by_status()
+        return {
+            JobStore.QUEUED: counts.get(JobStore.QUEUED, 0),
+            JobStore.RUNNING: counts.get(JobStore.RUNNING, 0),
+        }
+
+    def get_job(self, job_id: str):
+        '''
+        return the status, progress, timings and partial result of the job
+        or None when it doesn't exist
+        '''
+        job = self.__store.get(job_id)
+        if job is None:
+            return None
+
+        done = {}
+        failed = {}
+        for item, status, result in job['items']:
+            if status == JobStore.ITEM_DONE:
+                done.update({item: result})
+            elif status == JobStore.ITEM_FAILED:
+                failed.update({item: result})
+
+        started_at = job['started_at']
+        finished_at = job['finished_at']
+        elapsed_seconds = None
+        if started_at is not None:
+            end = finished_at if finished_at is not None else time.time()
+            elapsed_seconds = round(end - started_at, 3)
+
+        runner = self.__runners[job['kind']]
+        return {
+            'id': job['id'],
+            'kind': job['kind'],
+            'status': job['status'],
+            'error': job['error'],
+            'progress': {
+                'total': len(job['items']),
+                'done': len(done),
+                'failed': len(failed),
+                'pending': len(job['items']) - len(done) - len(failed),
+            },
+            'timings': {
+                'created_at': job['created_at'],
+                'started_at': started_at,
+                'finished_at': finished_at,
+                'elapsed_seconds': elapsed_seconds,
+            },
+            'result': runner.get_result(done, failed, job['result']),
+        }
+
+    def __run(self, job_id):
+        job = self.__store.get(job_id)
+        runner = self.__runners[job['kind']]
+
+        pending_items = None
+        if len(job['items']) > 0:
+            pending_items = [
+                item
+                for item, status, _ in job['items']
+                if status == JobStore.ITEM_PENDING
+            ]
+
+        self.__store.start(job_id)
+        try:
+            result = runner.run(
+                job['params'],
+                pending_items,
+                JobProgress(self.__store, job_id))
+            self.__store.finish(job_id, result=result)
+        except Exception as e:
+            self.__store.finish(job_id, error=repr(e))
@@ -1,5 +1,10 @@
+import base64
+import binascii
 import json
 
+from googleapiclient.errors import HttpError
+
+from googledrive.exceptions import GoogleApiClientHttpErrorException
 from googledrive.models import GoogleFile
 from googledrive.models import GoogleApiClientHttpError
 
@@ -31,6 +36,51 @@ class ListToJson:
             default=lambda o:
             o.__dict__ if type(o) is not EvalKind else str(o.name))
 
+class JsonProjection:
+
+    def project_json(self, record: dict, fields, computed_fields=None):
+        '''
+        return a copy of record with only the fields given as dotted paths,
+        e.g. 'employee.uid'. A field of computed_fields is set to the value
+        its function returns for record. Missing fields are left out.
+        '''
+        computed_fields = computed_fields or {}
+
+        projected = {}
+        for field in fields:
+            if field in computed_fields:
+                projected.update({
+                    field: computed_fields[field](record)
+                })
+                continue
+
+            keys = field.split('.')
+            value = record
+            for key in keys:
+                if not isinstance(value, dict) or key not in value:
+                    break
+                value = value[key]
+            else:
+                target = projected
+                for key in keys[:-1]:
+                    target = target.setdefault(key, {})
+                target.update({
+                    keys[-1]: value
+                })
+
+        return projected
+
+class PageCursor:
+
+    def uid_to_cursor(self, uid: str):
+        return base64.urlsafe_b64encode(uid.encode('utf-8')).decode('ascii')
+
+    def cursor_to_uid(self, cursor: str):
+        try:
+            return base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        except (binascii.Error, UnicodeError) as e:
+            raise ValueError('Invalid cursor: {}'.format(cursor)) from e
+
 class GoogleFileToJson(ListToJson):
 
     def google_file_to_json(self, google_file: GoogleFile):
@@ -89,6 +139,21 @@ class GoogleApiClientHttpErrorToJson:
             "details": error.details,
         }
 
+class HttpErrorToException:
+
+    def http_error_to_exception(self, http_error: HttpError):
+        try:
+            error = json.loads(http_error.content).get('error', {})
+        except (ValueError, AttributeError):
+            error = {}
+
+        return GoogleApiClientHttpErrorException(
+            GoogleApiClientHttpError(
+                error.get('code', http_error.resp.status),
+                error.get('message', str(http_error)),
+                error.get('status', ''),
+                error.get('details', [])))
+
 class JsonToReviewer:
 
     def json_to_reviewers(self, json_reviewers):
@@ -146,6 +211,7 @@ class ResponseFileNameToEvalKind(Config):
 
 class Mapper(
         GoogleApiClientHttpErrorToJson,
+        HttpErrorToException,
         ReviewerToJson,
         ReviewerResponseToJson,
         JsonToReviewer,
@@ -153,5 +219,7 @@ class Mapper(
         StrToBool,
         JsonToList,
         ListToJson,
+        JsonProjection,
+        PageCursor,
         ResponseFileNameToEvalKind):
     'Composition of Mappers'
@@ -0,0 +1,249 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+class Metric:
+    '''
+    Base of the metrics of a MetricsRegistry, rendered in the Prometheus
+    text exposition format
+    '''
+
+    TYPE = None
+
+    def __init__(self, name: str, documentation: str, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+
+        self._lock = threading.Lock()
+
+    def expose(self):
+        lines = [
+            '# HELP %s %s' % (self.name, self.documentation),
+            '# TYPE %s %s' % (self.name, self.TYPE),
+        ]
+        lines += self.get_samples()
+        return lines
+
+    def get_samples(self):
+        raise NotImplementedError("get_samples not implemented")
+
+    def format_labels(self, label_values, extra_labels=()):
+        labels = list(zip(self.label_names, label_values)) + list(extra_labels)
+        if len(labels) == 0:
+            return ''
+
+        return '{%s}' % ','.join(
+            '%s="%s"' % (name, self.__escape(value)) for name, value in labels)
+
+    def format_value(self, value):
+        if value == float('inf'):
+            return '+Inf'
+        return repr(float(value))
+
+    def __escape(self, value):
+        return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+class Counter(Metric):
+
+    TYPE = 'counter'
+
+    def __init__(self, name: str, documentation: str, label_names=()):
+        super().__init__(name, documentation, label_names)
+        self.__values = {}
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self.__values[label_values] = self.__values.get(label_values, 0) + amount
+
+    def get_value(self, *label_values):
+        with self._lock:
+            return self.__values.get(label_values, 0)
+
+    def get_samples(self):
+        with self._lock:
+            values = sorted(self.__values.items())
+
+        return [
+            '%s%s %s' % (self.name, self.format_labels(labels), self.format_value(value))
+            for labels, value in values
+        ]
+
+class Histogram(Metric):
+
+    TYPE = 'histogram'
+
+    DEFAULT_BUCKETS = (
+        0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+        1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+    def __init__(self, name: str, documentation: str, label_names=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        self.__series = {}
+
+    def observe(self, value, *label_values):
+        # Buckets are counted apart and made cumulative when exposed
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.__series.get(label_values)
+            if series is None:
+                series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self.__series[label_values] = series
+
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *label_values):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def get_count(self, *label_values):
+        with self._lock:
+            series = self.__series.get(label_values)
+            return series[2] if series is not None else 0
+
+    def get_samples(self):
+        with self._lock:
+            series = sorted(
+                (labels, (list(counts), total, count))
+                for labels, (counts, total, count) in self.__series.items())
+
+        samples = []
+        for labels, (counts, total, count) in series:
+            cumulative = 0
+            for bucket, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                samples.append('%s_bucket%s %s' % (
+                    self.name,
+                    self.format_labels(labels, [('le', self.format_value(bucket))]),
+                    self.format_value(cumulative)))
+            samples.append('%s_sum%s %s' % (
+                self.name, self.format_labels(labels), self.format_value(total)))
+            samples.append('%s_count%s %s' % (
+                self.name, self.format_labels(labels), self.format_value(count)))
+
+        return samples
+
+class CallbackGauge(Metric):
+    '''
+    Gauge whose values are read when the metrics are exposed, from a
+    callback returning {(label values): value}
+    '''
+
+    TYPE = 'gauge'
+
+    def __init__(self, name: str, documentation: str, label_names, callback):
+        super().__init__(name, documentation, label_names)
+        self.callback = callback
+
+    def get_samples(self):
+        return [
+            '%s%s %s' % (self.name, self.format_labels(labels), self.format_value(value))
+            for labels, value in sorted(self.callback().items())
+        ]
+
+class CallbackCounter(CallbackGauge):
+    '''
+    Counter kept elsewhere, e.g. the stats of a cache, read when the
+    metrics are exposed
+    '''
+
+    TYPE = 'counter'
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__metrics = []
+
+    def register(self, metric: Metric):
+        with self.__lock:
+            self.__metrics.append(metric)
+        return metric
+
+    def expose(self, metrics=()):
+        '''
+        return the registered metrics and metrics in the Prometheus text
+        exposition format
+        '''
+        with self.__lock:
+            all_metrics = list(self.__metrics) + list(metrics)
+
+        lines = []
+        for metric in all_metrics:
+            lines += metric.expose()
+        return '\n'.join(lines) + '\n'
+
+class Metrics:
+    '''
+    Process-wide metrics recorded by the handlers and the Google and Slack
+    clients. Recording is a lock and a few additions, so they're always on.
+    '''
+
+    registry = MetricsRegistry()
+
+    handler_latency = registry.register(Histogram(
+        'evalytics_http_request_duration_seconds',
+        'Latency of the HTTP requests by handler, method and status code',
+        ('handler', 'method', 'code')))
+    google_api_calls = registry.register(Counter(
+        'evalytics_google_api_calls_total',
+        'Google API calls by service, method and outcome',
+        ('service', 'method', 'outcome')))
+    google_api_latency = registry.register(Histogram(
+        'evalytics_google_api_call_duration_seconds',
+        'Latency of the Google API calls by service and method',
+        ('service', 'method')))
+    google_api_retries = registry.register(Counter(
+        'evalytics_google_api_retries_total',
+        'Google API calls retried by service, method and reason',
+        ('service', 'method', 'reason')))
+    google_api_retry_wait = registry.register(Counter(
+        'evalytics_google_api_retry_wait_seconds_total',
+        'Seconds waited before retrying Google API calls by service and method',
+        ('service', 'method')))
+    google_api_rate_limit_wait = registry.register(Histogram(
+        'evalytics_google_api_rate_limit_wait_seconds',
+        'Seconds Google API calls waited for their rate limit by quota',
+        ('quota',)))
+    slack_latency = registry.register(Histogram(
+        'evalytics_slack_call_duration_seconds',
+        'Latency of the Slack API calls by method and outcome',
+        ('method', 'outcome')))
+
+    @contextmanager
+    def time_google_api_call(self, service: str, method: str):
+        '''
+        Records the call made inside the block, as failed with the HTTP
+        status of the error it raises, if any
+        '''
+        outcome = 'ok'
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            resp = getattr(e, 'resp', None)
+            outcome = str(getattr(resp, 'status', 'error'))
+            raise
+        finally:
+            self.google_api_latency.observe(time.perf_counter() - start, service, method)
+            self.google_api_calls.inc(service, method, outcome)
+
+    @contextmanager
+    def time_slack_call(self, method: str):
+        outcome = 'ok'
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            outcome = 'error'
+            raise
+        finally:
+            self.slack_latency.observe(time.perf_counter() - start, method, outcome)
@@ -0,0 +1,76 @@
+import time
+
+from evalytics.concurrency import TokenBucket
+from evalytics.metrics import Metrics
+from evalytics.tracing import Tracing
+
+class GoogleApiRateLimiter(Metrics, Tracing):
+    '''
+    Process-wide token buckets every Google API call takes its quota from,
+    so report generation, reminders and reads running at the same time
+    share one budget per Google quota instead of each one hitting 429s.
+
+    Calls are grouped as Google counts their quotas: Sheets and Docs reads
+    and writes apart, Drive, and Gmail sends. Calls of a group without a
+    configured limit don't wait.
+    '''
+
+    SHEETS_READ = 'sheets_read'
+    SHEETS_WRITE = 'sheets_write'
+    DOCS_READ = 'docs_read'
+    DOCS_WRITE = 'docs_write'
+    DRIVE = 'drive'
+    GMAIL_SEND = 'gmail_send'
+
+    READ_HTTP_METHODS = ('GET', 'HEAD')
+    READ_METHOD_NAMES = ('get', 'list', 'export', 'batchGet')
+
+    rate_limits = {}
+
+    @staticmethod
+    def configure_rate_limits(rate_limits: dict):
+        '''
+        rate_limits: {
+            quota: (requests per second, burst),
+            ...
+        }
+        '''
+        GoogleApiRateLimiter.rate_limits = {
+            quota: TokenBucket(requests_per_second, burst)
+            for quota, (requests_per_second, burst) in rate_limits.items()
+        }
+
+    def get_quota(self, method_id: str, http_method: str = None):
+        '''
+        return the quota a call to method_id counts against, e.g.
+        'sheets_read' for 'sheets.spreadsheets.values.get'
+        '''
+        service = method_id.split('.')[0]
+        method_name = method_id.split('.')[-1]
+
+        if service in ('sheets', 'docs'):
+            is_read = http_method in self.READ_HTTP_METHODS or \
+                method_name in self.READ_METHOD_NAMES
+            return '%s_%s' % (service, 'read' if is_read else 'write')
+
+        if service == 'gmail' and method_name == 'send':
+            return self.GMAIL_SEND
+
+        return service
+
+    def acquire_google_api_quota(self, method_id: str, http_method: str = None, requests: int = 1):
+        '''
+        Blocks until requests calls to method_id fit in their quota
+        '''
+        quota = self.get_quota(method_id, http_method)
+        token_bucket = GoogleApiRateLimiter.rate_limits.get(quota)
+        if token_bucket is None:
+            return
+
+        wait = token_bucket.reserve(requests)
+        self.google_api_rate_limit_wait.observe(wait, quota)
+        if wait > 0:
+            with self.trace('rate limit wait', attributes={
+                    'rate_limit.quota': quota,
+                    'rate_limit.requests': requests}):
+                time.sleep(wait)
@@ -0,0 +1,308 @@
+import html
+import io
+import os
+from dataclasses import dataclass
+
+from fpdf import FPDF
+
+from evalytics.models import EvalKind
+from evalytics.exceptions import UnsupportedCharacterException
+
+@dataclass(frozen=True)
+class StyleSpan:
+    __slots__ = ('offset', 'length', 'kind')
+
+    offset: int
+    length: int
+    kind: str
+
+class ReportDocument:
+    '''
+    Text of an eval report plus the style span of every styled part,
+    accumulated in linear time.
+
+    Span offsets and lengths are in UTF-16 code units, the unit Docs API
+    uses for indexes.
+    '''
+
+    EVAL_TITLE = 'eval_title'
+    REVIEWER = 'reviewer'
+    QUESTION = 'question'
+    ANSWER = 'answer'
+
+    def __init__(self):
+        self.__buffer = io.StringIO()
+        self.__parts = []
+        self.__spans = []
+        self.__length = 0
+
+    def append(self, text: str, kind: str = None):
+        length = len(text.encode('utf-16-le')) // 2
+        self.__buffer.write(text)
+
+        if kind is not None:
+            self.__parts.append((kind, text))
+            if length > 0:
+                self.__spans.append(StyleSpan(self.__length, length, kind))
+
+        self.__length += length
+
+    def get_text(self):
+        return self.__buffer.getvalue()
+
+    def get_spans(self):
+        return list(self.__spans)
+
+    def get_parts(self):
+        '''
+        return [(kind, text), ...] of the styled parts, in document order
+        '''
+        return list(self.__parts)
+
+class ReportDocumentBuilder:
+
+    def build_report_document(self, eval_process_id, reviewee_evaluations):
+        document = ReportDocument()
+
+        document.append('\n')
+        document.append(eval_process_id, ReportDocument.EVAL_TITLE)
+        document.append('\n')
+
+        for reviewer_response in reviewee_evaluations:
+            eval_kind = self.get_human_readable_eval_kind(reviewer_response.eval_kind)
+            document.append('\n\n')
+            document.append(
+                'Reviewer: %s, kind: %s' % (reviewer_response.reviewer, eval_kind),
+                ReportDocument.REVIEWER)
+            document.append('\n')
+
+            for question, answer in reviewer_response.eval_response:
+                document.append('\n')
+                document.append(question, ReportDocument.QUESTION)
+                document.append('\n')
+                document.append(answer, ReportDocument.ANSWER)
+                document.append('\n')
+
+        document.append('\n')
+
+        return document
+
+    def get_human_readable_eval_kind(self, eval_kind):
+        if eval_kind == EvalKind.SELF:
+            return 'Self evaluation'
+        elif eval_kind == EvalKind.PEER_MANAGER:
+            return 'Report by direct report'
+        elif eval_kind == EvalKind.MANAGER_PEER:
+            return 'Report by direct manager'
+        elif eval_kind == EvalKind.PEER_TO_PEER:
+            return 'Report by peer'
+        else:
+            return ''
+
+class ReportRenderer(ReportDocumentBuilder):
+    '''
+    Renders the eval report of a reviewee to the bytes of a local file,
+    without calling any Google API
+    '''
+
+    FORMAT = None
+    EXTENSION = None
+
+    def render(self, eval_process_id, reviewee, reviewee_evaluations) -> bytes:
+        document = self.build_report_document(eval_process_id, reviewee_evaluations)
+        return self.render_document(document, reviewee)
+
+    def render_document(self, document: ReportDocument, reviewee) -> bytes:
+        raise NotImplementedError("render_document not implemented")
+
+class MarkdownReportRenderer(ReportRenderer):
+
+    FORMAT = 'markdown'
+    EXTENSION = 'md'
+
+    PREFIXES = {
+        ReportDocument.EVAL_TITLE: '# ',
+        ReportDocument.REVIEWER: '## ',
+        ReportDocument.QUESTION: '### ',
+        ReportDocument.ANSWER: '',
+    }
+
+    def render_document(self, document: ReportDocument, reviewee) -> bytes:
+        lines = []
+        for kind, text in document.get_parts():
+            if len(lines) > 0:
+                lines.append('')
+            lines.append(self.PREFIXES[kind] + text)
+
+            if kind == ReportDocument.EVAL_TITLE:
+                lines.append('')
+                lines.append('Employee: %s' % reviewee)
+
+        lines.append('')
+        return '\n'.join(lines).encode('utf-8')
+
+class HtmlReportRenderer(ReportRenderer):
+
+    FORMAT = 'html'
+    EXTENSION = 'html'
+
+    TAGS = {
+        ReportDocument.EVAL_TITLE: '<h1>%s</h1>',
+        ReportDocument.REVIEWER: '<h2>%s</h2>',
+        ReportDocument.QUESTION: '<h3>%s</h3>',
+        ReportDocument.ANSWER: '<p class="answer">%s</p>',
+    }
+
+    def render_document(self, document: ReportDocument, reviewee) -> bytes:
+        parts = [
+            '<!DOCTYPE html>',
+            '<html>',
+            '<head>',
+            '<meta charset="utf-8">',
+            '<title>%s</title>' % html.escape(reviewee),
+            '<style>.answer { white-space: pre-wrap; }</style>',
+            '</head>',
+            '<body>',
+        ]
+
+        for kind, text in document.get_parts():
+            parts.append(self.TAGS[kind] % html.escape(text))
+
+            if kind == ReportDocument.EVAL_TITLE:
+                parts.append('<p>Employee: %s</p>' % html.escape(reviewee))
+
+        parts.append('</body>')
+        parts.append('</html>')
+        parts.append('')
+        return '\n'.join(parts).encode('utf-8')
+
+class PdfReportRenderer(ReportRenderer):
+    '''
+    Renders the report with fpdf2, which wraps lines with the real glyph
+    widths.
+
+    With font_path a Unicode TrueType font is embedded, bold_font_path
+    defaults to it. Without it the standard Helvetica fonts are used, and
+    they only cover Latin-1. Text with a character the font has no glyph
+    for raises UnsupportedCharacterException instead of being printed wrong.
+    '''
+
+    FORMAT = 'pdf'
+    EXTENSION = 'pdf'
+
+    FONT_FAMILY = 'report'
+    CORE_FONT_FAMILY = 'helvetica'
+    REGULAR = ''
+    BOLD = 'B'
+
+    # In points, the unit of the document
+    MARGIN = 56
+    LINE_SPACING = 1.3
+
+    # (font size, font style, blank space before) by part kind
+    STYLES = {
+        ReportDocument.EVAL_TITLE: (20, BOLD, 0),
+        ReportDocument.REVIEWER: (16, REGULAR, 11),
+        ReportDocument.QUESTION: (14, REGULAR, 6),
+        ReportDocument.ANSWER: (11, REGULAR, 0),
+    }
+
+    def __init__(self, font_path: str = None, bold_font_path: str = None):
+        self.font_path = font_path
+        self.bold_font_path = bold_font_path or font_path
+
+    def render_document(self, document: ReportDocument, reviewee) -> bytes:
+        pdf = FPDF(format='A4', unit='pt')
+        pdf.set_margins(self.MARGIN, self.MARGIN)
+        pdf.set_auto_page_break(True, margin=self.MARGIN)
+        font_family = self.__add_fonts(pdf)
+        pdf.add_page()
+
+        for kind, text in document.get_parts():
+            size, style, space_before = self.STYLES[kind]
+            if space_before > 0:
+                pdf.ln(space_before)
+            self.__write_paragraph(pdf, font_family, style, size, text)
+
+            if kind == ReportDocument.EVAL_TITLE:
+                self.__write_paragraph(
+                    pdf, font_family, self.REGULAR, 11, 'Employee: %s' % reviewee)
+
+        return bytes(pdf.output())
+
+    def __add_fonts(self, pdf: FPDF):
+        if self.font_path is None:
+            return self.CORE_FONT_FAMILY
+
+        pdf.add_font(self.FONT_FAMILY, self.REGULAR, self.font_path)
+        pdf.add_font(self.FONT_FAMILY, self.BOLD, self.bold_font_path)
+        return self.FONT_FAMILY
+
+    def __write_paragraph(self, pdf: FPDF, font_family, style, size, text):
+        pdf.set_font(font_family, style, size)
+        self.__check_characters(pdf, str(text))
+        pdf.multi_cell(
+            0, size * self.LINE_SPACING, str(text),
+            align='L', new_x='LMARGIN', new_y='NEXT')
+
+    def __check_characters(self, pdf: FPDF, text):
+        cmap = getattr(pdf.current_font, 'cmap', None)
+        for character in text:
+            if character in '\n\r\t':
+                continue
+
+            if cmap is not None:
+                supported = ord(character) in cmap
+            else:
+                supported = ord(character) < 256
+
+            if not supported:
+                raise UnsupportedCharacterException(
+                    "Character '%s' (U+%04X) not in PDF font %s" % (
+                        character, ord(character), self.font_path or self.CORE_FONT_FAMILY))
+
+class ReportRendererFactory:
+
+    RENDERERS = {
+        MarkdownReportRenderer.FORMAT: MarkdownReportRenderer,
+        HtmlReportRenderer.FORMAT: HtmlReportRenderer,
+        PdfReportRenderer.FORMAT: PdfReportRenderer,
+    }
+
+    def get_report_renderer(self, report_format: str, settings=None):
+        '''
+        settings: Settings whose local reports fonts the PDF renderer uses
+        '''
+        renderer = self.RENDERERS.get(report_format)
+        if renderer is None:
+            raise ValueError(report_format)
+
+        if renderer is PdfReportRenderer and settings is not None:
+            return PdfReportRenderer(
+                settings.eval_process.local_reports_pdf_font,
+                settings.eval_process.local_reports_pdf_bold_font)
+
+        return renderer()
+
+class LocalReportWriter:
+
+    def write_report(self,
+                     renderer: ReportRenderer,
+                     path: str,
+                     eval_process_id,
+                     reviewee,
+                     reviewee_evaluations):
+        '''
+        Renders the report of reviewee into a folder of path named after
+        the eval process, return the written file path
+        '''
+        eval_process_path = os.path.join(path, str(eval_process_id).replace('/', '_'))
+        os.makedirs(eval_process_path, exist_ok=True)
+        file_path = os.path.join(
+            eval_process_path, '{}.{}'.format(reviewee, renderer.EXTENSION))
+
+        content = renderer.render(eval_process_id, reviewee, reviewee_evaluations)
+        with open(file_path, 'wb') as report_file:
+            report_file.write(content)
+
+        return file_path
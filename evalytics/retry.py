@@ -0,0 +1,167 @@
+import email.utils
+import json
+import random
+import socket
+import time
+
+from googleapiclient.errors import HttpError
+
+from evalytics.metrics import Metrics
+from evalytics.tracing import Tracing
+
+class RetryPolicy:
+    '''
+    When and how long to wait before calling a Google API again.
+
+    Rate limit errors, a 429 or a 403 with a rate limit reason, are
+    retried for every method, Google rejected the call without running it.
+    Server errors and connection errors are only retried for idempotent
+    methods: reads, and the methods in idempotent_methods, as a method id
+    like 'sheets.spreadsheets.values.batchGetByDataFilter'. Retrying a
+    create, a send or a batchUpdate could run it twice.
+
+    The wait doubles from initial_delay_seconds up to max_delay_seconds
+    with full jitter, so parallel callers don't retry in lockstep, and is
+    never shorter than the Retry-After of the response.
+    '''
+
+    RATE_LIMIT_STATUS = 429
+    RATE_LIMIT_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded')
+    SERVER_ERROR_STATUSES = (500, 502, 503, 504)
+    CONNECTION_ERRORS = (ConnectionError, socket.timeout)
+
+    IDEMPOTENT_HTTP_METHODS = ('GET', 'HEAD')
+    IDEMPOTENT_METHOD_NAMES = ('get', 'list', 'export', 'batchGet')
+
+    DEFAULT_MAX_ATTEMPTS = 5
+    DEFAULT_INITIAL_DELAY_SECONDS = 1.0
+    DEFAULT_MAX_DELAY_SECONDS = 32.0
+
+    def __init__(self,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 initial_delay_seconds: float = DEFAULT_INITIAL_DELAY_SECONDS,
+                 max_delay_seconds: float = DEFAULT_MAX_DELAY_SECONDS,
+                 idempotent_methods=()):
+        self.max_attempts = max(1, max_attempts)
+        self.initial_delay_seconds = initial_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.idempotent_methods = tuple(idempotent_methods)
+
+    def is_idempotent(self, method_id: str, http_method: str = None):
+        if method_id in self.idempotent_methods:
+            return True
+        if http_method in self.IDEMPOTENT_HTTP_METHODS:
+            return True
+        return method_id.split('.')[-1] in self.IDEMPOTENT_METHOD_NAMES
+
+    def get_retry_reason(self, error: Exception, idempotent: bool):
+        '''
+        return why error can be retried, e.g. '429' or 'connection', or
+        None when it can't
+        '''
+        if isinstance(error, HttpError):
+            status = error.resp.status
+            if status == self.RATE_LIMIT_STATUS or \
+                    (status == 403 and self.__is_rate_limit_reason(error)):
+                return str(status)
+            if idempotent and status in self.SERVER_ERROR_STATUSES:
+                return str(status)
+            return None
+
+        if idempotent and isinstance(error, self.CONNECTION_ERRORS):
+            return 'connection'
+
+        return None
+
+    def get_delay_seconds(self, attempt: int, error: Exception = None):
+        '''
+        return seconds to wait after the failed attempt, counted from 1
+        '''
+        backoff = min(
+            self.max_delay_seconds,
+            self.initial_delay_seconds * 2 ** (attempt - 1))
+        delay = random.uniform(0, backoff)
+
+        retry_after = self.__get_retry_after_seconds(error)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+
+        return delay
+
+    def __is_rate_limit_reason(self, error: HttpError):
+        try:
+            errors = json.loads(error.content.decode('utf-8'))['error']['errors']
+        except (ValueError, KeyError, TypeError):
+            return False
+
+        for detail in errors:
+            if detail.get('reason') in self.RATE_LIMIT_REASONS:
+                return True
+        return False
+
+    def __get_retry_after_seconds(self, error: Exception):
+        resp = getattr(error, 'resp', None)
+        retry_after = resp.get('retry-after') if resp is not None else None
+        if retry_after is None:
+            return None
+
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+
+        try:
+            retry_at = email.utils.parsedate_to_datetime(retry_after)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, retry_at.timestamp() - time.time())
+
+class GoogleApiRetry(Metrics, Tracing):
+    '''
+    Calls Google APIs following the process-wide retry policy, configured
+    when the server starts
+    '''
+
+    retry_policy = RetryPolicy()
+
+    @staticmethod
+    def configure_retry(retry_policy: RetryPolicy):
+        GoogleApiRetry.retry_policy = retry_policy
+
+    def call_with_retry(self, function, method_id: str, idempotent: bool):
+        '''
+        return what function returns, calling it again while it raises
+        errors the policy retries and attempts are left
+        '''
+        retry_policy = GoogleApiRetry.retry_policy
+
+        attempt = 1
+        while True:
+            try:
+                return function()
+            except Exception as e:
+                reason = retry_policy.get_retry_reason(e, idempotent)
+                if reason is None or attempt >= retry_policy.max_attempts:
+                    raise
+
+                self.wait_before_retry(
+                    method_id,
+                    reason,
+                    attempt,
+                    retry_policy.get_delay_seconds(attempt, e))
+                attempt += 1
+
+    def wait_before_retry(self, method_id: str, reason: str, attempt: int, delay: float):
+        '''
+        Sleeps delay seconds after the failed attempt of method_id,
+        recording the retry and its wait
+        '''
+        service, _, method = method_id.partition('.')
+        self.google_api_retries.inc(service, method, reason)
+        self.google_api_retry_wait.inc(service, method, amount=delay)
+        with self.trace('retry wait', attributes={
+                'rpc.service': service,
+                'rpc.method': method,
+                'retry.reason': reason,
+                'retry.attempt': attempt}):
+            time.sleep(delay)
@@ -1,23 +1,39 @@
+import hashlib
+import json
+import threading
+
 from googledrive.exceptions import MissingGoogleDriveFileException
 from googledrive.api import GoogleDrive
 
 from evalytics.google_api import GoogleAPI
-from evalytics.config import Config, ProvidersConfig
+from evalytics.cache import SnapshotCacheFactory, EvalReportDigestsFactory
+from evalytics.config import Config, ProvidersConfig, Settings
 from evalytics.models import Employee, EvalKind
 from evalytics.models import ReviewerResponse
 from evalytics.exceptions import MissingDataException, NoFormsException
 
-class StorageFactory(Config):
+class StorageFactory(SnapshotCacheFactory, EvalReportDigestsFactory, Config):
 
-    def get_storage(self):
+    def get_storage(self, force_refresh: bool = False):
         storage_kind = super().read_storage_provider()
         if storage_kind == ProvidersConfig.GOOGLE_DRIVE:
-            return GoogleStorage()
+            storage = GoogleStorage()
+            storage.set_snapshot_cache(super().get_snapshot_cache(), force_refresh)
+            storage.set_eval_report_digests(super().get_eval_report_digests())
+            return storage
 
         raise ValueError(storage_kind)
 
 class GoogleStorage(GoogleAPI, Config):
 
+    eval_report_digests = None
+
+    __commenter_grants = None
+    __commenter_grants_lock = threading.Lock()
+
+    def set_eval_report_digests(self, eval_report_digests):
+        self.eval_report_digests = eval_report_digests
+
     def get_employees(self):
         google_folder = super().read_google_folder()
         org_chart = super().read_google_orgchart()
@@ -98,36 +114,124 @@ class GoogleStorage(GoogleAPI, Config):
     def generate_eval_reports(self,
                               reviewee,
                               reviewee_evaluations: ReviewerResponse,
-                              employee_managers):
-        is_add_comenter_to_eval_reports_enabled = super().read_is_add_comenter_to_eval_reports_enabled()
-        eval_process_id = super().read_eval_process_id()
-        filename_prefix = super().read_google_eval_report_prefix()
-        filename = '{}{}'.format(filename_prefix, reviewee)
+                              employee_managers,
+                              settings: Settings = None,
+                              force: bool = False):
+        '''
+        return the emails of the managers the report is shared with or None
+        when the report was already up to date and it was left untouched.
 
-        company_domain = super().read_company_domain()
+        Commenter permissions for the managers are only collected here, they
+        are sent by grant_eval_reports_permissions.
+
+        With eval report digests set, an existing report is only written
+        again if the digest of its content changed or force is True.
+        '''
+        if settings is None:
+            settings = super().read_settings()
+
+        filename = '{}{}'.format(
+            settings.google_drive.eval_report_prefix,
+            reviewee)
+
+        company_domain = settings.company.domain
         employee_managers = [
             '{}@{}'.format(m, company_domain)
             for m in employee_managers
         ]
 
-        document_id = self.__get_eval_report_id(filename)
+        is_add_comenter_enabled = settings.eval_process.is_add_comenter_to_eval_reports_enabled
+        google_file = self.__get_eval_report_file(filename, settings)
+
+        digest = None
+        if self.eval_report_digests is not None:
+            digest = self.__get_eval_report_digest(
+                reviewee, reviewee_evaluations, employee_managers, settings)
+
+            if not force and google_file is not None and \
+                    self.eval_report_digests.get(google_file.id) == digest:
+                # Permissions may have been removed or never granted
+                if is_add_comenter_enabled:
+                    self.__add_commenter_grants(reviewee, google_file.id, employee_managers)
+                return None
+
+        if google_file is None:
+            template_id = settings.google_drive.eval_report_template_id
+            document_id = super().copy_file(template_id, filename)
+        else:
+            template_id = None
+            document_id = google_file.id
 
         super().insert_eval_report_in_document(
-            eval_process_id,
+            settings.eval_process.id,
             document_id,
             reviewee,
-            reviewee_evaluations)
+            reviewee_evaluations,
+            template_id=template_id)
 
-        if is_add_comenter_to_eval_reports_enabled:
-            for email in employee_managers:
-                super().create_permission(
-                    document_id=document_id,
-                    role=GoogleDrive.PERMISSION_ROLE_COMMENTER,
-                    email_address=email
-                )
+        if is_add_comenter_enabled:
+            self.__add_commenter_grants(reviewee, document_id, employee_managers)
+
+        if digest is not None:
+            self.eval_report_digests.put(document_id, digest)
 
         return employee_managers
 
+    def grant_eval_reports_permissions(self):
+        '''
+        Grants the commenter permissions collected by generate_eval_reports
+        in batched Drive requests, skipping the users that can already
+        comment each eval report. The grants of an eval report whose
+        permissions can't be listed fail without stopping the others.
+
+        return {
+            'issued': number_of_permissions_created,
+            'skipped': number_of_permissions_already_granted,
+            'failed': {
+                reviewee: [email_address, ...],
+                ...
+            }
+        }
+        '''
+        with GoogleStorage.__commenter_grants_lock:
+            grants = self.__commenter_grants or {}
+            self.__commenter_grants = {}
+
+        summary = {
+            'issued': 0,
+            'skipped': 0,
+            'failed': {},
+        }
+        if len(grants) == 0:
+            return summary
+
+        permissions, list_errors = super().get_files_permissions(
+            dict.fromkeys(document_id for document_id, _ in grants))
+
+        # Grants of the files whose permissions can't be listed fail alone
+        unlisted = [grant for grant in grants if grant[0] in list_errors]
+        missing = [
+            (document_id, email)
+            for document_id, email in grants
+            if document_id not in list_errors and \
+                permissions.get(document_id, {}).get(email.lower()) \
+                not in self.COMMENTING_ROLES
+        ]
+
+        create_errors = {}
+        if len(missing) > 0:
+            create_errors = super().batch_create_permissions(
+                missing, GoogleDrive.PERMISSION_ROLE_COMMENTER)
+
+        for grant in unlisted + list(create_errors.keys()):
+            summary['failed'].setdefault(grants[grant], []).append(grant[1])
+
+        summary.update({
+            'issued': len(missing) - len(create_errors),
+            'skipped': len(grants) - len(missing) - len(unlisted),
+        })
+        return summary
+
     def get_peers_assignment(self):
         assignments_peers_range = super().read_assignments_peers_range()
 
@@ -178,21 +282,44 @@ class GoogleStorage(GoogleAPI, Config):
         file_path = f'/{google_folder}/{assignments_folder}/{assignments_peers_file}'
         return super().googledrive_get_file(file_path)
 
-    def __get_eval_report_id(self, filename):
-        '''
-            This function returns an ID of an empty eval report document ready to be filled
-        '''
+    def __add_commenter_grants(self, reviewee, document_id, emails):
+        with GoogleStorage.__commenter_grants_lock:
+            if self.__commenter_grants is None:
+                self.__commenter_grants = {}
 
-        google_folder = super().read_google_folder()
-        eval_reports_folder = super().read_eval_reports_folder()
+            for email in emails:
+                self.__commenter_grants.update({
+                    (document_id, email): reviewee
+                })
 
-        file_path = f'/{google_folder}/{eval_reports_folder}/{filename}'
-        google_file = super().googledrive_get_file(file_path)
+    def __get_eval_report_file(self, filename, settings: Settings):
+        google_folder = settings.google_drive.folder
+        eval_reports_folder = settings.google_drive.eval_reports_folder
 
-        if google_file is None:
-            template_id = super().read_google_eval_report_template_id()
-            return super().copy_file(template_id, filename)
-        else:
-            super().empty_document(google_file.id)
+        file_path = f'/{google_folder}/{eval_reports_folder}/{filename}'
+        return super().googledrive_get_file(file_path)
 
-        return google_file.id
+    def __get_eval_report_digest(self,
+                                 reviewee,
+                                 reviewee_evaluations,
+                                 employee_managers,
+                                 settings: Settings):
+        '''
+        Digest of everything that ends up in the report document: responses,
+        the managers it's shared with and the eval process
+        '''
+        content = {
+            'eval_process_id': settings.eval_process.id,
+            'reviewee': reviewee,
+            'managers': employee_managers,
+            'evaluations': [
+                [
+                    reviewer_response.reviewer,
+                    str(reviewer_response.eval_kind),
+                    [list(qa) for qa in reviewer_response.eval_response]
+                ]
+                for reviewer_response in reviewee_evaluations
+            ]
+        }
+        serialized = json.dumps(content, sort_keys=True, default=str)
+        return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
@@ -0,0 +1,257 @@
+import contextvars
+import functools
+import inspect
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+
+class Span:
+    '''
+    Timed operation of a trace, exported as an OpenTelemetry span
+    '''
+
+    KIND_INTERNAL = 1
+    KIND_SERVER = 2
+    KIND_CLIENT = 3
+
+    STATUS_UNSET = 0
+    STATUS_ERROR = 2
+
+    def __init__(self, name: str, parent=None, kind: int = KIND_INTERNAL, attributes=None):
+        self.name = name
+        self.kind = kind
+        self.trace_id = parent.trace_id if parent is not None else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent.span_id if parent is not None else None
+        self.attributes = dict(attributes or {})
+        self.status = self.STATUS_UNSET
+        self.status_message = None
+
+        self.start_time_ns = time.time_ns()
+        self.end_time_ns = None
+        self.__start = time.perf_counter_ns()
+
+    def set_attribute(self, key: str, value):
+        self.attributes.update({key: value})
+
+    def set_error(self, error: Exception):
+        self.status = self.STATUS_ERROR
+        self.status_message = repr(error)
+
+    def end(self):
+        self.end_time_ns = self.start_time_ns + time.perf_counter_ns() - self.__start
+
+    def is_root(self):
+        return self.parent_span_id is None
+
+    def to_otlp(self):
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start_time_ns),
+            'endTimeUnixNano': str(self.end_time_ns),
+            'attributes': [
+                {'key': key, 'value': self.__to_otlp_value(value)}
+                for key, value in sorted(self.attributes.items())
+            ],
+            'status': {'code': self.status},
+        }
+        if self.parent_span_id is not None:
+            span.update({'parentSpanId': self.parent_span_id})
+        if self.status_message is not None:
+            span['status'].update({'message': self.status_message})
+        return span
+
+    def __to_otlp_value(self, value):
+        if isinstance(value, bool):
+            return {'boolValue': value}
+        if isinstance(value, int):
+            return {'intValue': str(value)}
+        if isinstance(value, float):
+            return {'doubleValue': value}
+        return {'stringValue': str(value)}
+
+class JsonFileSpanExporter:
+    '''
+    Appends spans to path in the OTLP/JSON file format, one
+    ExportTraceServiceRequest per line, as the OpenTelemetry Collector file
+    exporter writes them. The spans of a trace are written together when
+    its root span ends, spans ending after their root are written alone.
+    '''
+
+    SERVICE_NAME = 'evalytics'
+
+    def __init__(self, path: str):
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__open_traces = {}
+
+        directory = os.path.dirname(path)
+        if directory != '':
+            os.makedirs(directory, exist_ok=True)
+
+    def start(self, span: Span):
+        if span.is_root():
+            with self.__lock:
+                self.__open_traces.update({span.trace_id: []})
+
+    def end(self, span: Span):
+        with self.__lock:
+            if span.is_root():
+                spans = self.__open_traces.pop(span.trace_id, []) + [span]
+            elif span.trace_id in self.__open_traces:
+                self.__open_traces[span.trace_id].append(span)
+                return
+            else:
+                spans = [span]
+
+            self.__write(spans)
+
+    def __write(self, spans):
+        line = json.dumps({
+            'resourceSpans': [{
+                'resource': {
+                    'attributes': [{
+                        'key': 'service.name',
+                        'value': {'stringValue': self.SERVICE_NAME},
+                    }, {
+                        'key': 'process.pid',
+                        'value': {'intValue': str(os.getpid())},
+                    }],
+                },
+                'scopeSpans': [{
+                    'scope': {'name': self.SERVICE_NAME},
+                    'spans': [span.to_otlp() for span in spans],
+                }],
+            }],
+        })
+        # A single append per trace keeps the lines of forked processes whole
+        with open(self.path, 'a') as spans_file:
+            spans_file.write(line + '\n')
+
+class Tracing:
+    '''
+    Opt-in tracing. Until an exporter is configured trace() only checks it
+    isn't, so traced code runs at the same speed with tracing off.
+
+    The current span follows the code through a context variable, code run
+    in other threads needs to be run in a copy of the caller context.
+    '''
+
+    exporter = None
+    current_span = contextvars.ContextVar('evalytics_current_span', default=None)
+
+    @staticmethod
+    def configure(exporter):
+        '''
+        Turns tracing on exporting spans to exporter, or off when it's None
+        '''
+        Tracing.exporter = exporter
+
+    def start_span(self, name: str, kind: int = Span.KIND_INTERNAL, attributes=None):
+        '''
+        Starts a span as the current one, to be ended with end_span.
+        return None when tracing is off
+        '''
+        exporter = Tracing.exporter
+        if exporter is None:
+            return None
+
+        span = Span(name, Tracing.current_span.get(), kind, attributes)
+        exporter.start(span)
+        Tracing.current_span.set(span)
+        return span
+
+    def end_span(self, span: Span):
+        span.end()
+        Tracing.exporter.end(span)
+
+    @contextmanager
+    def trace(self, name: str, kind: int = Span.KIND_INTERNAL, attributes=None):
+        '''
+        Runs the block inside a span child of the current one, yields the
+        span or None when tracing is off
+        '''
+        exporter = Tracing.exporter
+        if exporter is None:
+            yield None
+            return
+
+        parent = Tracing.current_span.get()
+        span = Span(name, parent, kind, attributes)
+        exporter.start(span)
+        token = Tracing.current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.set_error(e)
+            raise
+        finally:
+            Tracing.current_span.reset(token)
+            span.end()
+            exporter.end(span)
+
+def traced(name: str):
+    '''
+    Decorates a function to run inside a span named name
+    '''
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if Tracing.exporter is None:
+                return function(*args, **kwargs)
+
+            with Tracing().trace(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def trace_public_methods(cls):
+    '''
+    Decorates a class so every public method it defines runs inside a span
+    named after the class and the method. Inherited methods are left to
+    their own classes, so mixins composed after it still override them.
+    Generators are left as they are, they return before doing any work.
+    '''
+    for name, attribute in list(vars(cls).items()):
+        if name.startswith('_') or \
+                not inspect.isfunction(attribute) or \
+                inspect.isgeneratorfunction(attribute):
+            continue
+        setattr(cls, name, traced('%s.%s' % (cls.__name__, name))(attribute))
+    return cls
+
+def summarize_trace(spans):
+    '''
+    return [(span name, count, total ms)] of the spans of a trace, given as
+    OTLP/JSON spans, the slowest names first
+    '''
+    summary = {}
+    for span in spans:
+        duration_ms = (int(span['endTimeUnixNano']) - int(span['startTimeUnixNano'])) / 1e6
+        count, total_ms = summary.get(span['name'], (0, 0.0))
+        summary.update({span['name']: (count + 1, total_ms + duration_ms)})
+
+    return sorted(
+        [(name, count, total_ms) for name, (count, total_ms) in summary.items()],
+        key=lambda item: (-item[2], item[0]))
+
+def read_traces(path: str):
+    '''
+    return {trace id: [OTLP/JSON spans]} of the traces exported to path
+    '''
+    traces = {}
+    with open(path) as spans_file:
+        for line in spans_file:
+            if line.strip() == '':
+                continue
+            for resource_spans in json.loads(line)['resourceSpans']:
+                for scope_spans in resource_spans['scopeSpans']:
+                    for span in scope_spans['spans']:
+                        traces.setdefault(span['traceId'], []).append(span)
+    return traces
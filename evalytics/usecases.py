@@ -1,41 +1,71 @@
+import time
+
 from evalytics.models import CommunicationKind
+from evalytics.config import EvalProcessConfig
+from evalytics.concurrency import ConcurrentMapper
+from evalytics.tracing import traced
 from evalytics.adapters import EmployeeAdapter, ReviewerAdapter
 from evalytics.filters import ReviewerResponseFilter
 from evalytics.storages import StorageFactory
 from evalytics.communications_channels import CommunicationChannelFactory
 from evalytics.forms import FormsPlatformFactory
+from evalytics.renderers import ReportRendererFactory, LocalReportWriter
+from evalytics.renderers import PdfReportRenderer
 
 class GetEmployeesUseCase(StorageFactory):
 
-    def get_employees(self):
-        storage = super().get_storage()
+    @traced('GetEmployeesUseCase.get_employees')
+    def get_employees(self, force_refresh: bool = False):
+        storage = super().get_storage(force_refresh)
         return storage.get_employees()
 
 class GetSurveysUseCase(StorageFactory):
 
-    def get_surveys(self):
-        storage = super().get_storage()
+    @traced('GetSurveysUseCase.get_surveys')
+    def get_surveys(self, force_refresh: bool = False):
+        storage = super().get_storage(force_refresh)
         return storage.get_forms()
 
 class GetReviewersUseCase(
         StorageFactory,
         EmployeeAdapter):
 
-    def get_reviewers(self):
-        storage = super().get_storage()
+    @traced('GetReviewersUseCase.get_reviewers')
+    def get_reviewers(self, force_refresh: bool = False):
+        storage = super().get_storage(force_refresh)
         return super().build_reviewers(
             storage.get_employees(),
             storage.get_peers_assignment(),
             storage.get_forms())
 
+    def stream_reviewers(self, force_refresh: bool = False):
+        '''
+        Reads the storage right away and returns an iterator that builds
+        the reviewers one at a time as they're consumed
+        '''
+        storage = super().get_storage(force_refresh)
+        return super().iter_reviewers(
+            storage.get_employees(),
+            storage.get_peers_assignment(),
+            storage.get_forms())
+
 class SendCommunicationUseCase(CommunicationChannelFactory):
 
-    def send(self, revieweers, kind: CommunicationKind):
+    @traced('SendCommunicationUseCase.send')
+    def send(self, revieweers, kind: CommunicationKind, progress=None):
+        '''
+        When progress is given, it's told the uids of the reviewers to
+        reach and the outcome of every communication as soon as it's sent
+        '''
         communication_channel = super().get_communication_channel()
+        if progress is not None:
+            progress.set_items(list(revieweers.keys()))
 
         comms_sent = []
         comms_not_sent = []
-        for _, reviewer in revieweers.items():
+        for uid, reviewer in revieweers.items():
+            start = time.perf_counter()
+            sent = True
             try:
                 communication_channel.send_communication(
                     reviewer=reviewer,
@@ -43,28 +73,49 @@ class SendCommunicationUseCase(CommunicationChannelFactory):
                 comms_sent.append(reviewer.uid)
             # TODO: we need more info here to know why a communication was not sent
             except:
+                sent = False
                 comms_not_sent.append(reviewer.uid)
 
+            if progress is not None:
+                progress.add_result(uid, {
+                    'elapsed_seconds': round(time.perf_counter() - start, 3)
+                }, failed=not sent)
+
         return comms_sent, comms_not_sent
 
 class GetResponseStatusUseCase(
         GetReviewersUseCase, FormsPlatformFactory, ReviewerAdapter):
 
-    def get_response_status(self):
-        reviewers = super().get_reviewers()
-        responses = super().get_forms_platform().get_responses()
+    @traced('GetResponseStatusUseCase.get_response_status')
+    def get_response_status(self, force_refresh: bool = False):
+        reviewers = super().get_reviewers(force_refresh)
+        responses = super().get_forms_platform(force_refresh).iter_responses()
         return super().get_status_from_responses(reviewers, responses)
 
+    def stream_response_status(self, force_refresh: bool = False):
+        '''
+        Like get_response_status, but pending reviewers come as an
+        iterator that builds them one at a time as they're consumed
+        '''
+        reviewers = super().get_reviewers(force_refresh)
+        responses = super().get_forms_platform(force_refresh).iter_responses()
+        completed, _, inconsistent = super().get_status_from_responses(
+            reviewers, responses)
+        pending = super().iter_pending_reviewers(reviewers, completed)
+        return completed, pending, inconsistent
+
 class GetEvalReportsUseCase(
         StorageFactory, FormsPlatformFactory,
         EmployeeAdapter, ReviewerResponseFilter):
 
+    @traced('GetEvalReportsUseCase.get')
     def get(
             self,
             area, managers,
-            employee_uids):
-        storage = super().get_storage()
-        forms_platform = super().get_forms_platform()
+            employee_uids,
+            force_refresh: bool = False):
+        storage = super().get_storage(force_refresh)
+        forms_platform = super().get_forms_platform(force_refresh)
 
         reviewee_evaluations = forms_platform.get_evaluations()
         employees = storage.get_employees()
@@ -80,14 +131,40 @@ class GetEvalReportsUseCase(
 
 class GenerateEvalReportsUseCase(
         StorageFactory, FormsPlatformFactory,
-        EmployeeAdapter, ReviewerResponseFilter):
+        EmployeeAdapter, ReviewerResponseFilter,
+        LocalReportWriter, ConcurrentMapper):
 
+    @traced('GenerateEvalReportsUseCase.generate')
     def generate(
             self,
             area, managers,
-            employee_uids):
-        storage = super().get_storage()
-        forms_platform = super().get_forms_platform()
+            employee_uids,
+            force_refresh: bool = False,
+            force: bool = False,
+            progress=None):
+        '''
+        Generates one eval report per reviewee. In concurrent mode at most
+        max_workers reports are generated at a time and at most
+        reports_per_second of them are started per second.
+
+        A failing report never stops the others, it's returned in
+        not_created with the exception that made it fail. Every report
+        records the seconds it took. Reports whose content didn't change are
+        left untouched and marked as skipped unless force is True.
+
+        Commenter permissions of every report are granted together once all
+        reports are generated, permissions summarizes the grants issued and
+        skipped.
+
+        When sending eval reports as PDF is enabled, every generated report
+        is also rendered as a PDF file in the local reports path.
+
+        When progress is given, it's told the uids of the reviewees to
+        generate and every report as soon as it's finished.
+        '''
+        settings = super().read_settings()
+        storage = super().get_storage(force_refresh)
+        forms_platform = super().get_forms_platform(force_refresh)
 
         reviewee_evaluations = forms_platform.get_evaluations()
         employees = storage.get_employees()
@@ -99,43 +176,192 @@ class GenerateEvalReportsUseCase(
             managers,
             employee_uids)
 
+        if progress is not None:
+            progress.set_items(list(reviewee_evaluations.keys()))
+
+        def generate_eval_report(item):
+            uid, evaluations = item
+            report = self.__generate_eval_report(
+                storage, settings, employees, uid, evaluations, force)
+            if progress is not None:
+                progress.add_result(uid, report, failed='error' in report)
+            return report
+
+        eval_process = settings.eval_process
+        if eval_process.reports_generation_mode == EvalProcessConfig.REPORTS_GENERATION_MODE_CONCURRENT:
+            reports = super().concurrent_map(
+                generate_eval_report,
+                reviewee_evaluations.items(),
+                eval_process.reports_generation_max_workers,
+                eval_process.reports_generation_reports_per_second)
+        else:
+            reports = [
+                generate_eval_report(item)
+                for item in reviewee_evaluations.items()
+            ]
+
         created = {}
         not_created = {}
-        for uid, reviewee_evaluations in reviewee_evaluations.items():
-            employee_managers = super().get_employee_managers(employees, uid)
+        for report in reports:
+            if 'error' in report:
+                not_created.update({report['employee']: report})
+            else:
+                created.update({report['employee']: report})
+
+        try:
+            permissions = storage.grant_eval_reports_permissions()
+        except Exception as e:
+            permissions = {
+                'error': repr(e)
+            }
+
+        return created, not_created, permissions
+
+    @traced('GenerateEvalReportsUseCase.generate_eval_report')
+    def __generate_eval_report(self, storage, settings, employees, uid, reviewee_evaluations, force):
+        employee_managers = super().get_employee_managers(employees, uid)
+        report = {
+            'employee': uid,
+            'managers': employee_managers
+        }
 
+        start = time.perf_counter()
+        try:
+            shared_with = storage.generate_eval_reports(
+                uid,
+                reviewee_evaluations,
+                employee_managers,
+                settings,
+                force)
+            report.update({
+                'skipped': shared_with is None
+            })
+        except Exception as e:
+            report.update({
+                'error': repr(e)
+            })
+
+        # The Drive report is created whatever happens to its PDF copy
+        if 'error' not in report and \
+                settings.eval_process.is_send_eval_reports_as_pdf_enabled:
             try:
-                storage.generate_eval_reports(
-                    uid,
-                    reviewee_evaluations,
-                    employee_managers)
-
-                created.update({
-                    uid: {
-                        'employee': uid,
-                        'managers': employee_managers
-                    }
+                report.update({
+                    'pdf': super().write_report(
+                        PdfReportRenderer(
+                            settings.eval_process.local_reports_pdf_font,
+                            settings.eval_process.local_reports_pdf_bold_font),
+                        settings.eval_process.local_reports_path,
+                        settings.eval_process.id,
+                        uid,
+                        reviewee_evaluations)
                 })
-            # TODO: we need more info here to know why a communication was not sent
             except Exception as e:
-                print(e)
-                not_created.update({
-                    uid: {
-                        'employee': uid,
-                        'managers': employee_managers
-                    }
+                report.update({
+                    'pdf_error': repr(e)
                 })
 
-        return created, not_created
+        report.update({
+            'elapsed_seconds': round(time.perf_counter() - start, 3)
+        })
+
+        return report
+
+class RenderEvalReportsUseCase(
+        StorageFactory, FormsPlatformFactory,
+        ReviewerResponseFilter, ReportRendererFactory,
+        LocalReportWriter, ConcurrentMapper):
+
+    @traced('RenderEvalReportsUseCase.render')
+    def render(
+            self,
+            area, managers,
+            employee_uids,
+            report_formats,
+            force_refresh: bool = False):
+        '''
+        Renders the eval reports of the reviewees to local files in every
+        format of report_formats, without touching any Drive document.
+        Reviewees are rendered in parallel, a failing one is returned in
+        not_rendered with the exception that made it fail.
+        '''
+        settings = super().read_settings()
+        renderers = []
+        for report_format in report_formats:
+            renderers.append(super().get_report_renderer(report_format, settings))
+
+        storage = super().get_storage(force_refresh)
+        forms_platform = super().get_forms_platform(force_refresh)
+
+        reviewee_evaluations = forms_platform.get_evaluations()
+        employees = storage.get_employees()
+
+        reviewee_evaluations = super().filter_reviewees(
+            reviewee_evaluations,
+            employees,
+            area,
+            managers,
+            employee_uids)
+
+        def render_eval_report(item):
+            uid, evaluations = item
+            return self.__render_eval_report(renderers, settings, uid, evaluations)
+
+        reports = super().concurrent_map(
+            render_eval_report,
+            reviewee_evaluations.items(),
+            settings.eval_process.local_reports_max_workers)
+
+        rendered = {}
+        not_rendered = {}
+        for report in reports:
+            if 'error' in report:
+                not_rendered.update({report['employee']: report})
+            else:
+                rendered.update({report['employee']: report})
+
+        return rendered, not_rendered
+
+    @traced('RenderEvalReportsUseCase.render_eval_report')
+    def __render_eval_report(self, renderers, settings, uid, reviewee_evaluations):
+        report = {
+            'employee': uid,
+        }
+
+        start = time.perf_counter()
+        try:
+            files = []
+            for renderer in renderers:
+                files.append(super().write_report(
+                    renderer,
+                    settings.eval_process.local_reports_path,
+                    settings.eval_process.id,
+                    uid,
+                    reviewee_evaluations))
+
+            report.update({
+                'files': files
+            })
+        except Exception as e:
+            report.update({
+                'error': repr(e)
+            })
+
+        report.update({
+            'elapsed_seconds': round(time.perf_counter() - start, 3)
+        })
+
+        return report
 
 class GetPeersAssignmentUseCase(StorageFactory):
 
-    def get_peers(self):
-        storage = super().get_storage()
+    @traced('GetPeersAssignmentUseCase.get_peers')
+    def get_peers(self, force_refresh: bool = False):
+        storage = super().get_storage(force_refresh)
         return storage.get_peers_assignment()
 
 class UpdatePeersAssignmentUseCase(StorageFactory, FormsPlatformFactory):
 
+    @traced('UpdatePeersAssignmentUseCase.update')
     def update(self):
         storage = super().get_storage()
         forms_platform = super().get_forms_platform()
@@ -0,0 +1,98 @@
+'''
+Micro-benchmark of the config.yaml accesses done by one GET /reviewers request.
+
+Replays the same accesses twice: with the parsed-config cache, and with
+UncachedConfigReader, which parses config.yaml on every read like ConfigReader
+did before the cache. Both parse counts are counted, not derived.
+
+Usage:
+    PYTHONPATH=. python scripts/config_benchmark.py [config file] [managers]
+'''
+import sys
+import time
+
+import yaml
+
+from evalytics.config import Config, ConfigReader
+
+
+class UncachedConfigReader(ConfigReader):
+    '''
+    Parses config.yaml on every read, the code path before the cache
+    '''
+
+    parses = 0
+
+    def read(self):
+        with open(self.CONFIG_FILE, 'r') as stream:
+            data_loaded = yaml.safe_load(stream)
+        UncachedConfigReader.parses += 1
+
+        return data_loaded
+
+
+class UncachedConfig(Config, UncachedConfigReader):
+    'Config with the read of UncachedConfigReader'
+
+
+def reviewers_request(config: Config, managers: int):
+    # StorageFactory.get_storage
+    config.read_storage_provider()
+
+    # GoogleStorage.get_employees
+    config.read_google_folder()
+    config.read_google_orgchart()
+    config.read_google_orgchart_range()
+    config.read_company_domain()
+
+    # GoogleStorage.get_peers_assignment
+    config.read_assignments_peers_range()
+    config.read_google_folder()
+    config.read_assignments_folder()
+    config.read_assignments_peers_file()
+
+    # GoogleStorage.get_forms
+    config.read_google_folder()
+    config.read_google_form_map()
+    config.read_google_form_map_range()
+
+    # EmployeeAdapter.build_reviewers, once per top-level manager
+    for _ in range(managers):
+        config.read_company_domain()
+
+
+def main():
+    config_file = sys.argv[1] if len(sys.argv) > 1 else 'config.example.yaml'
+    managers = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    requests = 100
+
+    config = Config()
+    config.CONFIG_FILE = config_file
+
+    stats_before = config.get_read_stats()
+    start = time.perf_counter()
+    for _ in range(requests):
+        reviewers_request(config, managers)
+    cached_elapsed = time.perf_counter() - start
+    stats_after = config.get_read_stats()
+
+    parses = stats_after['parses'] - stats_before['parses']
+    hits = stats_after['hits'] - stats_before['hits']
+
+    uncached_config = UncachedConfig()
+    uncached_config.CONFIG_FILE = config_file
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        reviewers_request(uncached_config, managers)
+    uncached_elapsed = time.perf_counter() - start
+
+    print('requests: %d' % requests)
+    print('config reads per request: %.1f' % ((parses + hits) / requests))
+    print('parses per request before: %.1f' % (UncachedConfigReader.parses / requests))
+    print('parses per request after: %.2f' % (parses / requests))
+    print('config time per request before: %.3f ms' % (uncached_elapsed / requests * 1000))
+    print('config time per request after: %.3f ms' % (cached_elapsed / requests * 1000))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+'''
+Breaks a traced request down by span name: how many spans of every name
+it has and the time spent in them, e.g. how many sheets a GET /status
+read and how long reading them took.
+
+Spans of the same name can overlap when they run concurrently, so their
+total may be longer than the request itself.
+
+Usage:
+    PYTHONPATH=. python scripts/trace_summary.py [spans file] [trace id]
+
+Without a trace id the last trace of the file is summarized.
+'''
+import sys
+
+from evalytics.tracing import read_traces, summarize_trace
+
+
+def main():
+    spans_file = sys.argv[1] if len(sys.argv) > 1 else 'traces/spans.json'
+    traces = read_traces(spans_file)
+    if len(traces) == 0:
+        print('No traces in %s' % spans_file)
+        return
+
+    trace_id = sys.argv[2] if len(sys.argv) > 2 else list(traces.keys())[-1]
+    spans = traces.get(trace_id)
+    if spans is None:
+        print('Trace not found: %s' % trace_id)
+        return
+
+    print('trace: %s' % trace_id)
+    for name, count, total_ms in summarize_trace(spans):
+        print('%10.1f ms  %5d x  %s' % (total_ms, count, name))
+
+if __name__ == '__main__':
+    main()
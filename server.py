@@ -1,19 +1,35 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import tornado.httpserver
 import tornado.ioloop
+import tornado.netutil
+import tornado.process
 from tornado.web import Application
 
 from tornado.options import define, options
 
+from evalytics.cache import ResponseCache, SharedResponseCache, RecordsIndex
+from evalytics.config import Config
+from evalytics.jobs import JobStore, JobQueue
+from evalytics.tracing import Tracing, JsonFileSpanExporter
+from evalytics.retry import GoogleApiRetry, RetryPolicy
+from evalytics.rate_limits import GoogleApiRateLimiter
+from evalytics.google_api import DrivePathIndexService
 from evalytics.handlers import \
     EmployeesHandler, \
     SurveysHandler, \
     ReviewersHandler, \
     CommunicationHandler, \
     ResponseStatusHandler, EvalReportsHandler, \
-    PeersAssignmentHandler
+    EvalReportsRenderHandler, PeersAssignmentHandler, \
+    JobsHandler, MetricsHandler, JsonGZipContentEncoding
 
 define(
     "port", default=8080,
     help="Run tornado server on the given port", type=int)
+define(
+    "processes", default=1,
+    help="Number of forked server processes, 0 forks one per CPU", type=int)
 
 class GetPathAndHandler:
 
@@ -25,17 +41,82 @@ class GetPathAndHandler:
             ReviewersHandler,
             CommunicationHandler,
             ResponseStatusHandler,
-            EvalReportsHandler
+            EvalReportsHandler,
+            EvalReportsRenderHandler,
+            JobsHandler,
+            MetricsHandler,
         ]
 
         return [(h.path, h) for h in handlers]
 
+def build_application(settings, multi_process: bool):
+    '''
+    Builds the application of a server process. Thread pools and caches are
+    created here, after forking, so processes don't share them by accident.
+    '''
+    path_and_handler = GetPathAndHandler().get()
+    # Before resuming jobs, which may already call Google APIs
+    GoogleApiRetry.configure_retry(RetryPolicy(
+        settings.google_drive.retry_max_attempts,
+        settings.google_drive.retry_initial_delay_seconds,
+        settings.google_drive.retry_max_delay_seconds,
+        settings.google_drive.retry_idempotent_methods))
+    GoogleApiRateLimiter.configure_rate_limits(settings.google_drive.rate_limits)
+    DrivePathIndexService.configure_path_index(settings.google_drive.path_index_ttl_seconds)
+    if settings.server.tracing_enabled:
+        Tracing.configure(JsonFileSpanExporter(settings.server.tracing_path))
+    # Use cases block on Google APIs, they run in this pool to keep the IOLoop free
+    executor = ThreadPoolExecutor(
+        max_workers=settings.server.max_workers,
+        thread_name_prefix='usecase')
+    # Background jobs get their own pool so they can't starve the requests
+    job_queue = JobQueue(
+        JobStore(settings.server.jobs_path),
+        ThreadPoolExecutor(
+            max_workers=settings.server.jobs_max_workers,
+            thread_name_prefix='job'))
+    # Jobs of the last run, and later those of crashed processes, are
+    # resumed by whichever process claims them first
+    job_queue.resume()
+    tornado.ioloop.PeriodicCallback(
+        job_queue.resume,
+        settings.server.jobs_orphans_check_seconds * 1000).start()
+
+    response_cache = None
+    if settings.server.response_cache_enabled and multi_process:
+        response_cache = SharedResponseCache(
+            settings.server.response_cache_path,
+            settings.server.response_cache_ttl_seconds)
+    elif settings.server.response_cache_enabled:
+        response_cache = ResponseCache(settings.server.response_cache_ttl_seconds)
+
+    return Application(
+        path_and_handler,
+        transforms=[JsonGZipContentEncoding],
+        executor=executor,
+        job_queue=job_queue,
+        response_cache=response_cache,
+        records_index=RecordsIndex(settings.server.pagination_index_ttl_seconds))
+
 def main():
     tornado.options.parse_command_line()
-    path_and_handler = GetPathAndHandler().get()
-    app = Application(path_and_handler)
-    http_server = tornado.httpserver.HTTPServer(app)
-    http_server.listen(options.port)
+    # Fail at startup, not in the middle of a request, when config.yaml is incomplete
+    settings = Config().read_settings()
+    # No process of the last run is left to run its unfinished jobs
+    JobStore(settings.server.jobs_path).release_unfinished()
+
+    if options.processes == 1:
+        app = build_application(settings, multi_process=False)
+        http_server = tornado.httpserver.HTTPServer(app)
+        http_server.listen(options.port)
+    else:
+        sockets = tornado.netutil.bind_sockets(options.port)
+        tornado.process.fork_processes(options.processes)
+
+        app = build_application(settings, multi_process=True)
+        http_server = tornado.httpserver.HTTPServer(app)
+        http_server.add_sockets(sockets)
+
     tornado.ioloop.IOLoop.current().start()
 
 if __name__ == "__main__":
@@ -2,7 +2,10 @@
 # pylint: disable=bad-super-call
 # No need to shout here
 
-from googledrive.api import GoogleService
+import re
+import threading
+
+from googleapiclient.errors import HttpError
 from googledrive.api import SheetsService
 from googledrive.exceptions import GoogleApiClientHttpErrorException
 from googledrive.exceptions import MissingGoogleDriveFolderException
@@ -16,7 +19,8 @@ from evalytics.communications_channels import GmailChannel, SlackClient
 from evalytics.storages import GoogleStorage, StorageFactory
 from evalytics.forms import FormsPlatformFactory, GoogleForms
 from evalytics.google_api import GoogleAPI
-from evalytics.google_api import GmailService
+from evalytics.google_api import GmailService, SharedGoogleService
+from evalytics.google_api import GoogleServiceBuilder
 from evalytics.google_api import DocsService
 from evalytics.usecases import GetReviewersUseCase
 from evalytics.adapters import EmployeeAdapter, ReviewerAdapter
@@ -37,6 +41,9 @@ class MockEmployeeAdapter(EmployeeAdapter):
     def build_reviewers(self, employees, peers_assignment, forms):
         return employees
 
+    def iter_reviewers(self, employees, peers_assignment, forms):
+        return iter(employees.values())
+
     def build_message(self, message, reviewer: Reviewer):
         return ""
 
@@ -54,7 +61,10 @@ class MockReviewerAdapter(ReviewerAdapter):
     def get_status_from_responses(self, reviewers, responses):
         return [], [], []
 
-class MockGoogleService(GoogleService):
+    def iter_pending_reviewers(self, reviewers, completed):
+        return iter([])
+
+class MockGoogleService(SharedGoogleService):
 
     __services_by_id = {}
 
@@ -80,6 +90,24 @@ class MockGoogleService(GoogleService):
 
         self.__services_by_id[service_id][service_version] = service
 
+class MockGoogleServiceBuilder(GoogleServiceBuilder):
+
+    def __init__(self):
+        self.build_calls = []
+
+    def get_credentials(self, credentials_file, scopes):
+        return 'credentials::{}'.format(credentials_file)
+
+    def build_service(self, service_id, service_version, http, request_builder):
+        self.build_calls.append((service_id, service_version))
+        return {
+            'service_id': service_id,
+            'service_version': service_version,
+        }
+
+    def get_build_calls(self):
+        return self.build_calls
+
 class RawGmailServiceMock:
 
     def users(self):
@@ -94,6 +122,169 @@ class RawGmailServiceMock:
                 return Messages()
         return Users()
 
+class RawSheetsServiceMock:
+
+    def __init__(self, values_by_range):
+        self.values_by_range = values_by_range
+        self.batches_executed = 0
+
+    def spreadsheets(self):
+        values_by_range = self.values_by_range
+
+        class Execute:
+            def __init__(self, response):
+                self.response = response
+
+            def execute(self):
+                return self.response
+
+        class Values:
+            def get(self, spreadsheetId, range):
+                return Execute({
+                    'range': range,
+                    'values': values_by_range.get((spreadsheetId, range), [])
+                })
+
+            def batchGet(self, spreadsheetId, ranges):
+                return Execute({
+                    'valueRanges': [
+                        {
+                            'range': r,
+                            'values': values_by_range.get((spreadsheetId, r), [])
+                        }
+                        for r in ranges
+                    ]
+                })
+
+        class Spreadsheets:
+            def values(self):
+                return Values()
+
+        return Spreadsheets()
+
+    def new_batch_http_request(self):
+        raw_service = self
+
+        class Batch:
+            def __init__(self):
+                self.requests = []
+
+            def add(self, request, callback):
+                self.requests.append((request, callback))
+
+            def execute(self):
+                raw_service.batches_executed += 1
+                for request_id, (request, callback) in enumerate(self.requests):
+                    callback(str(request_id), request.execute(), None)
+
+        return Batch()
+
+    def get_batches_executed(self):
+        return self.batches_executed
+
+class RawDriveServiceMock:
+
+    def __init__(self, modified_times, permissions=None):
+        self.modified_times = modified_times
+        self.permissions_by_file = permissions if permissions is not None else {}
+        self.errors_by_file = {}
+        self.batches_executed = 0
+        self.batch_sizes = []
+
+    def add_errors_for_file(self, file_id, errors):
+        self.errors_by_file.setdefault(file_id, []).extend(errors)
+
+    def files(self):
+        modified_times = self.modified_times
+        errors_by_file = self.errors_by_file
+
+        class Execute:
+            def __init__(self, file_id):
+                self.file_id = file_id
+
+            def execute(self):
+                errors = errors_by_file.get(self.file_id, [])
+                if len(errors) > 0:
+                    raise errors.pop(0)
+                return {
+                    'id': self.file_id,
+                    'modifiedTime': modified_times.get(self.file_id)
+                }
+
+        class Files:
+            def get(self, fileId, fields):
+                return Execute(fileId)
+
+        return Files()
+
+    def permissions(self):
+        permissions_by_file = self.permissions_by_file
+        errors_by_file = self.errors_by_file
+
+        class Execute:
+            def __init__(self, response):
+                self.response = response
+
+            def execute(self):
+                return self.response
+
+        class ListExecute:
+            def __init__(self, file_id, page_size, page_token):
+                self.file_id = file_id
+                self.page_size = page_size
+                self.start = int(page_token or 0)
+
+            def execute(self):
+                errors = errors_by_file.get(self.file_id, [])
+                if len(errors) > 0:
+                    raise errors.pop(0)
+
+                permissions = permissions_by_file.get(self.file_id, [])
+                end = self.start + self.page_size
+                response = {'permissions': permissions[self.start:end]}
+                if end < len(permissions):
+                    response.update({'nextPageToken': str(end)})
+                return response
+
+        class Permissions:
+            def list(self, fileId, pageSize, fields, pageToken=None):
+                return ListExecute(fileId, pageSize, pageToken)
+
+            def create(self, fileId, body):
+                permissions_by_file.setdefault(fileId, []).append(body)
+                return Execute(body)
+
+        return Permissions()
+
+    def new_batch_http_request(self):
+        raw_service = self
+
+        class Batch:
+            def __init__(self):
+                self.requests = []
+
+            def add(self, request, callback):
+                self.requests.append((request, callback))
+
+            def execute(self):
+                raw_service.batches_executed += 1
+                raw_service.batch_sizes.append(len(self.requests))
+                for request_id, (request, callback) in enumerate(self.requests):
+                    try:
+                        response = request.execute()
+                    except HttpError as e:
+                        callback(str(request_id), None, e)
+                        continue
+                    callback(str(request_id), response, None)
+
+        return Batch()
+
+    def get_batches_executed(self):
+        return self.batches_executed
+
+    def get_batch_sizes(self):
+        return self.batch_sizes
+
 class RawDocsServiceMock:
 
     def documents(self):
@@ -119,9 +310,16 @@ class MockGoogleDrive:
     gdrive_list_raise_exceptions = []
     gdrive_get_file_response = {}
     gdrive_get_file_raise_exceptions = []
+    files_modified_time = {}
+    files_permissions = {}
+    failing_permissions = []
+    failing_files_permissions = []
 
     def __init__(self):
         self.calls = {}
+        self.files_permissions = {}
+        self.failing_permissions = []
+        self.failing_files_permissions = []
         self.response_files = []
         self.pages_requested = 0
         self.gdrive_list_response = {}
@@ -186,6 +384,50 @@ class MockGoogleDrive:
         )
         return
 
+    def get_files_modified_time(self, file_ids):
+        self.__update_calls(
+            'get_files_modified_time',
+            params={
+                'file_ids': file_ids
+            }
+        )
+        return {
+            file_id: self.files_modified_time.get(file_id)
+            for file_id in file_ids
+        }
+
+    def get_files_permissions(self, file_ids):
+        file_ids = list(file_ids)
+        self.__update_calls(
+            'get_files_permissions',
+            params={
+                'file_ids': file_ids
+            }
+        )
+        return {
+            file_id: self.files_permissions.get(file_id, {})
+            for file_id in file_ids
+            if file_id not in self.failing_files_permissions
+        }, {
+            file_id: Exception('Permissions not listed')
+            for file_id in file_ids
+            if file_id in self.failing_files_permissions
+        }
+
+    def batch_create_permissions(self, permissions, role: str):
+        self.__update_calls(
+            'batch_create_permissions',
+            params={
+                'permissions': permissions,
+                'role': role
+            }
+        )
+        return {
+            permission: Exception('Permission not granted')
+            for permission in permissions
+            if permission in self.failing_permissions
+        }
+
     def googledrive_ls(self, path: str):
         self.__update_calls(
             'gdrive_list',
@@ -219,6 +461,24 @@ class MockGoogleDrive:
     def get_calls(self):
         return self.calls
 
+    def set_file_modified_time(self, file_id, modified_time):
+        self.files_modified_time = dict(self.files_modified_time)
+        self.files_modified_time.update({
+            file_id: modified_time
+        })
+
+    def set_file_permissions(self, file_id, permissions):
+        self.files_permissions = dict(self.files_permissions)
+        self.files_permissions.update({
+            file_id: permissions
+        })
+
+    def set_create_permission_fails(self, file_id, email_address):
+        self.failing_permissions = self.failing_permissions + [(file_id, email_address)]
+
+    def set_list_permissions_fails(self, file_id):
+        self.failing_files_permissions = self.failing_files_permissions + [file_id]
+
     def set_pages_requested(self, pages_requested):
         self.pages_requested = pages_requested
 
@@ -288,6 +548,18 @@ class MockSheetsService(SheetsService):
         }
 
     def get_file_values(self, spreadsheet_id, rows_range):
+        self.__raise_exception_if_requested(spreadsheet_id)
+
+        self.__update_calls(
+            'get_file_values',
+            params={
+                'spreadsheet_id': spreadsheet_id,
+                'rows_range': rows_range,
+            }
+        )
+        return self.__get_file_values_response.get(spreadsheet_id, [])
+
+    def __raise_exception_if_requested(self, spreadsheet_id):
         if spreadsheet_id in self.__get_file_values_will_raise_exception:
             error = GoogleApiClientHttpError(
                 code=429,
@@ -297,14 +569,82 @@ class MockSheetsService(SheetsService):
             )
             raise GoogleApiClientHttpErrorException(error)
 
+    def batch_get_file_values(self, spreadsheet_ranges):
         self.__update_calls(
-            'get_file_values',
+            'batch_get_file_values',
+            params={
+                'spreadsheet_ranges': spreadsheet_ranges,
+            }
+        )
+
+        values = {}
+        for spreadsheet_id, rows_range in spreadsheet_ranges:
+            values.update({
+                (spreadsheet_id, rows_range): self.__get_rows_in_range(spreadsheet_id, rows_range)
+            })
+        return values
+
+    def concurrent_get_file_values(self, spreadsheet_ranges, max_workers, requests_per_second=None):
+        self.__update_calls(
+            'concurrent_get_file_values',
+            params={
+                'spreadsheet_ranges': spreadsheet_ranges,
+                'max_workers': max_workers,
+                'requests_per_second': requests_per_second,
+            }
+        )
+
+        values = {}
+        for spreadsheet_id, rows_range in spreadsheet_ranges:
+            values.update({
+                (spreadsheet_id, rows_range): self.__get_rows_in_range(spreadsheet_id, rows_range)
+            })
+        return values
+
+    def read_file_values(self, spreadsheet_id, rows_range):
+        self.__update_calls(
+            'read_file_values',
             params={
                 'spreadsheet_id': spreadsheet_id,
                 'rows_range': rows_range,
             }
         )
-        return self.__get_file_values_response.get(spreadsheet_id, [])
+        return self.__get_rows_in_range(spreadsheet_id, rows_range)
+
+    def iter_file_values_pages(self, spreadsheet_id, first_row, last_column, page_size):
+        empty_rows = 0
+        page_first_row = first_row
+        while True:
+            rows_range = 'A{}:{}{}'.format(
+                page_first_row, last_column, page_first_row + page_size - 1)
+            self.__update_calls(
+                'iter_file_values_pages',
+                params={
+                    'spreadsheet_id': spreadsheet_id,
+                    'rows_range': rows_range,
+                }
+            )
+            rows = self.__get_rows_in_range(spreadsheet_id, rows_range)
+
+            if len(rows) == 0:
+                return
+
+            yield [[]] * empty_rows + rows
+
+            empty_rows = page_size - len(rows)
+            page_first_row += page_size
+
+    def __get_rows_in_range(self, spreadsheet_id, rows_range):
+        self.__raise_exception_if_requested(spreadsheet_id)
+
+        rows = self.__get_file_values_response.get(spreadsheet_id, [])
+        row_numbers = [int(number) for number in re.findall(r'\d+', rows_range)]
+        rows = rows[row_numbers[0] - 1:row_numbers[-1]]
+
+        # Sheets API omits the trailing empty rows of a range
+        while len(rows) > 0 and len(rows[-1]) == 0:
+            rows = rows[:-1]
+        return rows
 
     def update_file_values(self, spreadsheet_id, rows_range, value_input_option, values):
         self.__update_calls(
@@ -547,7 +887,8 @@ class MockGoogleAPI(GoogleAPI,
                                        eval_process_id,
                                        document_id,
                                        reviewee,
-                                       reviewee_evaluations):
+                                       reviewee_evaluations,
+                                       template_id=None):
        return
 
     def empty_document(self, document_id):
@@ -645,6 +986,18 @@ class MockConfig(Config, MockConfigReader):
 
     company_number_of_employees = 1000
     is_add_comenter_to_evals_reports_enabled = False
+    storage_provider = ""
+    communications_provider = ""
+    forms_platform_provider = ""
+    responses_reader_mode = "batch"
+    responses_reader_page_size = 500
+    snapshot_cache_enabled = False
+    snapshot_cache_path = None
+    reports_generation_mode = "serial"
+    is_send_eval_reports_as_pdf_enabled = False
+    local_reports_path = "reports"
+    incremental_eval_reports_enabled = False
+    incremental_eval_reports_path = None
 
     def __init__(self):
         super().__init__()
@@ -666,6 +1019,30 @@ class MockConfig(Config, MockConfigReader):
     def read_is_add_comenter_to_eval_reports_enabled(self):
         return self.is_add_comenter_to_evals_reports_enabled
 
+    def read_is_send_eval_reports_as_pdf_enabled(self):
+        return self.is_send_eval_reports_as_pdf_enabled
+
+    def read_local_reports_path(self):
+        return self.local_reports_path
+
+    def read_local_reports_max_workers(self):
+        return 4
+
+    def read_local_reports_pdf_font(self):
+        return None
+
+    def read_local_reports_pdf_bold_font(self):
+        return None
+
+    def read_reports_generation_mode(self):
+        return self.reports_generation_mode
+
+    def read_reports_generation_max_workers(self):
+        return 4
+
+    def read_reports_generation_reports_per_second(self):
+        return None
+
     def read_storage_provider(self):
         return self.storage_provider
 
@@ -714,6 +1091,39 @@ class MockConfig(Config, MockConfigReader):
     def read_google_responses_files_range(self):
         return "A1:A1"
 
+    def read_google_responses_reader_mode(self):
+        return self.responses_reader_mode
+
+    def read_google_responses_reader_max_workers(self):
+        return 4
+
+    def read_google_responses_reader_requests_per_second(self):
+        return None
+
+    def read_google_responses_reader_page_size(self):
+        return self.responses_reader_page_size
+
+    def read_google_snapshot_cache_enabled(self):
+        return self.snapshot_cache_enabled
+
+    def read_google_snapshot_cache_path(self):
+        return self.snapshot_cache_path
+
+    def read_google_snapshot_cache_ttl_seconds(self):
+        return 60
+
+    def read_google_snapshot_cache_max_size_mb(self):
+        return 1
+
+    def read_google_path_index_ttl_seconds(self):
+        return 60
+
+    def read_google_incremental_eval_reports_enabled(self):
+        return self.incremental_eval_reports_enabled
+
+    def read_google_incremental_eval_reports_path(self):
+        return self.incremental_eval_reports_path
+
     def read_company_domain(self):
         return "company.com"
 
@@ -783,21 +1193,51 @@ class MockConfig(Config, MockConfigReader):
     def set_slack_users_map(self, users_map):
         self.slack_users_map = users_map
 
+    def set_responses_reader_mode(self, mode):
+        self.responses_reader_mode = mode
+
+    def set_responses_reader_page_size(self, page_size):
+        self.responses_reader_page_size = page_size
+
+    def set_reports_generation_mode(self, mode):
+        self.reports_generation_mode = mode
+
+    def set_send_eval_reports_as_pdf(self, is_enabled: bool, local_reports_path=None):
+        self.is_send_eval_reports_as_pdf_enabled = is_enabled
+        if local_reports_path is not None:
+            self.local_reports_path = local_reports_path
+
+    def set_local_reports_path(self, path):
+        self.local_reports_path = path
+
+    def set_incremental_eval_reports_config(self, enabled, path=None):
+        self.incremental_eval_reports_enabled = enabled
+        self.incremental_eval_reports_path = path
+
+    def set_snapshot_cache_config(self, enabled, path=None):
+        self.snapshot_cache_enabled = enabled
+        self.snapshot_cache_path = path
+
 class MockStorageFactory(StorageFactory, MockConfig):
 
     storage_impl = None
+    force_refresh = None
 
-    def get_storage(self):
+    def get_storage(self, force_refresh=False):
+        self.force_refresh = force_refresh
         return self.storage_impl
 
     def set_storage(self, impl):
         self.storage_impl = impl
 
+    def get_force_refresh(self):
+        return self.force_refresh
+
 class MockFormsPlatformFactory(FormsPlatformFactory, MockConfig):
 
     forms_platform_impl = None
 
-    def get_forms_platform(self):
+    def get_forms_platform(self, force_refresh=False):
         return self.forms_platform_impl
 
     def set_forms_platform(self, impl):
@@ -815,6 +1255,9 @@ class MockGoogleForms(GoogleForms):
     def get_responses(self):
         return {}
 
+    def iter_responses(self):
+        return iter([])
+
     def get_evaluations(self):
         return self.evaluations_response
 
@@ -828,6 +1271,7 @@ class MockGoogleStorage(GoogleStorage):
 
     def __init__(self):
         self.evaluations_raise_exception_by_reviewee = []
+        self.up_to_date_reviewees = []
 
     def get_employees(self):
         return {
@@ -841,10 +1285,15 @@ class MockGoogleStorage(GoogleStorage):
     def generate_eval_reports(self,
                               reviewee,
                               reviewee_evaluations,
-                              employee_managers):
+                              employee_managers,
+                              settings=None,
+                              force=False):
         if reviewee in self.evaluations_raise_exception_by_reviewee:
             raise Exception
 
+        if reviewee in self.up_to_date_reviewees and not force:
+            return None
+
         return []
 
     def get_peers_assignment(self):
@@ -853,6 +1302,16 @@ class MockGoogleStorage(GoogleStorage):
     def get_evaluations_will_raise_exception_for_reviewee(self, reviewee):
         self.evaluations_raise_exception_by_reviewee.append(reviewee)
 
+    def set_eval_report_up_to_date(self, reviewee):
+        self.up_to_date_reviewees.append(reviewee)
+
+    def grant_eval_reports_permissions(self):
+        return {
+            'issued': 0,
+            'skipped': 0,
+            'failed': {},
+        }
+
     def write_peers_assignment(self, peers_assignment):
         return
 
@@ -911,7 +1370,7 @@ class GetReviewersUseCaseMock(
     def set_get_reviewers(self, response):
         self.response = response
 
-    def get_reviewers(self):
+    def get_reviewers(self, force_refresh=False):
         return self.response
 
 #
@@ -961,8 +1420,11 @@ class MockEvalyticsRequests(EvalyticsRequests):
     def set_reviewers_response(self, response):
         self.reviewers_response = response
 
-    def reviewers(self):
+    def reviewers(self, params=None):
         self.update_calls('reviewers')
+        if isinstance(self.reviewers_response, list):
+            # One response per page
+            return True, self.reviewers_response[self.calls['reviewers'] - 1]
         return True, self.reviewers_response
 
     def set_status_response(self, response):
@@ -1053,3 +1515,20 @@ class MockEvalyticsClient(EvalyticsClient, MockEvalyticsRequests):
 
     def get_dry_run(self):
         return self.dry_run
+
+class MockJobProgress:
+
+    def __init__(self):
+        self.items = []
+        self.results = {}
+        self.failed = []
+        self.__lock = threading.Lock()
+
+    def set_items(self, items):
+        self.items = list(items)
+
+    def add_result(self, item, result, failed: bool = False):
+        with self.__lock:
+            self.results.update({item: result})
+            if failed:
+                self.failed.append(item)
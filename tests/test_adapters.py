@@ -143,6 +143,19 @@ class TestEmployeeAdapter(TestCase):
         self.assertEqual(2, len(reviewers['sw1'].evals))
         self.assertEqual(2, len(reviewers['sw2'].evals))
 
+    def test_iter_reviewers_yields_managers_out_of_employees_last(self):
+        # when:
+        reviewers = self.sut.iter_reviewers(
+            self.employees_with_blacklisted_reviewers,
+            self.no_peers,
+            self.forms)
+
+        # then:
+        self.assertEqual('cto', next(reviewers).uid)
+        rest = list(reviewers)
+        self.assertEqual(['cto2', 'tl1', 'sw1', 'sw2', 'ceo'], [r.uid for r in rest])
+        self.assertEqual(2, len(rest[-1].evals))
+
     def test_build_reviewers_correct_evals(self):
         # when:
         reviewers = self.sut.build_reviewers(self.employees, self.no_peers, self.forms)
@@ -393,6 +406,68 @@ class TestReviewerAdapter(TestCase):
         self.assertEqual(3, len(pending['tl1'].evals))
 
 
+    def test_get_status_from_responses_when_responses_stream(self):
+        # given:
+        self.sut.set_employees_by_manager(self.employees_by_manager)
+        responses = iter([
+            ReviewerResponse(
+                eval_kind=EvalKind.MANAGER_PEER,
+                reviewee='tl1',
+                reviewer='cto',
+                filename='',
+                line_number=0,
+                eval_response=[]),
+            ReviewerResponse(
+                eval_kind=EvalKind.MANAGER_PEER,
+                reviewee='sw1',
+                reviewer='tl1',
+                filename='',
+                line_number=0,
+                eval_response=[]),
+            ReviewerResponse(
+                eval_kind=EvalKind.MANAGER_PEER,
+                reviewee='tl2',
+                reviewer='cto',
+                filename='',
+                line_number=0,
+                eval_response=[]),
+            ReviewerResponse(
+                eval_kind=EvalKind.MANAGER_PEER,
+                reviewee='cto',
+                reviewer='not_a_reviewer',
+                filename='',
+                line_number=0,
+                eval_response=[]),
+        ])
+
+        # when:
+        completed, pending, inconsistent = self.sut.get_status_from_responses(
+            self.reviewers,
+            responses)
+
+        # then:
+        self.assertEqual(0, len(inconsistent))
+        self.assertEqual(5, len(pending))
+        self.assertEqual(['cto', 'tl1'], list(completed.keys()))
+        self.assertEqual(['tl1', 'tl2'], list(completed['cto'].keys()))
+        self.assertIn('sw1', completed['tl1'])
+
+    def test_iter_pending_reviewers(self):
+        # given:
+        completed = {
+            'cto': {'tl1': {}, 'tl2': {}},
+        }
+
+        # when:
+        pending = self.sut.iter_pending_reviewers(self.reviewers, completed)
+
+        # then:
+        pending = {reviewer.uid: reviewer for reviewer in pending}
+        self.assertNotIn('cto', pending)
+        self.assertEqual(5, len(pending))
+        self.assertEqual(
+            len(self.reviewers['tl1'].evals), len(pending['tl1'].evals))
+
     def test_get_status_from_responses_when_inconsistent_reporter_responses(self):
         # given:
         self.sut.set_employees_by_manager(self.employees_by_manager)
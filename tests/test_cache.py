@@ -0,0 +1,272 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from evalytics.cache import SnapshotCache, SnapshotCacheFactory
+from evalytics.cache import EvalReportDigests, EvalReportDigestsFactory
+from evalytics.cache import ResponseCache, SharedResponseCache, RecordsIndex
+
+from tests.common.mocks import MockConfig
+
+class SnapshotCacheFactorySut(SnapshotCacheFactory, MockConfig):
+    'Inject a mock into the SnapshotCacheFactory dependency'
+
+class EvalReportDigestsFactorySut(EvalReportDigestsFactory, MockConfig):
+    'Inject a mock into the EvalReportDigestsFactory dependency'
+
+class TestSnapshotCache(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'cache', 'snapshots.sqlite')
+        self.sut = SnapshotCache(self.path, ttl_seconds=60, max_size_bytes=1024)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_when_snapshot_stored(self):
+        # given:
+        self.sut.put('id1', 'A1:B2', '2020-01-01T00:00:00.000Z', [['a', 'b']])
+
+        # when:
+        values = self.sut.get('id1', 'A1:B2', '2020-01-01T00:00:00.000Z')
+
+        # then:
+        self.assertEqual([['a', 'b']], values)
+        self.assertEqual({'hits': 1, 'misses': 0, 'evictions': 0}, self.sut.get_stats())
+
+    def test_get_when_file_modified(self):
+        # given:
+        self.sut.put('id1', 'A1:B2', '2020-01-01T00:00:00.000Z', [['a', 'b']])
+
+        # when:
+        values = self.sut.get('id1', 'A1:B2', '2020-01-02T00:00:00.000Z')
+
+        # then:
+        self.assertIsNone(values)
+        self.assertEqual(1, self.sut.get_stats()['misses'])
+
+    def test_get_when_snapshot_expired(self):
+        # given:
+        self.sut.ttl_seconds = 0
+        self.sut.put('id1', 'A1:B2', '2020-01-01T00:00:00.000Z', [['a', 'b']])
+
+        # when:
+        values = self.sut.get('id1', 'A1:B2', '2020-01-01T00:00:00.000Z')
+
+        # then:
+        self.assertIsNone(values)
+
+    def test_get_when_snapshot_stored_by_other_instance(self):
+        # given:
+        self.sut.put('id1', 'A1:B2', '2020-01-01T00:00:00.000Z', [['a', 'b']])
+        other_cache = SnapshotCache(self.path, ttl_seconds=60, max_size_bytes=1024)
+
+        # when:
+        values = other_cache.get('id1', 'A1:B2', '2020-01-01T00:00:00.000Z')
+
+        # then:
+        self.assertEqual([['a', 'b']], values)
+
+    def test_put_evicts_least_recently_used_snapshots(self):
+        # given:
+        big_values = [['x' * 400]]
+        self.sut.put('id1', 'A1:B2', 'time', big_values)
+        self.sut.put('id2', 'A1:B2', 'time', big_values)
+        self.sut.get('id1', 'A1:B2', 'time')
+
+        # when:
+        self.sut.put('id3', 'A1:B2', 'time', big_values)
+
+        # then:
+        self.assertEqual(big_values, self.sut.get('id1', 'A1:B2', 'time'))
+        self.assertIsNone(self.sut.get('id2', 'A1:B2', 'time'))
+        self.assertEqual(big_values, self.sut.get('id3', 'A1:B2', 'time'))
+        self.assertEqual(1, self.sut.get_stats()['evictions'])
+
+    def test_invalidate(self):
+        # given:
+        self.sut.put('id1', 'A1:B2', 'time', [['a']])
+        self.sut.put('id1', 'C1:D2', 'time', [['c']])
+        self.sut.put('id2', 'A1:B2', 'time', [['a']])
+
+        # when:
+        self.sut.invalidate('id1')
+
+        # then:
+        self.assertIsNone(self.sut.get('id1', 'A1:B2', 'time'))
+        self.assertIsNone(self.sut.get('id1', 'C1:D2', 'time'))
+        self.assertEqual([['a']], self.sut.get('id2', 'A1:B2', 'time'))
+
+class TestSnapshotCacheFactory(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'snapshots.sqlite')
+        self.sut = SnapshotCacheFactorySut()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_snapshot_cache_when_disabled(self):
+        self.assertIsNone(self.sut.get_snapshot_cache())
+
+    def test_get_snapshot_cache_is_shared(self):
+        # given:
+        self.sut.set_snapshot_cache_config(True, self.path)
+
+        # when:
+        snapshot_cache = self.sut.get_snapshot_cache()
+
+        # then:
+        self.assertIs(snapshot_cache, self.sut.get_snapshot_cache())
+        self.assertEqual(60, snapshot_cache.ttl_seconds)
+        self.assertEqual(1024 * 1024, snapshot_cache.max_size_bytes)
+
+class TestEvalReportDigests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'cache', 'eval_reports.sqlite')
+        self.sut = EvalReportDigests(self.path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_when_no_digest(self):
+        self.assertIsNone(self.sut.get('id1'))
+
+    def test_put_replaces_digest(self):
+        # given:
+        self.sut.put('id1', 'digest1')
+
+        # when:
+        self.sut.put('id1', 'digest2')
+
+        # then:
+        self.assertEqual('digest2', self.sut.get('id1'))
+
+    def test_invalidate(self):
+        # given:
+        self.sut.put('id1', 'digest1')
+        self.sut.put('id2', 'digest2')
+
+        # when:
+        self.sut.invalidate('id1')
+
+        # then:
+        self.assertIsNone(self.sut.get('id1'))
+        self.assertEqual('digest2', self.sut.get('id2'))
+
+        # when:
+        self.sut.invalidate()
+
+        # then:
+        self.assertIsNone(self.sut.get('id2'))
+
+class TestEvalReportDigestsFactory(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'eval_reports.sqlite')
+        self.sut = EvalReportDigestsFactorySut()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_eval_report_digests_when_disabled(self):
+        self.assertIsNone(self.sut.get_eval_report_digests())
+
+    def test_get_eval_report_digests_is_shared(self):
+        # given:
+        self.sut.set_incremental_eval_reports_config(True, self.path)
+
+        # when:
+        eval_report_digests = self.sut.get_eval_report_digests()
+
+        # then:
+        self.assertIs(eval_report_digests, self.sut.get_eval_report_digests())
+
+class TestResponseCache(TestCase):
+
+    def test_get_when_response_stored(self):
+        sut = ResponseCache(ttl_seconds=60)
+
+        etag = sut.put('/reviewers?', b'{"success": true}')
+
+        self.assertEqual((b'{"success": true}', etag), sut.get('/reviewers?'))
+        self.assertEqual(etag, sut.put('/status?', b'{"success": true}'))
+        self.assertEqual({'hits': 1, 'misses': 0, 'invalidations': 0}, sut.get_stats())
+
+    def test_get_when_response_expired(self):
+        sut = ResponseCache(ttl_seconds=0)
+        sut.put('/reviewers?', b'{}')
+
+        self.assertIsNone(sut.get('/reviewers?'))
+
+    def test_invalidate(self):
+        sut = ResponseCache(ttl_seconds=60)
+        sut.put('/reviewers?', b'{}')
+
+        sut.invalidate()
+
+        self.assertIsNone(sut.get('/reviewers?'))
+
+class TestSharedResponseCache(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'cache', 'responses.sqlite')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_when_response_stored_by_other_process(self):
+        sut = SharedResponseCache(self.path, ttl_seconds=60)
+        other = SharedResponseCache(self.path, ttl_seconds=60)
+
+        etag = other.put('/reviewers?', b'{"success": true}')
+
+        self.assertEqual((b'{"success": true}', etag), sut.get('/reviewers?'))
+        self.assertEqual(etag, ResponseCache(60).put('/reviewers?', b'{"success": true}'))
+
+    def test_get_when_response_expired(self):
+        sut = SharedResponseCache(self.path, ttl_seconds=0)
+        sut.put('/reviewers?', b'{}')
+
+        self.assertIsNone(sut.get('/reviewers?'))
+        self.assertEqual({'hits': 0, 'misses': 1, 'invalidations': 0}, sut.get_stats())
+
+    def test_invalidate_by_other_process(self):
+        sut = SharedResponseCache(self.path, ttl_seconds=60)
+        other = SharedResponseCache(self.path, ttl_seconds=60)
+        sut.put('/reviewers?', b'{}')
+
+        other.invalidate()
+
+        self.assertIsNone(sut.get('/reviewers?'))
+
+class TestRecordsIndex(TestCase):
+
+    def test_put(self):
+        sut = RecordsIndex(ttl_seconds=60)
+
+        indexed = sut.put('/employees', {'uid2': {'uid': 'uid2'}, 'uid1': {'uid': 'uid1'}})
+
+        self.assertEqual((['uid1', 'uid2'], [{'uid': 'uid1'}, {'uid': 'uid2'}]), indexed)
+        self.assertEqual(indexed, sut.get('/employees'))
+        self.assertIsNone(sut.get('/reviewers'))
+
+    def test_get_when_index_expired(self):
+        sut = RecordsIndex(ttl_seconds=0)
+        sut.put('/employees', {'uid1': {}})
+
+        self.assertIsNone(sut.get('/employees'))
+
+    def test_invalidate(self):
+        sut = RecordsIndex(ttl_seconds=60)
+        sut.put('/employees', {'uid1': {}})
+
+        sut.invalidate()
+
+        self.assertIsNone(sut.get('/employees'))
@@ -293,6 +293,46 @@ class TestEvalyticsClient(TestCase):
         self.assertIn('reviewers', self.sut.get_calls())
         self.assertEqual(1, self.sut.get_calls()['reviewers'])
 
+    def test_correct_print_reviewers_stats(self):
+        # given:
+        self.sut.set_reviewers_response([
+            {
+                'reviewers': [
+                    {"employee": {"uid": "uid1"}, "evals_count": 2},
+                    {"employee": {"uid": "uid2"}, "evals_count": 1},
+                ],
+                'next_cursor': 'dWlkMg==',
+            },
+            {
+                'reviewers': [
+                    {"employee": {"uid": "uid3"}, "evals_count": 2},
+                ],
+                'next_cursor': None,
+            },
+        ])
+
+        # when:
+        reviewers = self.sut.get_reviewers_stats()
+
+        # then:
+        self.assertEqual(['uid1', 'uid2', 'uid3'], [r['employee']['uid'] for r in reviewers])
+        self.assertEqual(2, self.sut.get_calls()['reviewers'])
+
+    def test_correct_print_reviewers_with_stats(self):
+        # given:
+        self.sut.set_reviewers_response({
+            'reviewers': [
+                {"employee": {"uid": "uid1"}, "evals_count": 2},
+            ],
+            'next_cursor': None,
+        })
+
+        # when:
+        self.sut.print_reviewers(show_stats=True)
+
+        # then:
+        self.assertEqual(1, self.sut.get_calls()['reviewers'])
+
     def test_correct_print_status(self):
         # given:
         status_response = {
@@ -0,0 +1,123 @@
+import threading
+import time
+from unittest import TestCase
+
+from evalytics.concurrency import ConcurrentMapper, RateLimiter, TokenBucket
+
+class TestRateLimiter(TestCase):
+
+    def test_acquire_when_no_limit(self):
+        # given:
+        sut = RateLimiter()
+
+        # when:
+        waits = [sut.acquire() for _ in range(5)]
+
+        # then:
+        self.assertEqual([0, 0, 0, 0, 0], waits)
+
+    def test_acquire_spaces_calls(self):
+        # given:
+        sut = RateLimiter(requests_per_second=50)
+
+        # when:
+        start = time.monotonic()
+        for _ in range(5):
+            sut.acquire()
+        elapsed = time.monotonic() - start
+
+        # then:
+        self.assertGreaterEqual(elapsed, 4 / 50)
+
+class TestTokenBucket(TestCase):
+
+    def test_reserve_within_burst(self):
+        # given:
+        sut = TokenBucket(requests_per_second=1, burst=3)
+
+        # when:
+        waits = [sut.reserve() for _ in range(3)]
+
+        # then:
+        self.assertEqual([0, 0, 0], waits)
+
+    def test_reserve_beyond_burst_queues_callers(self):
+        # given:
+        sut = TokenBucket(requests_per_second=10, burst=2)
+        sut.reserve(2)
+
+        # when:
+        first_wait = sut.reserve()
+        second_wait = sut.reserve(5)
+
+        # then:
+        self.assertAlmostEqual(0.1, first_wait, delta=0.02)
+        self.assertAlmostEqual(0.6, second_wait, delta=0.02)
+
+    def test_acquire_waits_for_tokens(self):
+        # given:
+        sut = TokenBucket(requests_per_second=50, burst=1)
+
+        # when:
+        start = time.monotonic()
+        for _ in range(5):
+            sut.acquire()
+        elapsed = time.monotonic() - start
+
+        # then:
+        self.assertGreaterEqual(elapsed, 4 / 50 - 0.01)
+
+class TestConcurrentMapper(TestCase):
+
+    def setUp(self):
+        self.sut = ConcurrentMapper()
+
+    def test_concurrent_map_keeps_items_order(self):
+        # given:
+        items = [5, 1, 4, 2, 3]
+
+        def slow_double(item):
+            time.sleep(item / 1000)
+            return item * 2
+
+        # when:
+        results = self.sut.concurrent_map(slow_double, items, max_workers=5)
+
+        # then:
+        self.assertEqual([10, 2, 8, 4, 6], results)
+
+    def test_concurrent_map_bounds_running_calls(self):
+        # given:
+        lock = threading.Lock()
+        running = {'now': 0, 'max': 0}
+
+        def tracked(item):
+            with lock:
+                running['now'] += 1
+                running['max'] = max(running['max'], running['now'])
+            time.sleep(0.01)
+            with lock:
+                running['now'] -= 1
+            return item
+
+        # when:
+        self.sut.concurrent_map(tracked, range(10), max_workers=2)
+
+        # then:
+        self.assertLessEqual(running['max'], 2)
+
+    def test_concurrent_map_when_exception(self):
+        # given:
+        def fail_on_three(item):
+            if item == 3:
+                raise ValueError(item)
+            return item
+
+        # when:
+        with self.assertRaises(ValueError):
+            self.sut.concurrent_map(fail_on_three, range(5), max_workers=2)
+
+    def test_concurrent_map_when_no_items(self):
+        results = self.sut.concurrent_map(lambda item: item, [], max_workers=2)
+
+        self.assertEqual([], results)
@@ -1,12 +1,144 @@
+import os
+import tempfile
 from unittest import TestCase
 
-from evalytics.config import Config
+from evalytics.config import Config, ConfigReader, ProvidersConfig
+from evalytics.exceptions import MissingConfigException, InvalidConfigException
 
 from tests.common.mocks import MockConfigReader
 
 class ConfigSut(Config, MockConfigReader):
     'Injecting a mock into the Config dependency'
 
+class IncompleteConfigReader(MockConfigReader):
+
+    def read(self, filename: str = ''):
+        config = super().read(filename)
+        del config['google_drive_provider']['folder']
+        return config
+
+class SlackConfigReader(MockConfigReader):
+
+    def read(self, filename: str = ''):
+        config = super().read(filename)
+        config['providers']['communication_channel'] = ProvidersConfig.SLACK
+        return config
+
+class RateLimitsConfigReader(MockConfigReader):
+
+    def read(self, filename: str = ''):
+        config = super().read(filename)
+        config['google_drive_provider']['rate_limits'] = {
+            'sheets_read': {'requests_per_second': 5, 'burst': 10},
+            'gmail_send': {'requests_per_second': 2},
+        }
+        return config
+
+class RateLimitsConfigSut(Config, RateLimitsConfigReader):
+    'Injecting a config with Google API rate limits'
+
+class IncompleteRateLimitsConfigReader(MockConfigReader):
+
+    def read(self, filename: str = ''):
+        config = super().read(filename)
+        config['google_drive_provider']['rate_limits'] = {
+            'sheets_read': {'burst': 10},
+        }
+        return config
+
+class IncompleteRateLimitsConfigSut(Config, IncompleteRateLimitsConfigReader):
+    'Injecting a config with a rate limit without requests per second'
+
+class RetryConfigReader(MockConfigReader):
+
+    def read(self, filename: str = ''):
+        config = super().read(filename)
+        config['google_drive_provider']['retry'] = {
+            'idempotent_methods': [
+                'sheets.spreadsheets.values.batchGetByDataFilter',
+                'docs.documents.batchUpdate',
+            ],
+        }
+        return config
+
+class RetryConfigSut(Config, RetryConfigReader):
+    'Injecting a config retrying a method with side effects'
+
+class IncompleteConfigSut(Config, IncompleteConfigReader):
+    'Injecting a config without google drive folder'
+
+class SlackConfigSut(Config, SlackConfigReader):
+    'Injecting a config using slack as communication channel'
+
+class TestConfigReader(TestCase):
+
+    def setUp(self):
+        config_file = tempfile.NamedTemporaryFile(
+            mode='w', suffix='.yaml', delete=False)
+        config_file.write("company:\n    domain: 'first.com'\n")
+        config_file.close()
+
+        self.config_file = config_file.name
+        self.sut = ConfigReader()
+        self.sut.CONFIG_FILE = self.config_file
+
+    def tearDown(self):
+        os.remove(self.config_file)
+
+    def test_read_parses_config_file_once_when_unchanged(self):
+        # given:
+        parses_before = self.sut.get_read_stats()['parses']
+
+        # when:
+        first_config = self.sut.read()
+        second_config = self.sut.read()
+
+        # then:
+        parses_after = self.sut.get_read_stats()['parses']
+        self.assertEqual(1, parses_after - parses_before)
+        self.assertIs(first_config, second_config)
+        self.assertEqual('first.com', second_config['company']['domain'])
+
+    def test_read_returns_a_read_only_snapshot(self):
+        # given:
+        config = self.sut.read()
+
+        # when:
+        with self.assertRaises(TypeError):
+            config['company']['domain'] = 'changed.com'
+        with self.assertRaises(TypeError):
+            config['company'] = {}
+
+        # then:
+        self.assertEqual('first.com', self.sut.read()['company']['domain'])
+
+    def test_read_parses_config_file_again_when_modified(self):
+        # given:
+        self.sut.read()
+        with open(self.config_file, 'w') as stream:
+            stream.write("company:\n    domain: 'second.com'\n")
+        stat = os.stat(self.config_file)
+        os.utime(self.config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+
+        # when:
+        config = self.sut.read()
+
+        # then:
+        self.assertEqual('second.com', config['company']['domain'])
+
+    def test_reload_parses_config_file_again(self):
+        # given:
+        self.sut.read()
+        stats_before = self.sut.get_read_stats()
+
+        # when:
+        self.sut.reload()
+
+        # then:
+        stats_after = self.sut.get_read_stats()
+        self.assertEqual(1, stats_after['parses'] - stats_before['parses'])
+        self.assertEqual(1, stats_after['reloads'] - stats_before['reloads'])
+
 class TestProvidersConfig(TestCase):
 
     def setUp(self):
@@ -47,6 +179,11 @@ class TestEvalProcessConfig(TestCase):
 
         self.assertEqual(False, is_add_comenter_to_eval_reports_enabled)
 
+    def test_read_reports_generation_defaults(self):
+        self.assertEqual('serial', self.sut.read_reports_generation_mode())
+        self.assertEqual(8, self.sut.read_reports_generation_max_workers())
+        self.assertEqual(2, self.sut.read_reports_generation_reports_per_second())
+
 class TestSlackProviderConfig(TestCase):
 
     def setUp(self):
@@ -232,3 +369,123 @@ class TestConfig(TestCase):
         number_of_employees = self.sut.read_company_number_of_employees()
 
         self.assertEqual(20, number_of_employees)
+
+class TestSettings(TestCase):
+
+    def test_read_settings(self):
+        # given:
+        sut = ConfigSut()
+
+        # when:
+        settings = sut.read_settings()
+
+        # then:
+        self.assertEqual('storage-provider', settings.providers.storage)
+        self.assertEqual('eval_process_id', settings.eval_process.id)
+        self.assertIsNone(settings.eval_process.local_reports_pdf_font)
+        self.assertIsNone(settings.eval_process.local_reports_pdf_bold_font)
+        self.assertEqual('mock_domain.com', settings.company.domain)
+        self.assertEqual('mock_folder', settings.google_drive.folder)
+        self.assertEqual('Prefix', settings.google_drive.eval_report_prefix)
+        self.assertEqual(60, settings.google_drive.path_index_ttl_seconds)
+        self.assertEqual(5, settings.google_drive.retry_max_attempts)
+        self.assertEqual(1, settings.google_drive.retry_initial_delay_seconds)
+        self.assertEqual(32, settings.google_drive.retry_max_delay_seconds)
+        self.assertEqual((), settings.google_drive.retry_idempotent_methods)
+        self.assertEqual({}, settings.google_drive.rate_limits)
+        self.assertIsNone(settings.gmail)
+        self.assertIsNone(settings.slack)
+        self.assertEqual(16, settings.server.max_workers)
+        self.assertEqual('cache/jobs.sqlite', settings.server.jobs_path)
+        self.assertEqual(2, settings.server.jobs_max_workers)
+        self.assertEqual(30, settings.server.jobs_orphans_check_seconds)
+        self.assertFalse(settings.server.response_cache_enabled)
+        self.assertEqual(60, settings.server.response_cache_ttl_seconds)
+        self.assertEqual('cache/responses.sqlite', settings.server.response_cache_path)
+        self.assertEqual(300, settings.server.pagination_index_ttl_seconds)
+        self.assertFalse(settings.server.tracing_enabled)
+        self.assertEqual('traces/spans.json', settings.server.tracing_path)
+
+    def test_read_settings_when_slack_is_the_communication_channel(self):
+        # given:
+        sut = SlackConfigSut()
+
+        # when:
+        settings = sut.read_settings()
+
+        # then:
+        self.assertEqual('TOKEN::TOKEN', settings.slack.token)
+        self.assertEqual('@{}', settings.slack.channel)
+        self.assertEqual({}, settings.slack.users_map)
+        self.assertIsNone(settings.gmail)
+        with self.assertRaises(TypeError):
+            settings.slack.users_map['uid'] = 'slack_uid'
+
+    def test_read_settings_with_rate_limits(self):
+        # given:
+        sut = RateLimitsConfigSut()
+
+        # when:
+        settings = sut.read_settings()
+
+        # then:
+        self.assertEqual({
+            'sheets_read': (5, 10),
+            'gmail_send': (2, 2),
+        }, settings.google_drive.rate_limits)
+
+    def test_read_settings_is_immutable(self):
+        # given:
+        settings = ConfigSut().read_settings()
+
+        # when:
+        with self.assertRaises(AttributeError):
+            settings.company.domain = 'another_domain.com'
+
+    def test_read_settings_mappings_are_immutable(self):
+        # given:
+        settings = RateLimitsConfigSut().read_settings()
+
+        # when:
+        with self.assertRaises(TypeError):
+            settings.google_drive.rate_limits['sheets_write'] = (1, 1)
+
+        # then:
+        self.assertNotIn('sheets_write', settings.google_drive.rate_limits)
+
+    def test_read_settings_when_missing_key(self):
+        # given:
+        sut = IncompleteConfigSut()
+
+        # when:
+        with self.assertRaises(MissingConfigException) as context:
+            sut.read_settings()
+
+        # then:
+        self.assertEqual(
+            'Missing config key: google_drive_provider.folder',
+            context.exception.message)
+
+    def test_read_settings_when_missing_rate_limit_key(self):
+        # given:
+        sut = IncompleteRateLimitsConfigSut()
+
+        # when:
+        with self.assertRaises(MissingConfigException) as context:
+            sut.read_settings()
+
+        # then:
+        self.assertEqual(
+            'Missing config key: google_drive_provider.rate_limits.sheets_read.requests_per_second',
+            context.exception.message)
+
+    def test_read_settings_when_retrying_a_method_with_side_effects(self):
+        # given:
+        sut = RetryConfigSut()
+
+        # when:
+        with self.assertRaises(InvalidConfigException) as context:
+            sut.read_settings()
+
+        # then:
+        self.assertIn('docs.documents.batchUpdate', context.exception.message)
@@ -184,6 +184,180 @@ class TestGoogleForms(TestCase):
         self.assertEqual(1, len(responses_map['manager1']))
         self.assertEqual(2, len(responses_map['reporter3']))
 
+    def test_get_responses_reads_files_in_one_batch(self):
+        # given:
+        self.__given_files_within_response_folder()
+        self.__set_file_responses(self.file_id_manager_by, [['', 'reporter1', 'manager1', 'answer1', 'answer2']])
+        self.__set_file_responses(self.file_id_report_by, [['', 'manager1', 'reporter1', 'answer1', 'answer2']])
+        self.__set_file_responses(self.file_id_self, [['', 'reporter1', 'reporter1', 'answer1', 'answer2']])
+        self.__set_file_responses(self.file_id_peer, [['', 'reporter1', 'reporter2', 'answer1', 'answer2']])
+
+        # when:
+        self.sut.get_responses()
+
+        # then:
+        calls = self.sut.get_calls()
+        self.assertEqual(1, len(calls['batch_get_file_values']))
+        self.assertEqual(4, len(calls['batch_get_file_values'][0]['spreadsheet_ranges']))
+        self.assertNotIn('concurrent_get_file_values', calls)
+
+    def test_get_responses_when_concurrent_reader(self):
+        # given:
+        self.sut.set_responses_reader_mode('concurrent')
+        self.__given_files_within_response_folder()
+        self.__set_file_responses(self.file_id_manager_by, [['', 'reporter1', 'manager1', 'answer1', 'answer2']])
+        self.__set_file_responses(self.file_id_report_by, [['', 'manager1', 'reporter1', 'answer1', 'answer2']])
+        self.__set_file_responses(self.file_id_self, [
+            ['', 'reporter1', 'reporter1', 'answer1', 'answer2'],
+            ['', 'reporter3', 'reporter3', 'answer1', 'answer2']
+        ])
+        self.__set_file_responses(self.file_id_peer, [
+            ['', 'reporter1', 'reporter2', 'answer1', 'answer2'],
+            ['', 'reporter3', 'reporter2', 'answer1', 'answer2']
+        ])
+
+        # when:
+        responses_map = self.sut.get_responses()
+
+        # then:
+        calls = self.sut.get_calls()
+        self.assertEqual(1, len(calls['concurrent_get_file_values']))
+        self.assertEqual(4, calls['concurrent_get_file_values'][0]['max_workers'])
+        self.assertNotIn('batch_get_file_values', calls)
+        self.assertEqual(3, len(responses_map['reporter1']))
+        self.assertEqual(
+            ['MANAGER EVAL BY REPORT', 'PEER EVAL BY PEER', 'SELF EVAL'],
+            [r.filename for r in responses_map['reporter1']])
+        self.assertEqual([3, 3], [r.line_number for r in responses_map['reporter3']])
+
+    def test_get_responses_reads_pages_until_no_more_responses(self):
+        # given:
+        self.sut.set_responses_reader_page_size(2)
+        self.__given_files_within_response_folder()
+        self.__set_file_responses(self.file_id_manager_by, [])
+        self.__set_file_responses(self.file_id_report_by, [])
+        self.__set_file_responses(self.file_id_self, [])
+        self.__set_file_responses(self.file_id_peer, [
+            ['', 'reporter{}'.format(i), 'reporter2', 'answer1', 'answer2']
+            for i in range(1, 6)
+        ])
+
+        # when:
+        responses_map = self.sut.get_responses()
+
+        # then:
+        calls = self.sut.get_calls()
+        self.assertEqual('1:2', calls['batch_get_file_values'][0]['spreadsheet_ranges'][0][1])
+        self.assertEqual(
+            ['A3:E4', 'A5:E6', 'A7:E8'],
+            [
+                c['rows_range'] for c in calls['iter_file_values_pages'].values()
+                if c['spreadsheet_id'] == self.file_id_peer
+            ])
+        self.assertEqual(
+            ['reporter1', 'reporter2', 'reporter3', 'reporter4', 'reporter5'],
+            sorted(responses_map.keys()))
+        self.assertEqual(6, responses_map['reporter5'][0].line_number)
+
+    def test_get_responses_reads_pages_after_blank_rows(self):
+        # given:
+        self.sut.set_responses_reader_page_size(3)
+        self.__given_files_within_response_folder()
+        self.__set_file_responses(self.file_id_manager_by, [])
+        self.__set_file_responses(self.file_id_report_by, [])
+        self.__set_file_responses(self.file_id_self, [])
+        self.__set_file_responses(self.file_id_peer, [
+            ['', 'reporter1', 'reporter2', 'answer1', 'answer2'],
+            [],
+            [],
+            [],
+            ['', 'reporter6', 'reporter2', 'answer1', 'answer2'],
+        ])
+
+        # when:
+        responses_map = self.sut.get_responses()
+
+        # then:
+        self.assertEqual(['reporter1', 'reporter6'], sorted(responses_map.keys()))
+        self.assertEqual(2, responses_map['reporter1'][0].line_number)
+        self.assertEqual(6, responses_map['reporter6'][0].line_number)
+
+    def test_iter_responses_reads_pages_while_consumed(self):
+        # given:
+        self.sut.set_responses_reader_page_size(2)
+        self.__given_files_within_response_folder()
+        self.__set_file_responses(self.file_id_manager_by, [])
+        self.__set_file_responses(self.file_id_report_by, [])
+        self.__set_file_responses(self.file_id_self, [])
+        self.__set_file_responses(self.file_id_peer, [
+            ['', 'reporter{}'.format(i), 'reporter2', 'answer1', 'answer2']
+            for i in range(1, 6)
+        ])
+
+        # when:
+        responses = self.sut.iter_responses()
+        first_response = next(responses)
+
+        # then:
+        self.assertEqual('reporter1', first_response.reviewer)
+        self.assertNotIn(
+            self.file_id_peer,
+            [c['spreadsheet_id'] for c in self.sut.get_calls()['iter_file_values_pages'].values()])
+        self.assertEqual(
+            ['reporter2', 'reporter3', 'reporter4', 'reporter5'],
+            [response.reviewer for response in responses])
+        self.assertEqual(6, len(self.sut.get_calls()['iter_file_values_pages']))
+
+    def test_iter_responses_reads_first_pages_of_a_window_of_files(self):
+        # given:
+        self.sut.FILES_PER_READ = 2
+        self.__given_files_within_response_folder()
+        self.__set_file_responses(self.file_id_manager_by, [['', 'reporter1', 'manager1', 'answer1', 'answer2']])
+        self.__set_file_responses(self.file_id_report_by, [['', 'manager1', 'reporter1', 'answer1', 'answer2']])
+        self.__set_file_responses(self.file_id_self, [['', 'reporter1', 'reporter1', 'answer1', 'answer2']])
+        self.__set_file_responses(self.file_id_peer, [['', 'reporter1', 'reporter2', 'answer1', 'answer2']])
+
+        # when:
+        responses = self.sut.iter_responses()
+        first_response = next(responses)
+
+        # then:
+        calls = self.sut.get_calls()
+        self.assertEqual('MANAGER EVAL BY REPORT', first_response.filename)
+        self.assertEqual(1, len(calls['batch_get_file_values']))
+        self.assertEqual(
+            [self.file_id_manager_by, self.file_id_peer],
+            [file_id for file_id, _ in calls['batch_get_file_values'][0]['spreadsheet_ranges']])
+
+        self.assertEqual(3, len(list(responses)))
+        self.assertEqual(2, len(self.sut.get_calls()['batch_get_file_values']))
+
+    def test_group_responses(self):
+        # given:
+        self.__given_files_within_response_folder()
+        self.__set_file_responses(self.file_id_manager_by, [['', 'reporter1', 'manager1', 'answer1', 'answer2']])
+        self.__set_file_responses(self.file_id_report_by, [['', 'manager1', 'reporter1', 'answer1', 'answer2']])
+        self.__set_file_responses(self.file_id_self, [['', 'reporter1', 'reporter1', 'answer1', 'answer2']])
+        self.__set_file_responses(self.file_id_peer, [['', 'reporter1', 'reporter2', 'answer1', 'answer2']])
+
+        # when:
+        responses_map = self.sut.group_responses(
+            self.sut.iter_responses(),
+            ReviewerResponseKeyDictStrategy.REVIEWEE_EVALUATION)
+
+        # then:
+        self.assertEqual(['manager1', 'reporter1', 'reporter2'], sorted(responses_map.keys()))
+        self.assertEqual(2, len(responses_map['reporter1']))
+
+    def test_get_responses_when_unknown_reader_mode(self):
+        # given:
+        self.sut.set_responses_reader_mode('NOT_EXISTENT')
+        self.__given_files_within_response_folder()
+
+        # when:
+        with self.assertRaises(ValueError):
+            self.sut.get_responses()
+
     def test_get_responses_when_no_data_in_files(self):
         self.__given_files_within_response_folder()
         self.sut.set_get_file_values_response(self.file_id_manager_by, [])
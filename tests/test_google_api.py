@@ -1,16 +1,31 @@
+import os
+import tempfile
+import threading
 from unittest import TestCase
 
+from googleapiclient.http import HttpMock, HttpMockSequence
 from googledrive.exceptions import GoogleApiClientHttpErrorException
+from googledrive.models import GoogleFile
 
 from evalytics.google_api import GmailAPI, FilesAPI, DocsService, GoogleDrive
 from evalytics.google_api import SheetsService, GmailService
+from evalytics.google_api import GoogleServiceRegistry, SheetsBatchService
+from evalytics.google_api import DriveMetadataService, SnapshotCachedSheetsService
+from evalytics.google_api import DrivePathIndex, DrivePathIndexService
+from evalytics.google_api import DrivePermissionsService, MeasuredHttpRequest
+from evalytics.cache import SnapshotCache
+from evalytics.retry import GoogleApiRetry, RetryPolicy
 from evalytics.models import ReviewerResponse, EvalKind
 
+from tests.test_retry import build_http_error
 from tests.common.mocks import RawGmailServiceMock
 from tests.common.mocks import RawDocsServiceMock
+from tests.common.mocks import RawSheetsServiceMock
+from tests.common.mocks import RawDriveServiceMock
 from tests.common.mocks import MockGoogleService, MockGmailService
 from tests.common.mocks import MockGoogleDrive, MockSheetsService
 from tests.common.mocks import MockDocsService
+from tests.common.mocks import MockGoogleServiceBuilder
 
 class DocServiceSut(DocsService, MockGoogleService):
     'Inject a mock into the DocsService dependency'
@@ -18,6 +33,24 @@ class DocServiceSut(DocsService, MockGoogleService):
 class SheetsServiceSut(SheetsService, MockGoogleService):
     'Inject a mock into the SheetsService dependency'
 
+class SheetsBatchServiceSut(SheetsBatchService, MockGoogleService):
+    'Inject a mock into the SheetsBatchService dependency'
+
+class DriveMetadataServiceSut(DriveMetadataService, MockGoogleService):
+    'Inject a mock into the DriveMetadataService dependency'
+
+class DrivePermissionsServiceSut(DrivePermissionsService, MockGoogleService):
+    'Inject a mock into the DrivePermissionsService dependency'
+
+class SnapshotCachedSheetsServiceSut(
+        SnapshotCachedSheetsService,
+        MockSheetsService,
+        MockGoogleDrive):
+    'Inject mocks into SnapshotCachedSheetsService dependencies'
+
+class DrivePathIndexServiceSut(DrivePathIndexService, MockGoogleDrive):
+    'Inject a mock into the DrivePathIndexService dependency'
+
 class GmailServiceSut(GmailService, MockGoogleService):
     'Inject a mock into the GmailService dependency'
 
@@ -34,6 +67,93 @@ class FilesAPISut(
 class GmailAPISut(GmailAPI, MockGmailService):
     'Inject a mock into the GmailAPI dependency'
 
+class GoogleServiceRegistrySut(GoogleServiceRegistry, MockGoogleServiceBuilder):
+    'Inject a mock into the GoogleServiceRegistry dependency'
+
+    def __init__(self):
+        GoogleServiceRegistry.__init__(self)
+        MockGoogleServiceBuilder.__init__(self)
+
+class TestGoogleServiceRegistry(TestCase):
+
+    def setUp(self):
+        self.sut = GoogleServiceRegistrySut()
+        self.credentials_file = 'credentials.json'
+        self.scopes = ['scope']
+
+    def test_get_service_builds_service_once(self):
+        # when:
+        first_service = self.sut.get_service('docs', 'v1', self.credentials_file, self.scopes)
+        second_service = self.sut.get_service('docs', 'v1', self.credentials_file, self.scopes)
+
+        # then:
+        self.assertIs(first_service, second_service)
+        self.assertEqual([('docs', 'v1')], self.sut.get_build_calls())
+        self.assertEqual({'builds': 1, 'reuses': 1}, self.sut.get_stats())
+
+    def test_get_service_builds_each_service_version(self):
+        # when:
+        self.sut.get_service('docs', 'v1', self.credentials_file, self.scopes)
+        self.sut.get_service('gmail', 'v1', self.credentials_file, self.scopes)
+        self.sut.get_service('docs', 'v2', self.credentials_file, self.scopes)
+
+        # then:
+        self.assertEqual(3, len(self.sut.get_build_calls()))
+        self.assertEqual({'builds': 3, 'reuses': 0}, self.sut.get_stats())
+
+    def test_get_service_builds_once_when_concurrent_calls(self):
+        # given:
+        threads = [
+            threading.Thread(
+                target=self.sut.get_service,
+                args=('sheets', 'v4', self.credentials_file, self.scopes))
+            for _ in range(8)
+        ]
+
+        # when:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # then:
+        self.assertEqual(1, len(self.sut.get_build_calls()))
+        self.assertEqual({'builds': 1, 'reuses': 7}, self.sut.get_stats())
+
+class TestMeasuredHttpRequest(TestCase):
+
+    def test_execute_records_call(self):
+        sut = MeasuredHttpRequest(
+            HttpMock(headers={'status': '200'}),
+            lambda resp, content: content,
+            'https://www.googleapis.com/drive/v3/files/file_id',
+            methodId='drive.files.get')
+        calls = sut.google_api_calls.get_value('drive', 'files.get', 'ok')
+
+        # when:
+        sut.execute()
+
+        # then:
+        self.assertEqual(calls + 1, sut.google_api_calls.get_value('drive', 'files.get', 'ok'))
+
+    def test_execute_retries_rate_limited_call(self):
+        GoogleApiRetry.configure_retry(RetryPolicy(initial_delay_seconds=0, max_delay_seconds=0))
+        self.addCleanup(GoogleApiRetry.configure_retry, RetryPolicy())
+        sut = MeasuredHttpRequest(
+            HttpMockSequence([({'status': '429'}, b''), ({'status': '200'}, b'content')]),
+            lambda resp, content: content,
+            'https://gmail.googleapis.com/gmail/v1/users/me/messages/send',
+            method='POST',
+            methodId='gmail.users.messages.send')
+        retries = sut.google_api_retries.get_value('gmail', 'users.messages.send', '429')
+
+        # when:
+        content = sut.execute()
+
+        # then:
+        self.assertEqual(b'content', content)
+        self.assertEqual(retries + 1, sut.google_api_retries.get_value('gmail', 'users.messages.send', '429'))
+
 class TestGmailService(TestCase):
 
     def setUp(self):
@@ -70,21 +190,453 @@ class TestDocsService(TestCase):
 
         self.sut.batch_update(document_id, requests)
 
-    def test_get_delete_tokens_requests(self):
+
+class TestSheetsBatchService(TestCase):
+
+    def setUp(self):
+        self.raw_service = RawSheetsServiceMock({
+            ('id1', 'A1:B2'): [['q1', 'q2'], ['a1', 'a2']],
+            ('id2', 'A1:B2'): [['q1', 'q2']],
+            ('id2', 'C1:D2'): [['q3', 'q4']],
+        })
+        self.sut = SheetsBatchServiceSut('credentials.json', [])
+        self.sut.set_service(
+            SheetsBatchService.SHEETS_SERVICE_ID,
+            SheetsBatchService.SHEETS_SERVICE_VERSION,
+            self.raw_service
+        )
+
+    def test_batch_get_file_values(self):
+        # when:
+        values = self.sut.batch_get_file_values([
+            ('id1', 'A1:B2'),
+            ('id2', 'A1:B2'),
+            ('id2', 'C1:D2'),
+            ('id3', 'A1:B2'),
+        ])
+
+        # then:
+        self.assertEqual(1, self.raw_service.get_batches_executed())
+        self.assertEqual([['q1', 'q2'], ['a1', 'a2']], values[('id1', 'A1:B2')])
+        self.assertEqual([['q1', 'q2']], values[('id2', 'A1:B2')])
+        self.assertEqual([['q3', 'q4']], values[('id2', 'C1:D2')])
+        self.assertEqual([], values[('id3', 'A1:B2')])
+
+    def test_iter_file_values_pages(self):
+        # given:
+        self.raw_service.values_by_range.update({
+            ('id1', 'A3:B4'): [['a3', 'b3'], ['a4', 'b4']],
+            ('id1', 'A5:B6'): [['a5', 'b5']],
+        })
+
+        # when:
+        pages = list(self.sut.iter_file_values_pages(
+            'id1', first_row=3, last_column='B', page_size=2))
+
+        # then:
+        self.assertEqual([[['a3', 'b3'], ['a4', 'b4']], [['a5', 'b5']]], pages)
+
+    def test_iter_file_values_pages_when_last_page_is_full(self):
+        # given:
+        self.raw_service.values_by_range.update({
+            ('id1', 'A3:B4'): [['a3', 'b3'], ['a4', 'b4']],
+        })
+
+        # when:
+        pages = list(self.sut.iter_file_values_pages(
+            'id1', first_row=3, last_column='B', page_size=2))
+
+        # then:
+        self.assertEqual([[['a3', 'b3'], ['a4', 'b4']]], pages)
+
+    def test_iter_file_values_pages_when_blank_rows_end_a_page(self):
         # given:
-        tokens = {
-            1: {'start': 'si', 'end': 'no'},
-            2: {'start': 'si', 'end': 'no'},
-            3: {'start': 'si', 'end': 'no'},
-            4: {'start': 'si', 'end': 'no'}
-        }
+        self.raw_service.values_by_range.update({
+            ('id1', 'A3:B5'): [['a3', 'b3']],
+            ('id1', 'A6:B8'): [['a6', 'b6']],
+        })
 
         # when:
-        delete_token_requests = self.sut.get_delete_tokens_requests(tokens)
+        pages = list(self.sut.iter_file_values_pages(
+            'id1', first_row=3, last_column='B', page_size=3))
 
         # then:
-        self.assertEqual(8, len(delete_token_requests))
+        self.assertEqual([[['a3', 'b3']], [[], [], ['a6', 'b6']]], pages)
+
+    def test_get_rows_range(self):
+        self.assertEqual('1:500', self.sut.get_rows_range(1, 500))
+        self.assertEqual('A501:V1000', self.sut.get_rows_range(501, 1000, 'V'))
+
+    def test_get_column_letter(self):
+        self.assertEqual(
+            ['A', 'Z', 'AA', 'AZ', 'BA', 'ZZ', 'AAA'],
+            [self.sut.get_column_letter(n) for n in [1, 26, 27, 52, 53, 702, 703]])
 
+    def test_batch_get_file_values_splits_big_batches(self):
+        # given:
+        spreadsheet_ranges = [
+            ('id{}'.format(i), 'A1:B2')
+            for i in range(SheetsBatchService.BATCH_MAX_REQUESTS + 1)
+        ]
+
+        # when:
+        values = self.sut.batch_get_file_values(spreadsheet_ranges)
+
+        # then:
+        self.assertEqual(2, self.raw_service.get_batches_executed())
+        self.assertEqual(len(spreadsheet_ranges), len(values))
+
+    def test_batch_get_file_values_when_no_ranges(self):
+        # when:
+        values = self.sut.batch_get_file_values([])
+
+        # then:
+        self.assertEqual(0, self.raw_service.get_batches_executed())
+        self.assertEqual({}, values)
+
+class TestDrivePathIndexService(TestCase):
+
+    def setUp(self):
+        self.sut = DrivePathIndexServiceSut()
+        self.sut.drive_path_index = DrivePathIndex(ttl_seconds=60)
+        self.report1 = GoogleFile(id='id1', name='report1', parents=[], mime_type='', export_links={})
+        self.report2 = GoogleFile(id='id2', name='report2', parents=[], mime_type='', export_links={})
+        self.sut.set_gdrive_list_response('/folder/reports', [self.report1, self.report2])
+
+    def tearDown(self):
+        self.sut.clear_gdrive_list_fixture()
+        self.sut.clear_gdrive_get_file_fixture()
+
+    def test_googledrive_get_file_lists_folder_once(self):
+        # when:
+        report1 = self.sut.googledrive_get_file('/folder/reports/report1')
+        report2 = self.sut.googledrive_get_file('folder/reports//report2')
+        missing_report = self.sut.googledrive_get_file('/folder/reports/report3')
+
+        # then:
+        self.assertEqual(self.report1, report1)
+        self.assertEqual(self.report2, report2)
+        self.assertIsNone(missing_report)
+        self.assertEqual(1, len(self.sut.get_calls()['gdrive_list']))
+        self.assertNotIn('gdrive_get_file', self.sut.get_calls())
+
+    def test_googledrive_get_file_when_top_level_path(self):
+        # given:
+        self.sut.set_gdrive_get_file_response('/folder', self.report1)
+
+        # when:
+        google_file = self.sut.googledrive_get_file('/folder')
+
+        # then:
+        self.assertEqual(self.report1, google_file)
+        self.assertNotIn('gdrive_list', self.sut.get_calls())
+
+    def test_googledrive_ls_when_indexed(self):
+        # when:
+        self.sut.googledrive_ls('/folder/reports')
+        files = self.sut.googledrive_ls('/folder/reports/')
+
+        # then:
+        self.assertEqual([self.report1, self.report2], files)
+        self.assertEqual(1, len(self.sut.get_calls()['gdrive_list']))
+        self.assertEqual(1, self.sut.drive_path_index.get_stats()['hits'])
+
+    def test_googledrive_ls_when_listing_expired(self):
+        # given:
+        self.sut.drive_path_index = DrivePathIndex(ttl_seconds=-1)
+
+        # when:
+        self.sut.googledrive_ls('/folder/reports')
+        self.sut.googledrive_ls('/folder/reports')
+
+        # then:
+        self.assertEqual(2, len(self.sut.get_calls()['gdrive_list']))
+
+    def test_copy_file_adds_copy_to_listing_of_original(self):
+        # given:
+        template = GoogleFile(id='template_id', name='template', parents=['reports_id'], mime_type='', export_links={})
+        self.sut.set_gdrive_list_response('/folder/templates', [template])
+        self.sut.googledrive_ls('/folder/reports')
+        self.sut.googledrive_ls('/folder/templates')
+
+        # when:
+        new_file_id = self.sut.copy_file('template_id', 'report3')
+        report3 = self.sut.googledrive_get_file('/folder/templates/report3')
+        reports = self.sut.googledrive_ls('/folder/reports')
+
+        # then:
+        self.assertEqual(new_file_id, report3.id)
+        self.assertEqual(['reports_id'], report3.parents)
+        self.assertEqual([self.report1, self.report2], reports)
+        self.assertEqual(2, len(self.sut.get_calls()['gdrive_list']))
+
+    def test_update_file_parent_moves_file_between_listings(self):
+        # given:
+        report3 = GoogleFile(id='id3', name='report3', parents=['drafts_id'], mime_type='', export_links={})
+        report4 = GoogleFile(id='id4', name='report4', parents=['drafts_id'], mime_type='', export_links={})
+        self.sut.set_gdrive_list_response('/folder/drafts', [report3, report4])
+        report1 = GoogleFile(id='id1', name='report1', parents=['reports_id'], mime_type='', export_links={})
+        self.sut.set_gdrive_list_response('/folder/reports', [report1])
+        self.sut.googledrive_ls('/folder/drafts')
+        self.sut.googledrive_ls('/folder/reports')
+
+        # when:
+        self.sut.update_file_parent('id3', 'drafts_id', 'reports_id')
+
+        # then:
+        moved_file = self.sut.googledrive_get_file('/folder/reports/report3')
+        self.assertEqual('id3', moved_file.id)
+        self.assertEqual(['reports_id'], moved_file.parents)
+        self.assertEqual([report4], self.sut.googledrive_ls('/folder/drafts'))
+        self.assertEqual(2, len(self.sut.get_calls()['gdrive_list']))
+
+    def test_update_file_parent_drops_listings_of_unknown_folders(self):
+        # given:
+        report1 = GoogleFile(id='id1', name='report1', parents=['reports_id'], mime_type='', export_links={})
+        self.sut.set_gdrive_list_response('/folder/reports', [report1])
+        self.sut.set_gdrive_list_response('/folder/empty', [])
+        self.sut.googledrive_ls('/folder/reports')
+        self.sut.googledrive_ls('/folder/empty')
+
+        # when:
+        self.sut.update_file_parent('id3', 'drafts_id', 'reports_id')
+        self.sut.googledrive_ls('/folder/reports')
+        self.sut.googledrive_ls('/folder/empty')
+
+        # then:
+        self.assertEqual(4, len(self.sut.get_calls()['gdrive_list']))
+        self.assertEqual(2, self.sut.drive_path_index.get_stats()['invalidations'])
+
+class TestDriveMetadataService(TestCase):
+
+    def setUp(self):
+        self.raw_service = RawDriveServiceMock({
+            'id1': '2020-01-01T00:00:00.000Z',
+            'id2': '2020-01-02T00:00:00.000Z',
+        })
+        self.sut = DriveMetadataServiceSut('credentials.json', [])
+        self.sut.set_service(
+            DriveMetadataService.DRIVE_SERVICE_ID,
+            DriveMetadataService.DRIVE_SERVICE_VERSION,
+            self.raw_service
+        )
+
+    def test_get_files_modified_time(self):
+        # when:
+        modified_times = self.sut.get_files_modified_time(['id1', 'id2', 'id1'])
+
+        # then:
+        self.assertEqual(1, self.raw_service.get_batches_executed())
+        self.assertEqual({
+            'id1': '2020-01-01T00:00:00.000Z',
+            'id2': '2020-01-02T00:00:00.000Z',
+        }, modified_times)
+
+    def test_get_files_modified_time_retries_rate_limited_call(self):
+        # given:
+        GoogleApiRetry.configure_retry(RetryPolicy(initial_delay_seconds=0, max_delay_seconds=0))
+        self.addCleanup(GoogleApiRetry.configure_retry, RetryPolicy())
+        self.raw_service.add_errors_for_file('id2', [build_http_error(429)])
+
+        # when:
+        modified_times = self.sut.get_files_modified_time(['id1', 'id2'])
+
+        # then:
+        self.assertEqual([2, 1], self.raw_service.get_batch_sizes())
+        self.assertEqual({
+            'id1': '2020-01-01T00:00:00.000Z',
+            'id2': '2020-01-02T00:00:00.000Z',
+        }, modified_times)
+
+    def test_get_files_modified_time_when_retries_are_exhausted(self):
+        # given:
+        GoogleApiRetry.configure_retry(RetryPolicy(
+            max_attempts=2, initial_delay_seconds=0, max_delay_seconds=0))
+        self.addCleanup(GoogleApiRetry.configure_retry, RetryPolicy())
+        self.raw_service.add_errors_for_file('id2', [build_http_error(429)] * 2)
+
+        # when:
+        with self.assertRaises(GoogleApiClientHttpErrorException) as context:
+            self.sut.get_files_modified_time(['id1', 'id2'])
+
+        # then:
+        self.assertEqual([2, 1], self.raw_service.get_batch_sizes())
+        self.assertEqual(429, context.exception.get_google_api_client_http_error().code)
+
+    def test_get_files_modified_time_does_not_retry_client_errors(self):
+        # given:
+        self.raw_service.add_errors_for_file('id2', [build_http_error(404)])
+
+        # when:
+        with self.assertRaises(GoogleApiClientHttpErrorException):
+            self.sut.get_files_modified_time(['id1', 'id2'])
+
+        # then:
+        self.assertEqual([2], self.raw_service.get_batch_sizes())
+
+class TestDrivePermissionsService(TestCase):
+
+    def setUp(self):
+        self.raw_service = RawDriveServiceMock({}, {
+            'id1': [
+                {'emailAddress': 'Boss@company.com', 'role': 'writer'},
+                {'emailAddress': 'peer@company.com', 'role': 'reader'},
+            ],
+        })
+        self.sut = DrivePermissionsServiceSut('credentials.json', [])
+        self.sut.set_service(
+            DrivePermissionsService.DRIVE_SERVICE_ID,
+            DrivePermissionsService.DRIVE_SERVICE_VERSION,
+            self.raw_service
+        )
+
+    def test_get_files_permissions(self):
+        # when:
+        permissions, errors = self.sut.get_files_permissions(['id1', 'id2', 'id1'])
+
+        # then:
+        self.assertEqual(1, self.raw_service.get_batches_executed())
+        self.assertEqual({
+            'id1': {
+                'boss@company.com': 'writer',
+                'peer@company.com': 'reader',
+            },
+            'id2': {},
+        }, permissions)
+        self.assertEqual({}, errors)
+
+    def test_get_files_permissions_reads_every_page(self):
+        # given:
+        self.raw_service.permissions_by_file.update({
+            'id2': [
+                {'emailAddress': 'user{}@company.com'.format(i), 'role': 'reader'}
+                for i in range(DrivePermissionsService.PERMISSIONS_PAGE_SIZE + 1)
+            ],
+        })
+
+        # when:
+        permissions, _ = self.sut.get_files_permissions(['id1', 'id2'])
+
+        # then:
+        self.assertEqual([2, 1], self.raw_service.get_batch_sizes())
+        self.assertEqual(2, len(permissions['id1']))
+        self.assertEqual(
+            DrivePermissionsService.PERMISSIONS_PAGE_SIZE + 1, len(permissions['id2']))
+
+    def test_get_files_permissions_when_a_file_fails(self):
+        # given:
+        self.raw_service.add_errors_for_file('id2', [build_http_error(404)])
+
+        # when:
+        permissions, errors = self.sut.get_files_permissions(['id1', 'id2'])
+
+        # then:
+        self.assertEqual(['id1'], list(permissions.keys()))
+        self.assertEqual(['id2'], list(errors.keys()))
+        self.assertEqual(404, errors['id2'].get_google_api_client_http_error().code)
+
+    def test_batch_create_permissions(self):
+        # given:
+        permissions = [
+            ('id{}'.format(i), 'manager@company.com')
+            for i in range(DrivePermissionsService.BATCH_MAX_REQUESTS + 1)
+        ]
+
+        # when:
+        errors = self.sut.batch_create_permissions(
+            permissions + permissions[:1], 'commenter')
+
+        # then:
+        self.assertEqual({}, errors)
+        self.assertEqual(2, self.raw_service.get_batches_executed())
+        self.assertEqual({
+            'id0': {'manager@company.com': 'commenter'},
+            'id50': {'manager@company.com': 'commenter'},
+        }, self.sut.get_files_permissions(['id0', 'id50'])[0])
+
+class TestSnapshotCachedSheetsService(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.snapshot_cache = SnapshotCache(
+            os.path.join(self.directory.name, 'snapshots.sqlite'),
+            ttl_seconds=60,
+            max_size_bytes=1024 * 1024)
+
+        self.sut = SnapshotCachedSheetsServiceSut()
+        self.sut.set_file_modified_time('id1', 'time1')
+        self.sut.set_file_modified_time('id2', 'time1')
+        self.sut.set_get_file_values_response('id1', [['a1'], ['a2']])
+        self.sut.set_get_file_values_response('id2', [['b1'], ['b2']])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_batch_get_file_values_when_no_snapshot_cache(self):
+        # when:
+        self.sut.batch_get_file_values([('id1', 'A1:A2')])
+
+        # then:
+        calls = self.sut.get_calls()
+        self.assertIn('batch_get_file_values', calls)
+        self.assertNotIn('get_files_modified_time', calls)
+
+    def test_batch_get_file_values_downloads_only_missing_snapshots(self):
+        # given:
+        self.snapshot_cache.put('id1', 'A1:A2', 'time1', [['cached']])
+        self.sut.set_snapshot_cache(self.snapshot_cache)
+
+        # when:
+        values = self.sut.batch_get_file_values([('id1', 'A1:A2'), ('id2', 'A1:A2')])
+
+        # then:
+        calls = self.sut.get_calls()
+        self.assertEqual(
+            [('id2', 'A1:A2')],
+            calls['batch_get_file_values'][0]['spreadsheet_ranges'])
+        self.assertEqual([['cached']], values[('id1', 'A1:A2')])
+        self.assertEqual([['b1'], ['b2']], values[('id2', 'A1:A2')])
+        self.assertEqual(
+            [['b1'], ['b2']],
+            self.snapshot_cache.get('id2', 'A1:A2', 'time1'))
+
+    def test_batch_get_file_values_when_file_modified(self):
+        # given:
+        self.snapshot_cache.put('id1', 'A1:A2', 'time0', [['cached']])
+        self.sut.set_snapshot_cache(self.snapshot_cache)
+
+        # when:
+        values = self.sut.batch_get_file_values([('id1', 'A1:A2')])
+
+        # then:
+        self.assertEqual([['a1'], ['a2']], values[('id1', 'A1:A2')])
+
+    def test_get_file_values_when_force_refresh(self):
+        # given:
+        self.snapshot_cache.put('id1', 'A1:A2', 'time1', [['cached']])
+        self.sut.set_snapshot_cache(self.snapshot_cache, force_refresh=True)
+
+        # when:
+        values = self.sut.get_file_values('id1', 'A1:A2')
+
+        # then:
+        self.assertEqual([['a1'], ['a2']], values)
+        self.assertEqual(
+            [['a1'], ['a2']],
+            self.snapshot_cache.get('id1', 'A1:A2', 'time1'))
+
+    def test_modified_times_are_checked_once(self):
+        # given:
+        self.sut.set_snapshot_cache(self.snapshot_cache)
+
+        # when:
+        self.sut.get_file_values('id1', 'A1:A2')
+        self.sut.get_file_values('id1', 'A1:A2')
+
+        # then:
+        calls = self.sut.get_calls()
+        self.assertEqual(1, len(calls['get_files_modified_time']))
+        self.assertEqual(1, len(calls['read_file_values']))
 
 class TestGmailApi(TestCase):
 
@@ -186,8 +738,8 @@ class TestFilesAPI(TestCase):
         # then:
         calls = self.sut.get_calls()
         self.assertEqual(2, len(calls))
-        self.assertIn('batch_update', calls)
-        self.assertIn('get_document', calls)
+        self.assertEqual(1, len(calls['get_document']))
+        self.assertEqual(1, len(calls['batch_update']))
 
     def test_insert_eval_report_in_document_when_no_eval_response(self):
         # given:
@@ -215,8 +767,8 @@ class TestFilesAPI(TestCase):
         # then:
         calls = self.sut.get_calls()
         self.assertEqual(2, len(calls))
-        self.assertIn('batch_update', calls)
-        self.assertIn('get_document', calls)
+        self.assertEqual(1, len(calls['get_document']))
+        self.assertEqual(1, len(calls['batch_update']))
 
     def test_insert_eval_report_in_document(self):
         # given:
@@ -244,8 +796,97 @@ class TestFilesAPI(TestCase):
         # then:
         calls = self.sut.get_calls()
         self.assertEqual(2, len(calls))
-        self.assertIn('batch_update', calls)
-        self.assertIn('get_document', calls)
+        self.assertEqual(1, len(calls['get_document']))
+        self.assertEqual(1, len(calls['batch_update']))
+
+    def test_insert_eval_report_in_document_styles_computed_ranges(self):
+        # given:
+        eval_process_id = '2020 Q2'
+        document_id = 'ID'
+        reviewee = 'reviewee'
+        reviewee_evaluations = [
+            ReviewerResponse(
+                reviewee=reviewee,
+                reviewer='reviewer',
+                eval_kind=EvalKind.PEER_TO_PEER,
+                eval_response=[
+                    ('Do you know hot to dance? 🕺', 'Of course!'),
+                    ('Question two', 'Answer two'),
+                ],
+                filename="Peer evaluation",
+                line_number=10
+            )
+        ]
+        insert_index = 100
+
+        # when:
+        self.sut.insert_eval_report_in_document(
+            eval_process_id,
+            document_id,
+            reviewee,
+            reviewee_evaluations)
+
+        # then:
+        requests = self.sut.get_calls()['batch_update'][0]['requests']
+        insert_text = requests[0]['insertText']
+        self.assertEqual(insert_index, insert_text['location']['index'])
+        text = insert_text['text'].encode('utf-16-le')
+
+        styled_texts = []
+        for request in requests[1:-1]:
+            text_range = request['updateTextStyle']['range']
+            start = (text_range['startIndex'] - insert_index) * 2
+            end = (text_range['endIndex'] - insert_index) * 2
+            styled_texts.append(text[start:end].decode('utf-16-le'))
+
+        self.assertEqual([
+            '2020 Q2',
+            'Reviewer: reviewer, kind: Report by peer',
+            'Do you know hot to dance? 🕺',
+            'Question two',
+        ], styled_texts)
+        self.assertEqual(
+            reviewee,
+            requests[-1]['replaceAllText']['replaceText'])
+
+    def test_insert_eval_report_in_document_when_document_exist(self):
+        # given:
+        document_id = 'ID'
+        self.sut.set_start_index(4)
+        self.sut.set_end_index(0)
+
+        # when:
+        self.sut.insert_eval_report_in_document('', document_id, '', [])
+
+        # then:
+        calls = self.sut.get_calls()
+        requests = calls['batch_update'][0]['requests']
+        self.assertEqual(1, len(calls['get_document']))
+        self.assertEqual(1, len(calls['batch_update']))
+        self.assertEqual(
+            {'segmentId': '', 'startIndex': 1, 'endIndex': 4},
+            requests[0]['deleteContentRange']['range'])
+        self.assertEqual(1, requests[1]['insertText']['location']['index'])
+
+    def test_insert_eval_report_in_document_from_template_reads_template_once(self):
+        # given:
+        template_id = 'TEMPLATE_ID'
+        document_ids = ['ID1', 'ID2', 'ID3']
+
+        # when:
+        for document_id in document_ids:
+            self.sut.insert_eval_report_in_document(
+                '', document_id, '', [], template_id=template_id)
+
+        # then:
+        calls = self.sut.get_calls()
+        self.assertEqual(1, len(calls['get_document']))
+        self.assertEqual(
+            template_id,
+            calls['get_document'][0]['document_id'])
+        self.assertEqual(
+            document_ids,
+            [call['document_id'] for call in calls['batch_update'].values()])
 
     def test_empty_document_when_empty_file(self):
         # given:
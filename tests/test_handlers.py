@@ -0,0 +1,407 @@
+import gzip
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from tornado.log import app_log
+from tornado.simple_httpclient import HTTPStreamClosedError
+from tornado.testing import AsyncHTTPTestCase, ExpectLog, gen_test
+from tornado.web import Application
+
+from evalytics.cache import ResponseCache, RecordsIndex
+from evalytics.handlers import UseCaseHandler, CachedResponseHandler, JobsHandler
+from evalytics.handlers import StreamedResponseHandler, JsonGZipContentEncoding
+from evalytics.handlers import PagedResponseHandler, MetricsHandler
+from evalytics.jobs import JobStore, JobQueue
+from evalytics.tracing import Tracing, traced
+
+from tests.test_jobs import ImmediateExecutor, PendingExecutor, MockRunner
+from tests.test_tracing import MockSpanExporter
+
+class BlockingUseCase:
+
+    release = threading.Event()
+
+    def run(self):
+        BlockingUseCase.release.wait(timeout=5)
+        return 'blocking'
+
+class FastUseCase:
+
+    def run(self, name):
+        return name
+
+class BlockingHandler(UseCaseHandler):
+    path = r"/blocking"
+
+    async def get(self):
+        self.finish({'response': await self.run_use_case(BlockingUseCase().run)})
+
+class TracedUseCase:
+
+    @traced('TracedUseCase.run')
+    def run(self):
+        return 'traced'
+
+class TracedHandler(UseCaseHandler):
+    path = r"/traced"
+
+    async def get(self):
+        self.finish({'response': await self.run_use_case(TracedUseCase().run)})
+
+class FastHandler(UseCaseHandler):
+    path = r"/fast"
+
+    async def get(self):
+        self.finish({'response': await self.run_use_case(FastUseCase().run, 'fast')})
+
+class CountingUseCase:
+
+    calls = 0
+
+    def run(self):
+        CountingUseCase.calls += 1
+        return CountingUseCase.calls
+
+class CountingHandler(CachedResponseHandler):
+    path = r"/counting"
+
+    async def get(self):
+        calls = await self.run_use_case(CountingUseCase().run)
+        self.finish({'success': calls < 100, 'response': {'calls': calls}})
+
+    async def post(self):
+        self.application.settings['response_cache'].invalidate()
+        self.finish({'success': True})
+
+class StreamingHandler(StreamedResponseHandler):
+    path = r"/streaming"
+
+    async def get(self):
+        fail_at = int(self.get_argument('fail_at', '-1'))
+        records = self.build_records(fail_at)
+
+        try:
+            stream_format = self.get_stream_format()
+            if stream_format == self.STREAM_NDJSON:
+                await self.stream_ndjson(records)
+            elif stream_format == self.STREAM_JSON:
+                await self.stream_json('{"success": true, "records": [', records, ']}')
+            else:
+                self.finish({'success': True, 'records': list(records)})
+        except ValueError as e:
+            self.finish({'success': False, 'error': str(e)})
+
+    def build_records(self, fail_at):
+        for i in range(250):
+            if i == fail_at:
+                raise ValueError('Record %d is broken' % i)
+            yield {'uid': 'uid%d' % i}
+
+class PagingHandler(PagedResponseHandler):
+    path = r"/paging"
+
+    computed = 0
+
+    async def get(self):
+        try:
+            uids, records, next_cursor = await self.get_page(self.compute_records, False)
+            self.finish({
+                'success': True,
+                'uids': uids,
+                'records': self.project(records, {'evals_count': lambda r: len(r['evals'])}),
+                'next_cursor': next_cursor,
+            })
+        except ValueError as e:
+            self.finish({'success': False, 'error': str(e)})
+
+    def compute_records(self):
+        PagingHandler.computed += 1
+        records = {}
+        for i in range(5):
+            records.update({
+                'uid%d' % i: {'employee': {'uid': 'uid%d' % i, 'area': 'area'}, 'evals': [1] * i}
+            })
+        return records
+
+class TestUseCaseHandler(AsyncHTTPTestCase):
+
+    def get_app(self):
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        return Application(
+            [(h.path, h) for h in [BlockingHandler, FastHandler]],
+            executor=self.executor)
+
+    def tearDown(self):
+        BlockingUseCase.release.set()
+        super().tearDown()
+        self.executor.shutdown(wait=True)
+
+    @gen_test
+    async def test_blocking_use_case_does_not_block_other_requests(self):
+        BlockingUseCase.release.clear()
+        blocking = self.http_client.fetch(self.get_url('/blocking'))
+
+        fast = await self.http_client.fetch(self.get_url('/fast'))
+
+        self.assertEqual(b'{"response": "fast"}', fast.body)
+        self.assertFalse(blocking.done())
+
+        BlockingUseCase.release.set()
+        blocking_response = await blocking
+        self.assertEqual(b'{"response": "blocking"}', blocking_response.body)
+
+class TestTracedUseCaseHandler(AsyncHTTPTestCase):
+
+    def get_app(self):
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.exporter = MockSpanExporter()
+        Tracing.configure(self.exporter)
+        return Application(
+            [(TracedHandler.path, TracedHandler)],
+            executor=self.executor)
+
+    def tearDown(self):
+        Tracing.configure(None)
+        super().tearDown()
+        self.executor.shutdown(wait=True)
+
+    def test_request_is_the_root_span_of_its_use_case(self):
+        response = self.fetch('/traced')
+
+        use_case, request = self.exporter.spans
+        self.assertEqual('GET /traced', request.name)
+        self.assertEqual(200, request.attributes['http.status_code'])
+        self.assertTrue(request.is_root())
+        self.assertEqual(request.span_id, use_case.parent_span_id)
+        self.assertEqual(request.trace_id, response.headers['X-Trace-Id'])
+
+    def test_no_trace_id_when_tracing_is_off(self):
+        Tracing.configure(None)
+
+        response = self.fetch('/traced')
+
+        self.assertNotIn('X-Trace-Id', response.headers)
+
+class TestJobsHandler(AsyncHTTPTestCase):
+
+    def get_app(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.job_queue = JobQueue(
+            JobStore(os.path.join(self.directory.name, 'jobs.sqlite')),
+            ImmediateExecutor(),
+            {'kind': MockRunner(['uid1'])})
+        return Application([(JobsHandler.path, JobsHandler)], job_queue=self.job_queue)
+
+    def tearDown(self):
+        super().tearDown()
+        self.directory.cleanup()
+
+    def test_get_job(self):
+        job_id = self.job_queue.submit('kind', {})
+
+        response = json.loads(self.fetch('/jobs/%s' % job_id).body)
+
+        self.assertTrue(response['success'])
+        self.assertEqual(job_id, response['response']['job']['id'])
+        self.assertEqual('finished', response['response']['job']['status'])
+        self.assertEqual({'uid1': {'item': 'uid1'}}, response['response']['job']['result']['done'])
+
+    def test_get_job_when_job_does_not_exist(self):
+        response = json.loads(self.fetch('/jobs/0123abcd').body)
+
+        self.assertFalse(response['success'])
+        self.assertEqual('Job not found: 0123abcd', response['response']['error'])
+
+class MetricsHandlerSut(MetricsHandler):
+
+    def get_snapshot_cache(self):
+        return None
+
+class TestMetricsHandler(AsyncHTTPTestCase):
+
+    def get_app(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.job_queue = JobQueue(
+            JobStore(os.path.join(self.directory.name, 'jobs.sqlite')),
+            PendingExecutor(),
+            {'kind': MockRunner([])})
+        self.response_cache = ResponseCache(ttl_seconds=60)
+        return Application(
+            [(MetricsHandler.path, MetricsHandlerSut), (FastHandler.path, FastHandler)],
+            job_queue=self.job_queue,
+            response_cache=self.response_cache)
+
+    def tearDown(self):
+        super().tearDown()
+        self.directory.cleanup()
+
+    def test_get(self):
+        self.fetch('/fast')
+        self.job_queue.submit('kind', {})
+        self.response_cache.put('key', b'{}')
+        self.response_cache.get('key')
+        self.response_cache.get('missing')
+
+        response = self.fetch('/metrics')
+        lines = response.body.decode().splitlines()
+
+        self.assertEqual(200, response.code)
+        self.assertEqual(MetricsHandler.CONTENT_TYPE, response.headers['Content-Type'])
+        self.assertIn(
+            'evalytics_http_request_duration_seconds_count'
+            '{handler="FastHandler",method="GET",code="200"}',
+            ' '.join(lines))
+        self.assertIn('evalytics_cache_lookups_total{cache="response_cache",result="hit"} 1.0', lines)
+        self.assertIn('evalytics_cache_lookups_total{cache="response_cache",result="miss"} 1.0', lines)
+        self.assertIn('evalytics_cache_hit_ratio{cache="response_cache"} 0.5', lines)
+        self.assertIn('evalytics_jobs{status="queued"} 1.0', lines)
+        self.assertIn('evalytics_jobs{status="running"} 0.0', lines)
+
+class TestCachedResponseHandler(AsyncHTTPTestCase):
+
+    def get_app(self):
+        CountingUseCase.calls = 0
+        self.response_cache = ResponseCache(ttl_seconds=60)
+        return Application(
+            [(CountingHandler.path, CountingHandler)],
+            response_cache=self.response_cache)
+
+    def test_get_is_served_from_cache(self):
+        first = self.fetch('/counting?b=2&a=1')
+        second = self.fetch('/counting?a=1&b=2')
+
+        self.assertEqual(first.body, second.body)
+        self.assertEqual(first.headers['Etag'], second.headers['Etag'])
+        self.assertEqual(1, CountingUseCase.calls)
+
+    def test_get_with_force_refresh(self):
+        self.fetch('/counting')
+        response = self.fetch('/counting?force_refresh=true')
+
+        self.assertEqual({'calls': 2}, json.loads(response.body)['response'])
+        self.assertEqual(
+            {'calls': 2},
+            json.loads(self.fetch('/counting').body)['response'])
+
+    def test_get_with_if_none_match(self):
+        etag = self.fetch('/counting').headers['Etag']
+
+        response = self.fetch('/counting', headers={'If-None-Match': etag})
+
+        self.assertEqual(304, response.code)
+        self.assertEqual(b'', response.body)
+
+    def test_get_after_invalidation(self):
+        first = self.fetch('/counting')
+        self.fetch('/counting', method='POST', body='')
+
+        second = self.fetch('/counting')
+
+        self.assertNotEqual(first.headers['Etag'], second.headers['Etag'])
+        self.assertEqual(2, CountingUseCase.calls)
+
+    def test_failed_responses_are_not_cached(self):
+        CountingUseCase.calls = 100
+
+        self.fetch('/counting')
+        self.fetch('/counting')
+
+        self.assertEqual(102, CountingUseCase.calls)
+
+class TestStreamedResponseHandler(AsyncHTTPTestCase):
+
+    def get_app(self):
+        self.response_cache = ResponseCache(ttl_seconds=60)
+        return Application(
+            [(StreamingHandler.path, StreamingHandler)],
+            transforms=[JsonGZipContentEncoding],
+            response_cache=self.response_cache)
+
+    def test_stream_json(self):
+        response = self.fetch('/streaming?stream=json')
+
+        self.assertEqual(json.loads(self.fetch('/streaming').body), json.loads(response.body))
+        self.assertEqual(0, self.response_cache.get_stats()['hits'])
+
+    def test_stream_ndjson(self):
+        response = self.fetch('/streaming?stream=ndjson')
+
+        lines = response.body.decode('utf-8').splitlines()
+        self.assertTrue(response.headers['Content-Type'].startswith('application/x-ndjson'))
+        self.assertEqual(250, len(lines))
+        self.assertEqual({'uid': 'uid249'}, json.loads(lines[-1]))
+
+    def test_stream_error_before_first_record_is_answered(self):
+        response = self.fetch('/streaming?stream=json&fail_at=0')
+
+        self.assertEqual(200, response.code)
+        self.assertEqual(
+            {'success': False, 'error': 'Record 0 is broken'},
+            json.loads(response.body))
+
+    def test_stream_error_after_first_flush_aborts_stream(self):
+        with ExpectLog(app_log, 'Aborting stream of /streaming.* after 100 records'):
+            with self.assertRaises(HTTPStreamClosedError):
+                self.fetch('/streaming?stream=json&fail_at=150')
+
+    def test_stream_ndjson_gzipped(self):
+        response = self.fetch(
+            '/streaming?stream=ndjson',
+            headers={'Accept-Encoding': 'gzip'},
+            decompress_response=False)
+
+        self.assertEqual('gzip', response.headers['Content-Encoding'])
+        self.assertEqual(250, len(gzip.decompress(response.body).splitlines()))
+
+    def test_not_streamed_response_gzipped(self):
+        response = self.fetch(
+            '/streaming',
+            headers={'Accept-Encoding': 'gzip'},
+            decompress_response=False)
+
+        self.assertEqual('gzip', response.headers['Content-Encoding'])
+        self.assertEqual(250, len(json.loads(gzip.decompress(response.body))['records']))
+
+class TestPagedResponseHandler(AsyncHTTPTestCase):
+
+    def get_app(self):
+        PagingHandler.computed = 0
+        return Application(
+            [(PagingHandler.path, PagingHandler)],
+            records_index=RecordsIndex(ttl_seconds=60))
+
+    def test_get_pages(self):
+        uids = []
+        cursor = None
+        pages = 0
+        while True:
+            url = '/paging?limit=2'
+            if cursor is not None:
+                url += '&cursor=' + cursor
+            response = json.loads(self.fetch(url).body)
+            uids += response['uids']
+            pages += 1
+            cursor = response['next_cursor']
+            if cursor is None:
+                break
+
+        self.assertEqual(['uid0', 'uid1', 'uid2', 'uid3', 'uid4'], uids)
+        self.assertEqual(3, pages)
+        self.assertEqual(1, PagingHandler.computed)
+
+    def test_get_with_fields(self):
+        response = json.loads(self.fetch('/paging?fields=employee.uid,evals_count').body)
+
+        self.assertEqual(
+            {'employee': {'uid': 'uid4'}, 'evals_count': 4},
+            response['records'][4])
+        self.assertIsNone(response['next_cursor'])
+
+    def test_get_with_invalid_limit(self):
+        response = json.loads(self.fetch('/paging?limit=0').body)
+
+        self.assertFalse(response['success'])
+        self.assertEqual('Invalid limit: 0', response['error'])
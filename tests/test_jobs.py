@@ -0,0 +1,280 @@
+import multiprocessing
+import os
+import tempfile
+from unittest import TestCase
+
+from evalytics.jobs import JobStore, JobQueue, JobProgress
+from evalytics.jobs import EvalReportsJob, CommunicationsJob
+
+def start_job(path, kind, params):
+    'Starts a job from another process, which exits before finishing it'
+    store = JobStore(path)
+    store.start(store.create(kind, params))
+
+class ImmediateExecutor:
+    'Runs every submitted function right away, in the caller thread'
+
+    def submit(self, function, *args):
+        function(*args)
+
+class PendingExecutor:
+    'Keeps every submitted function, as a server stopped before running them'
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, function, *args):
+        self.submitted.append((function, args))
+
+class MockRunner:
+
+    def __init__(self, items, failing_items=(), error=None):
+        self.items = items
+        self.failing_items = failing_items
+        self.error = error
+        self.runs = []
+
+    def run(self, params, pending_items, progress):
+        self.runs.append((params, pending_items))
+        items = pending_items if pending_items is not None else self.items
+
+        progress.set_items(items)
+        for item in items:
+            progress.add_result(
+                item, {'item': item}, failed=item in self.failing_items)
+
+        if self.error is not None:
+            raise self.error
+        return {'total': len(items)}
+
+    def get_result(self, done, failed, result):
+        return {
+            'done': done,
+            'failed': failed,
+            'summary': result,
+        }
+
+class TestJobStore(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.sut = JobStore(os.path.join(self.directory.name, 'cache', 'jobs.sqlite'))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_create(self):
+        job_id = self.sut.create('kind', {'uids': ['uid1']})
+
+        job = self.sut.get(job_id)
+
+        self.assertEqual(job_id, job['id'])
+        self.assertEqual('kind', job['kind'])
+        self.assertEqual({'uids': ['uid1']}, job['params'])
+        self.assertEqual(JobStore.QUEUED, job['status'])
+        self.assertIsNone(job['started_at'])
+        self.assertEqual([], job['items'])
+
+    def test_get_when_job_does_not_exist(self):
+        self.assertIsNone(self.sut.get('0123abcd'))
+
+    def test_items(self):
+        job_id = self.sut.create('kind', {})
+        progress = JobProgress(self.sut, job_id)
+
+        progress.set_items(['uid1', 'uid2', 'uid3'])
+        progress.add_result('uid2', {'error': 'Exception()'}, failed=True)
+        progress.add_result('uid1', {'elapsed_seconds': 1})
+        progress.set_items(['uid1'])
+
+        self.assertEqual([
+            ('uid1', JobStore.ITEM_DONE, {'elapsed_seconds': 1}),
+            ('uid2', JobStore.ITEM_FAILED, {'error': 'Exception()'}),
+            ('uid3', JobStore.ITEM_PENDING, None),
+        ], self.sut.get(job_id)['items'])
+
+    def test_get_unfinished(self):
+        finished = self.sut.create('kind', {})
+        running = self.sut.create('kind', {})
+        queued = self.sut.create('kind', {})
+        self.sut.start(finished)
+        self.sut.finish(finished, result={})
+        self.sut.start(running)
+
+        self.assertEqual([running, queued], self.sut.get_unfinished())
+
+    def test_start_keeps_first_started_at(self):
+        job_id = self.sut.create('kind', {})
+        self.sut.start(job_id)
+        started_at = self.sut.get(job_id)['started_at']
+
+        self.sut.start(job_id)
+
+        self.assertEqual(started_at, self.sut.get(job_id)['started_at'])
+
+    def test_count_by_status(self):
+        finished = self.sut.create('kind', {})
+        self.sut.create('kind', {})
+        self.sut.create('kind', {})
+        self.sut.finish(finished, result={})
+
+        self.assertEqual(
+            {JobStore.QUEUED: 2, JobStore.FINISHED: 1},
+            self.sut.count_by_status())
+
+class TestJobQueue(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = JobStore(os.path.join(self.directory.name, 'jobs.sqlite'))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_submit(self):
+        runner = MockRunner(['uid1', 'uid2'], failing_items=['uid2'])
+        sut = JobQueue(self.store, ImmediateExecutor(), {'kind': runner})
+
+        job_id = sut.submit('kind', {'area': 'area'})
+        job = sut.get_job(job_id)
+
+        self.assertEqual([({'area': 'area'}, None)], runner.runs)
+        self.assertEqual(JobStore.FINISHED, job['status'])
+        self.assertEqual(
+            {'total': 2, 'done': 1, 'failed': 1, 'pending': 0},
+            job['progress'])
+        self.assertEqual({
+            'done': {'uid1': {'item': 'uid1'}},
+            'failed': {'uid2': {'item': 'uid2'}},
+            'summary': {'total': 2},
+        }, job['result'])
+        self.assertGreaterEqual(job['timings']['elapsed_seconds'], 0)
+
+    def test_submit_when_job_kind_does_not_exist(self):
+        sut = JobQueue(self.store, ImmediateExecutor(), {})
+
+        with self.assertRaises(ValueError):
+            sut.submit('kind', {})
+
+    def test_submit_when_runner_raises(self):
+        runner = MockRunner(['uid1'], error=Exception('boom'))
+        sut = JobQueue(self.store, ImmediateExecutor(), {'kind': runner})
+
+        job = sut.get_job(sut.submit('kind', {}))
+
+        self.assertEqual(JobStore.FAILED, job['status'])
+        self.assertEqual("Exception('boom')", job['error'])
+        self.assertEqual(1, job['progress']['done'])
+
+    def test_get_job_while_queued(self):
+        sut = JobQueue(self.store, PendingExecutor(), {'kind': MockRunner([])})
+
+        job = sut.get_job(sut.submit('kind', {}))
+
+        self.assertEqual(JobStore.QUEUED, job['status'])
+        self.assertIsNone(job['timings']['elapsed_seconds'])
+
+    def test_get_depth(self):
+        sut = JobQueue(self.store, PendingExecutor(), {'kind': MockRunner([])})
+        sut.submit('kind', {})
+        sut.submit('kind', {})
+
+        self.assertEqual(
+            {JobStore.QUEUED: 2, JobStore.RUNNING: 0},
+            sut.get_depth())
+
+    def test_get_job_when_job_does_not_exist(self):
+        sut = JobQueue(self.store, ImmediateExecutor(), {})
+
+        self.assertIsNone(sut.get_job('0123abcd'))
+
+    def test_resume_runs_pending_items(self):
+        job_id = self.store.create('kind', {'area': 'area'})
+        self.store.start(job_id)
+        progress = JobProgress(self.store, job_id)
+        progress.set_items(['uid1', 'uid2', 'uid3'])
+        progress.add_result('uid1', {'item': 'uid1'})
+        self.store.release_unfinished()
+        runner = MockRunner(['uid1', 'uid2', 'uid3'])
+        sut = JobQueue(self.store, ImmediateExecutor(), {'kind': runner})
+
+        resumed = sut.resume()
+        job = sut.get_job(job_id)
+
+        self.assertEqual([job_id], resumed)
+        self.assertEqual([({'area': 'area'}, ['uid2', 'uid3'])], runner.runs)
+        self.assertEqual(JobStore.FINISHED, job['status'])
+        self.assertEqual(3, job['progress']['done'])
+
+    def test_resume_skips_jobs_of_live_processes(self):
+        self.store.create('kind', {'job': 1})
+        runner = MockRunner([])
+        sut = JobQueue(self.store, ImmediateExecutor(), {'kind': runner})
+
+        resumed = sut.resume()
+
+        self.assertEqual([], resumed)
+        self.assertEqual([], runner.runs)
+
+    def test_resume_jobs_of_finished_processes(self):
+        # given
+        process = multiprocessing.Process(
+            target=start_job, args=(self.store.path, 'kind', {'job': 1}))
+        process.start()
+        process.join()
+        job_id = self.store.get_unfinished()[0]
+        runner = MockRunner(['uid1'])
+        sut = JobQueue(self.store, ImmediateExecutor(), {'kind': runner})
+
+        # when
+        resumed = sut.resume()
+
+        # then
+        self.assertEqual([job_id], resumed)
+        self.assertEqual([({'job': 1}, None)], runner.runs)
+        self.assertEqual(JobStore.FINISHED, sut.get_job(job_id)['status'])
+
+    def test_resume_claims_each_job_once(self):
+        job_id = self.store.create('kind', {})
+        self.store.release_unfinished()
+        sut = JobQueue(self.store, PendingExecutor(), {'kind': MockRunner([])})
+
+        first = sut.resume()
+        second = sut.resume()
+
+        self.assertEqual([job_id], first)
+        self.assertEqual([], second)
+
+    def test_resume_job_without_items_from_the_start(self):
+        job_id = self.store.create('kind', {})
+        self.store.release_unfinished()
+        runner = MockRunner(['uid1'])
+        sut = JobQueue(self.store, ImmediateExecutor(), {'kind': runner})
+
+        sut.resume()
+
+        self.assertEqual([({}, None)], runner.runs)
+        self.assertEqual(JobStore.FINISHED, sut.get_job(job_id)['status'])
+
+class TestJobRunners(TestCase):
+
+    def test_eval_reports_result(self):
+        result = EvalReportsJob().get_result(
+            {'uid1': {'employee': 'uid1'}},
+            {'uid2': {'employee': 'uid2', 'error': 'Exception()'}},
+            {'permissions': {'issued': 1}})
+
+        self.assertEqual({
+            'created': {'uid1': {'employee': 'uid1'}},
+            'not_created': {'uid2': {'employee': 'uid2', 'error': 'Exception()'}},
+            'permissions': {'issued': 1},
+        }, result)
+
+    def test_communications_result(self):
+        result = CommunicationsJob().get_result(
+            {'uid1': {}}, {'uid2': {}}, None)
+
+        self.assertEqual({
+            'comms_sent': ['uid1'],
+            'comms_not_sent': ['uid2'],
+        }, result)
@@ -6,6 +6,7 @@ from evalytics.mappers import ReviewerResponseToJson
 from evalytics.mappers import GoogleApiClientHttpErrorToJson
 from evalytics.mappers import JsonToReviewer, ReviewerToJsonObject
 from evalytics.mappers import StrToBool, JsonToList, ListToJson
+from evalytics.mappers import JsonProjection, PageCursor
 from evalytics.mappers import ResponseFileNameToEvalKind
 
 from evalytics.models import Reviewer, Employee, Eval, EvalKind
@@ -284,6 +285,45 @@ class TestListToJson(TestCase):
 
         self.assertEqual('[1, 2, 3, 4]', result)
 
+class TestJsonProjection(TestCase):
+
+    def setUp(self):
+        self.sut = JsonProjection()
+        self.reviewer = {
+            'employee': {'uid': 'uid1', 'mail': 'uid1@company.com'},
+            'evals': [{'reviewee': 'uid2'}, {'reviewee': 'uid3'}],
+        }
+
+    def test_project_json(self):
+        projected = self.sut.project_json(
+            self.reviewer,
+            ['employee.uid', 'employee.area', 'evals_count', 'missing'],
+            {'evals_count': lambda reviewer: len(reviewer['evals'])})
+
+        self.assertEqual({
+            'employee': {'uid': 'uid1'},
+            'evals_count': 2,
+        }, projected)
+
+    def test_project_json_whole_field(self):
+        projected = self.sut.project_json(self.reviewer, ['evals'])
+
+        self.assertEqual({'evals': self.reviewer['evals']}, projected)
+
+class TestPageCursor(TestCase):
+
+    def setUp(self):
+        self.sut = PageCursor()
+
+    def test_cursor_to_uid(self):
+        cursor = self.sut.uid_to_cursor('uid ñ')
+
+        self.assertEqual('uid ñ', self.sut.cursor_to_uid(cursor))
+
+    def test_cursor_to_uid_when_cursor_is_invalid(self):
+        with self.assertRaises(ValueError):
+            self.sut.cursor_to_uid('not a cursor')
+
 class ResponseFileNameToEvalKindSut(ResponseFileNameToEvalKind, MockConfig):
     'Inject a mock into ResponseFileNameToEvalKind dependency'
 
@@ -0,0 +1,143 @@
+from unittest import TestCase
+
+from evalytics.metrics import Counter, Histogram, CallbackGauge, CallbackCounter
+from evalytics.metrics import MetricsRegistry, Metrics
+
+class MockHttpError(Exception):
+
+    class Resp:
+        status = 429
+
+    resp = Resp()
+
+class TestCounter(TestCase):
+
+    def test_inc(self):
+        sut = Counter('calls_total', 'Calls', ('method',))
+
+        sut.inc('get')
+        sut.inc('get', amount=2)
+        sut.inc('list')
+
+        self.assertEqual(3, sut.get_value('get'))
+        self.assertEqual(1, sut.get_value('list'))
+        self.assertEqual(0, sut.get_value('create'))
+
+    def test_expose(self):
+        sut = Counter('calls_total', 'Calls', ('method',))
+        sut.inc('get')
+
+        self.assertEqual([
+            '# HELP calls_total Calls',
+            '# TYPE calls_total counter',
+            'calls_total{method="get"} 1.0',
+        ], sut.expose())
+
+    def test_expose_escapes_label_values(self):
+        sut = Counter('calls_total', 'Calls', ('method',))
+        sut.inc('"quoted"\\')
+
+        self.assertEqual(
+            'calls_total{method="\\"quoted\\"\\\\"} 1.0',
+            sut.expose()[-1])
+
+class TestHistogram(TestCase):
+
+    def test_expose_cumulative_buckets(self):
+        sut = Histogram('latency_seconds', 'Latency', ('handler',), buckets=(0.1, 1.0))
+
+        sut.observe(0.05, 'h')
+        sut.observe(0.1, 'h')
+        sut.observe(0.5, 'h')
+        sut.observe(5, 'h')
+
+        self.assertEqual([
+            '# HELP latency_seconds Latency',
+            '# TYPE latency_seconds histogram',
+            'latency_seconds_bucket{handler="h",le="0.1"} 2.0',
+            'latency_seconds_bucket{handler="h",le="1.0"} 3.0',
+            'latency_seconds_bucket{handler="h",le="+Inf"} 4.0',
+            'latency_seconds_sum{handler="h"} 5.65',
+            'latency_seconds_count{handler="h"} 4.0',
+        ], sut.expose())
+
+    def test_time(self):
+        sut = Histogram('latency_seconds', 'Latency', ('handler',))
+
+        with sut.time('h'):
+            pass
+
+        self.assertEqual(1, sut.get_count('h'))
+        self.assertEqual(0, sut.get_count('other'))
+
+class TestCallbackGauge(TestCase):
+
+    def test_expose_reads_callback(self):
+        values = {('queued',): 1}
+        sut = CallbackGauge('jobs', 'Jobs', ('status',), lambda: values)
+
+        first = sut.expose()
+        values.update({('running',): 2})
+        second = sut.expose()
+
+        self.assertEqual(['jobs{status="queued"} 1.0'], first[2:])
+        self.assertEqual(
+            ['jobs{status="queued"} 1.0', 'jobs{status="running"} 2.0'],
+            second[2:])
+
+    def test_counter_type(self):
+        sut = CallbackCounter('reads_total', 'Reads', (), lambda: {(): 3})
+
+        self.assertEqual([
+            '# HELP reads_total Reads',
+            '# TYPE reads_total counter',
+            'reads_total 3.0',
+        ], sut.expose())
+
+class TestMetricsRegistry(TestCase):
+
+    def test_expose(self):
+        sut = MetricsRegistry()
+        sut.register(Counter('registered_total', 'Registered')).inc()
+
+        exposition = sut.expose([CallbackGauge('extra', 'Extra', (), lambda: {(): 1})])
+
+        self.assertEqual(
+            '# HELP registered_total Registered\n'
+            '# TYPE registered_total counter\n'
+            'registered_total 1.0\n'
+            '# HELP extra Extra\n'
+            '# TYPE extra gauge\n'
+            'extra 1.0\n',
+            exposition)
+
+class TestMetrics(TestCase):
+
+    def test_time_google_api_call(self):
+        sut = Metrics()
+        calls = sut.google_api_calls.get_value('test', 'files.get', 'ok')
+
+        with sut.time_google_api_call('test', 'files.get'):
+            pass
+
+        self.assertEqual(calls + 1, sut.google_api_calls.get_value('test', 'files.get', 'ok'))
+
+    def test_time_google_api_call_records_http_status(self):
+        sut = Metrics()
+        calls = sut.google_api_calls.get_value('test', 'files.list', '429')
+
+        with self.assertRaises(MockHttpError):
+            with sut.time_google_api_call('test', 'files.list'):
+                raise MockHttpError()
+
+        self.assertEqual(calls + 1, sut.google_api_calls.get_value('test', 'files.list', '429'))
+
+    def test_time_slack_call_when_it_raises(self):
+        sut = Metrics()
+        calls = sut.slack_latency.get_count('test.method', 'error')
+
+        with self.assertRaises(Exception):
+            with sut.time_slack_call('test.method'):
+                raise Exception()
+
+        self.assertEqual(calls + 1, sut.slack_latency.get_count('test.method', 'error'))
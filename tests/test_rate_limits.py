@@ -0,0 +1,45 @@
+from unittest import TestCase
+
+from evalytics.rate_limits import GoogleApiRateLimiter
+
+class TestGoogleApiRateLimiter(TestCase):
+
+    def setUp(self):
+        self.sut = GoogleApiRateLimiter()
+
+    def tearDown(self):
+        GoogleApiRateLimiter.configure_rate_limits({})
+
+    def test_get_quota(self):
+        self.assertEqual('sheets_read', self.sut.get_quota('sheets.spreadsheets.values.get'))
+        self.assertEqual('sheets_read', self.sut.get_quota('sheets.spreadsheets.values.batchGet'))
+        self.assertEqual('sheets_write', self.sut.get_quota('sheets.spreadsheets.values.update', 'PUT'))
+        self.assertEqual('docs_read', self.sut.get_quota('docs.documents.get', 'GET'))
+        self.assertEqual('docs_write', self.sut.get_quota('docs.documents.batchUpdate', 'POST'))
+        self.assertEqual('drive', self.sut.get_quota('drive.files.copy', 'POST'))
+        self.assertEqual('gmail_send', self.sut.get_quota('gmail.users.messages.send', 'POST'))
+
+    def test_acquire_when_quota_has_no_limit(self):
+        GoogleApiRateLimiter.configure_rate_limits({'sheets_read': (1, 1)})
+        waits = self.sut.google_api_rate_limit_wait.get_count('drive')
+
+        self.sut.acquire_google_api_quota('drive.files.get', 'GET', requests=100)
+
+        self.assertEqual(waits, self.sut.google_api_rate_limit_wait.get_count('drive'))
+
+    def test_acquire_records_wait(self):
+        GoogleApiRateLimiter.configure_rate_limits({'gmail_send': (100, 1)})
+        waits = self.sut.google_api_rate_limit_wait.get_count('gmail_send')
+
+        self.sut.acquire_google_api_quota('gmail.users.messages.send', 'POST')
+        self.sut.acquire_google_api_quota('gmail.users.messages.send', 'POST')
+
+        self.assertEqual(waits + 2, self.sut.google_api_rate_limit_wait.get_count('gmail_send'))
+
+    def test_quotas_are_shared_by_every_caller(self):
+        GoogleApiRateLimiter.configure_rate_limits({'sheets_read': (1, 10)})
+
+        GoogleApiRateLimiter().acquire_google_api_quota('sheets.spreadsheets.values.batchGet', requests=10)
+
+        bucket = GoogleApiRateLimiter.rate_limits['sheets_read']
+        self.assertGreater(bucket.reserve(), 0.5)
@@ -0,0 +1,171 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from evalytics.renderers import MarkdownReportRenderer, HtmlReportRenderer
+from evalytics.renderers import PdfReportRenderer, ReportRendererFactory
+from evalytics.renderers import LocalReportWriter
+from evalytics.renderers import ReportDocument, ReportDocumentBuilder, StyleSpan
+from evalytics.models import EvalKind, ReviewerResponse
+from evalytics.exceptions import UnsupportedCharacterException
+
+UNICODE_FONT = '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+
+def reviewee_evaluations(answer='Of course!'):
+    return [
+        ReviewerResponse(
+            reviewee='reviewee',
+            reviewer='reviewer',
+            eval_kind=EvalKind.PEER_TO_PEER,
+            eval_response=[('Do you know how to dance?', answer)],
+            filename='Peer evaluation',
+            line_number=2
+        )
+    ]
+
+class TestReportDocument(TestCase):
+
+    def setUp(self):
+        self.sut = ReportDocument()
+
+    def test_append(self):
+        self.sut.append('\n')
+        self.sut.append('Title \U0001F57A', ReportDocument.EVAL_TITLE)
+        self.sut.append('\n')
+        self.sut.append('', ReportDocument.ANSWER)
+        self.sut.append('Question', ReportDocument.QUESTION)
+
+        self.assertEqual('\nTitle \U0001F57A\nQuestion', self.sut.get_text())
+        self.assertEqual([
+            StyleSpan(1, 8, ReportDocument.EVAL_TITLE),
+            StyleSpan(10, 8, ReportDocument.QUESTION),
+        ], self.sut.get_spans())
+        self.assertEqual([
+            (ReportDocument.EVAL_TITLE, 'Title \U0001F57A'),
+            (ReportDocument.ANSWER, ''),
+            (ReportDocument.QUESTION, 'Question'),
+        ], self.sut.get_parts())
+
+class TestReportDocumentBuilder(TestCase):
+
+    def setUp(self):
+        self.sut = ReportDocumentBuilder()
+
+    def test_build_report_document(self):
+        document = self.sut.build_report_document('2020 Q2', reviewee_evaluations())
+
+        self.assertEqual(
+            '\n2020 Q2\n'
+            '\n\nReviewer: reviewer, kind: Report by peer\n'
+            '\nDo you know how to dance?\nOf course!\n'
+            '\n',
+            document.get_text())
+        text = document.get_text()
+        for span in document.get_spans():
+            self.assertNotIn('\n', text[span.offset:span.offset + span.length])
+
+    def test_build_report_document_with_many_reviewers(self):
+        evaluations = reviewee_evaluations('answer ' * 500) * 2000
+
+        document = self.sut.build_report_document('2020 Q2', evaluations)
+
+        self.assertEqual(3 * 2000 + 1, len(document.get_spans()))
+
+class TestMarkdownReportRenderer(TestCase):
+
+    def setUp(self):
+        self.sut = MarkdownReportRenderer()
+
+    def test_render(self):
+        content = self.sut.render('2020 Q2', 'reviewee', reviewee_evaluations())
+
+        self.assertEqual(
+            '# 2020 Q2\n'
+            '\n'
+            'Employee: reviewee\n'
+            '\n'
+            '## Reviewer: reviewer, kind: Report by peer\n'
+            '\n'
+            '### Do you know how to dance?\n'
+            '\n'
+            'Of course!\n',
+            content.decode('utf-8'))
+
+class TestHtmlReportRenderer(TestCase):
+
+    def setUp(self):
+        self.sut = HtmlReportRenderer()
+
+    def test_render_escapes_responses(self):
+        content = self.sut.render(
+            '2020 Q2', 'reviewee', reviewee_evaluations('<b>Yes</b> & no')).decode('utf-8')
+
+        self.assertIn('<h2>Reviewer: reviewer, kind: Report by peer</h2>', content)
+        self.assertIn('<p class="answer">&lt;b&gt;Yes&lt;/b&gt; &amp; no</p>', content)
+
+class TestPdfReportRenderer(TestCase):
+
+    def setUp(self):
+        self.sut = PdfReportRenderer()
+
+    def test_render(self):
+        content = self.sut.render('2020 Q2', 'reviewee', reviewee_evaluations('Sí (claro)'))
+
+        self.assertTrue(content.startswith(b'%PDF-'))
+        self.assertTrue(content.rstrip().endswith(b'%%EOF'))
+        self.assertIn(b'/BaseFont /Helvetica', content)
+
+    def test_render_with_unicode_font(self):
+        if not os.path.exists(UNICODE_FONT):
+            self.skipTest('%s not installed' % UNICODE_FONT)
+        sut = PdfReportRenderer(UNICODE_FONT)
+
+        content = sut.render('2020 Q2', 'reviewee', reviewee_evaluations('Да, конечно'))
+
+        self.assertTrue(content.startswith(b'%PDF-'))
+        self.assertIn(b'/FontFile2', content)
+
+    def test_render_when_character_not_in_font(self):
+        with self.assertRaises(UnsupportedCharacterException) as context:
+            self.sut.render('2020 Q2', 'reviewee', reviewee_evaluations('Sí \U0001F57A'))
+
+        self.assertIn('U+1F57A', context.exception.message)
+
+    def test_render_long_report_in_several_pages(self):
+        content = self.sut.render(
+            '2020 Q2', 'reviewee', reviewee_evaluations('long answer ' * 2000))
+
+        self.assertGreater(content.count(b'/Type /Page\n'), 1)
+
+class TestReportRendererFactory(TestCase):
+
+    def setUp(self):
+        self.sut = ReportRendererFactory()
+
+    def test_get_report_renderer(self):
+        self.assertIsInstance(self.sut.get_report_renderer('markdown'), MarkdownReportRenderer)
+        self.assertIsInstance(self.sut.get_report_renderer('html'), HtmlReportRenderer)
+        self.assertIsInstance(self.sut.get_report_renderer('pdf'), PdfReportRenderer)
+
+    def test_get_not_existent_report_renderer(self):
+        with self.assertRaises(ValueError):
+            self.sut.get_report_renderer('docx')
+
+class TestLocalReportWriter(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.sut = LocalReportWriter()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_write_report(self):
+        path = os.path.join(self.directory.name, 'reports')
+
+        file_path = self.sut.write_report(
+            MarkdownReportRenderer(), path, '2020 Q2', 'reviewee', reviewee_evaluations())
+
+        self.assertEqual(os.path.join(path, '2020 Q2', 'reviewee.md'), file_path)
+        with open(file_path, 'rb') as report_file:
+            self.assertIn(b'# 2020 Q2', report_file.read())
@@ -0,0 +1,122 @@
+import email.utils
+import json
+import time
+from unittest import TestCase
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from evalytics.retry import RetryPolicy, GoogleApiRetry
+
+def build_http_error(status, reasons=(), headers=None):
+    response = httplib2.Response(dict({'status': str(status)}, **(headers or {})))
+    content = json.dumps({
+        'error': {
+            'code': status,
+            'errors': [{'reason': reason} for reason in reasons],
+        }
+    }).encode('utf-8')
+    return HttpError(response, content)
+
+class FailingCall:
+
+    def __init__(self, errors, result='result'):
+        self.errors = list(errors)
+        self.result = result
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if len(self.errors) > 0:
+            raise self.errors.pop(0)
+        return self.result
+
+class TestRetryPolicy(TestCase):
+
+    def setUp(self):
+        self.sut = RetryPolicy(idempotent_methods=['sheets.spreadsheets.values.batchGetByDataFilter'])
+
+    def test_is_idempotent(self):
+        self.assertTrue(self.sut.is_idempotent('drive.files.get'))
+        self.assertTrue(self.sut.is_idempotent('sheets.spreadsheets.values.batchGet'))
+        self.assertTrue(self.sut.is_idempotent('drive.files.watch', 'GET'))
+        self.assertTrue(self.sut.is_idempotent('sheets.spreadsheets.values.batchGetByDataFilter', 'POST'))
+        self.assertFalse(self.sut.is_idempotent('drive.files.copy', 'POST'))
+        self.assertFalse(self.sut.is_idempotent('gmail.users.messages.send', 'POST'))
+
+    def test_rate_limit_is_retried_for_every_method(self):
+        self.assertEqual('429', self.sut.get_retry_reason(build_http_error(429), idempotent=False))
+        self.assertEqual('403', self.sut.get_retry_reason(
+            build_http_error(403, ['userRateLimitExceeded']), idempotent=False))
+
+    def test_forbidden_is_not_retried(self):
+        self.assertIsNone(self.sut.get_retry_reason(
+            build_http_error(403, ['insufficientPermissions']), idempotent=True))
+
+    def test_server_errors_are_only_retried_when_idempotent(self):
+        self.assertEqual('503', self.sut.get_retry_reason(build_http_error(503), idempotent=True))
+        self.assertIsNone(self.sut.get_retry_reason(build_http_error(503), idempotent=False))
+
+    def test_connection_errors_are_only_retried_when_idempotent(self):
+        self.assertEqual('connection', self.sut.get_retry_reason(ConnectionResetError(), idempotent=True))
+        self.assertIsNone(self.sut.get_retry_reason(ConnectionResetError(), idempotent=False))
+
+    def test_client_errors_are_not_retried(self):
+        self.assertIsNone(self.sut.get_retry_reason(build_http_error(404), idempotent=True))
+        self.assertIsNone(self.sut.get_retry_reason(ValueError(), idempotent=True))
+
+    def test_delay_is_capped_backoff_with_jitter(self):
+        sut = RetryPolicy(initial_delay_seconds=1, max_delay_seconds=4)
+
+        for attempt, backoff in [(1, 1), (2, 2), (3, 4), (10, 4)]:
+            for _ in range(20):
+                delay = sut.get_delay_seconds(attempt)
+                self.assertGreaterEqual(delay, 0)
+                self.assertLessEqual(delay, backoff)
+
+    def test_delay_honours_retry_after_seconds(self):
+        error = build_http_error(429, headers={'retry-after': '7'})
+
+        self.assertEqual(7, self.sut.get_delay_seconds(1, error))
+
+    def test_delay_honours_retry_after_date(self):
+        retry_at = email.utils.formatdate(time.time() + 30, usegmt=True)
+        error = build_http_error(503, headers={'retry-after': retry_at})
+
+        self.assertGreater(self.sut.get_delay_seconds(1, error), 25)
+
+class TestGoogleApiRetry(TestCase):
+
+    def setUp(self):
+        GoogleApiRetry.configure_retry(RetryPolicy(
+            max_attempts=3, initial_delay_seconds=0, max_delay_seconds=0))
+        self.sut = GoogleApiRetry()
+
+    def tearDown(self):
+        GoogleApiRetry.configure_retry(RetryPolicy())
+
+    def test_call_is_retried_until_it_succeeds(self):
+        retries = self.sut.google_api_retries.get_value('test', 'files.get', '429')
+        function = FailingCall([build_http_error(429), build_http_error(429)])
+
+        result = self.sut.call_with_retry(function, 'test.files.get', idempotent=True)
+
+        self.assertEqual('result', result)
+        self.assertEqual(3, function.calls)
+        self.assertEqual(retries + 2, self.sut.google_api_retries.get_value('test', 'files.get', '429'))
+
+    def test_call_raises_when_attempts_are_exhausted(self):
+        function = FailingCall([build_http_error(500)] * 3)
+
+        with self.assertRaises(HttpError):
+            self.sut.call_with_retry(function, 'test.files.get', idempotent=True)
+
+        self.assertEqual(3, function.calls)
+
+    def test_call_raises_not_retried_errors_right_away(self):
+        function = FailingCall([build_http_error(500)])
+
+        with self.assertRaises(HttpError):
+            self.sut.call_with_retry(function, 'test.files.create', idempotent=False)
+
+        self.assertEqual(1, function.calls)
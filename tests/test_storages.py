@@ -1,3 +1,5 @@
+import os
+import tempfile
 from unittest import TestCase
 
 from googledrive.exceptions import MissingGoogleDriveFolderException
@@ -9,6 +11,7 @@ from evalytics.storages import StorageFactory
 from evalytics.exceptions import MissingDataException, NoFormsException
 from evalytics.models import EvalKind, ReviewerResponse
 from evalytics.config import ProvidersConfig
+from evalytics.cache import EvalReportDigests
 
 from tests.common.mocks import MockGoogleAPI, MockConfig
 
@@ -30,6 +33,25 @@ class TestStorageFactory(TestCase):
 
         self.assertTrue(isinstance(storage, GoogleStorage))
 
+    def test_get_google_storage_when_force_refresh(self):
+        self.sut.set_storage_provider(ProvidersConfig.GOOGLE_DRIVE)
+
+        storage = self.sut.get_storage(force_refresh=True)
+
+        self.assertTrue(storage.force_refresh)
+        self.assertIsNone(storage.snapshot_cache)
+
+    def test_get_google_storage_when_incremental_eval_reports_enabled(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.sut.set_storage_provider(ProvidersConfig.GOOGLE_DRIVE)
+        self.sut.set_incremental_eval_reports_config(
+            True, os.path.join(directory.name, 'eval_reports.sqlite'))
+
+        storage = self.sut.get_storage()
+
+        self.assertIsInstance(storage.eval_report_digests, EvalReportDigests)
+
     def test_get_not_existent_storage(self):
         self.sut.set_storage_provider("NOT_EXISTENT")
 
@@ -278,6 +300,162 @@ class TestGoogleStorage(TestCase):
         # then:
         self.assertEqual(2, len(employee_managers_response))
 
+    def test_generate_eval_reports_skips_unchanged_reports(self):
+        # given:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        digests = EvalReportDigests(os.path.join(directory.name, 'digests.sqlite'))
+        self.sut.set_eval_report_digests(digests)
+
+        eval_report_file = GoogleFile(
+            id='guarevar',
+            name='PREFIX: pepe',
+            parents=['eval_reports_folder'],
+            mime_type='',
+            export_links={})
+        self.sut.set_gdrive_get_file_response(
+            "/google_folder/eval_reports_folder/PREFIX: pepe",
+            eval_report_file)
+
+        reviewee_evaluations = [
+            ReviewerResponse(
+                reviewee='pepe',
+                reviewer='pepe',
+                eval_kind=EvalKind.SELF,
+                eval_response=[('question', 'answer')],
+                filename="filename",
+                line_number=10
+            )
+        ]
+        changed_evaluations = [
+            ReviewerResponse(
+                reviewee='pepe',
+                reviewer='pepe',
+                eval_kind=EvalKind.SELF,
+                eval_response=[('question', 'new answer')],
+                filename="filename",
+                line_number=10
+            )
+        ]
+        employee_managers = ['jefe', 'manager']
+
+        # when:
+        first = self.sut.generate_eval_reports(
+            'pepe', reviewee_evaluations, employee_managers)
+        unchanged = self.sut.generate_eval_reports(
+            'pepe', reviewee_evaluations, employee_managers)
+        forced = self.sut.generate_eval_reports(
+            'pepe', reviewee_evaluations, employee_managers, force=True)
+        new_manager = self.sut.generate_eval_reports(
+            'pepe', reviewee_evaluations, ['jefe'])
+        changed = self.sut.generate_eval_reports(
+            'pepe', changed_evaluations, ['jefe'])
+
+        # then:
+        self.assertEqual(2, len(first))
+        self.assertIsNone(unchanged)
+        self.assertEqual(2, len(forced))
+        self.assertEqual(1, len(new_manager))
+        self.assertEqual(1, len(changed))
+        self.assertIsNotNone(digests.get('guarevar'))
+
+    def test_generate_eval_reports_when_digest_stored_but_no_eval_report(self):
+        # given:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        digests = EvalReportDigests(os.path.join(directory.name, 'digests.sqlite'))
+        self.sut.set_eval_report_digests(digests)
+
+        reviewee_evaluations = []
+        self.sut.generate_eval_reports('pepe', reviewee_evaluations, ['jefe'])
+
+        # when:
+        response = self.sut.generate_eval_reports('pepe', reviewee_evaluations, ['jefe'])
+
+        # then:
+        self.assertEqual(1, len(response))
+
+    def test_grant_eval_reports_permissions(self):
+        # given:
+        for reviewee, file_id in [('pepe', 'id_pepe'), ('juan', 'id_juan')]:
+            self.sut.set_gdrive_get_file_response(
+                "/google_folder/eval_reports_folder/PREFIX: {}".format(reviewee),
+                GoogleFile(
+                    id=file_id,
+                    name='PREFIX: {}'.format(reviewee),
+                    parents=['eval_reports_folder'],
+                    mime_type='',
+                    export_links={}))
+        self.sut.set_file_permissions('id_pepe', {'jefe@company.com': 'writer'})
+        self.sut.set_create_permission_fails('id_juan', 'ceo@company.com')
+        self.sut.set_is_add_comenter_to_evals_reports_enabled(True)
+
+        self.sut.generate_eval_reports('pepe', [], ['jefe', 'ceo'])
+        self.sut.generate_eval_reports('juan', [], ['jefe', 'ceo'])
+        self.sut.generate_eval_reports('juan', [], ['jefe', 'ceo'])
+
+        # when:
+        summary = self.sut.grant_eval_reports_permissions()
+
+        # then:
+        self.assertEqual({
+            'issued': 2,
+            'skipped': 1,
+            'failed': {
+                'juan': ['ceo@company.com']
+            },
+        }, summary)
+        calls = self.sut.get_calls()
+        self.assertNotIn('create_permission', calls)
+        self.assertEqual(1, len(calls['get_files_permissions']))
+        self.assertEqual(1, len(calls['batch_create_permissions']))
+        self.assertEqual(
+            {'issued': 0, 'skipped': 0, 'failed': {}},
+            self.sut.grant_eval_reports_permissions())
+
+    def test_grant_eval_reports_permissions_when_permissions_of_a_file_fail(self):
+        # given:
+        for reviewee, file_id in [('pepe', 'id_pepe'), ('juan', 'id_juan')]:
+            self.sut.set_gdrive_get_file_response(
+                "/google_folder/eval_reports_folder/PREFIX: {}".format(reviewee),
+                GoogleFile(
+                    id=file_id,
+                    name='PREFIX: {}'.format(reviewee),
+                    parents=['eval_reports_folder'],
+                    mime_type='',
+                    export_links={}))
+        self.sut.set_list_permissions_fails('id_juan')
+        self.sut.set_is_add_comenter_to_evals_reports_enabled(True)
+
+        self.sut.generate_eval_reports('pepe', [], ['jefe', 'ceo'])
+        self.sut.generate_eval_reports('juan', [], ['jefe', 'ceo'])
+
+        # when:
+        summary = self.sut.grant_eval_reports_permissions()
+
+        # then:
+        self.assertEqual({
+            'issued': 2,
+            'skipped': 0,
+            'failed': {
+                'juan': ['jefe@company.com', 'ceo@company.com']
+            },
+        }, summary)
+        self.assertEqual(
+            [('id_pepe', 'jefe@company.com'), ('id_pepe', 'ceo@company.com')],
+            self.sut.get_calls()['batch_create_permissions'][0]['permissions'])
+
+    def test_grant_eval_reports_permissions_when_add_comenter_is_disabled(self):
+        # given:
+        self.sut.generate_eval_reports('pepe', [], ['jefe', 'ceo'])
+
+        # when:
+        summary = self.sut.grant_eval_reports_permissions()
+
+        # then:
+        self.assertEqual({'issued': 0, 'skipped': 0, 'failed': {}}, summary)
+        self.assertNotIn('get_files_permissions', self.sut.get_calls())
+
     def test_get_peers_assignment(self):
         # given:
         foldername = 'google_folder'
@@ -0,0 +1,198 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+from evalytics.concurrency import ConcurrentMapper
+from evalytics.tracing import Span, JsonFileSpanExporter, Tracing
+from evalytics.tracing import traced, trace_public_methods
+from evalytics.tracing import read_traces, summarize_trace
+
+class MockSpanExporter:
+
+    def __init__(self):
+        self.spans = []
+
+    def start(self, span):
+        pass
+
+    def end(self, span):
+        self.spans.append(span)
+
+@trace_public_methods
+class TracedService:
+
+    def read(self, value):
+        return value
+
+    def iter_values(self):
+        yield 1
+
+    def _helper(self):
+        return 'helper'
+
+class MockTracedService(TracedService):
+
+    def read(self, value):
+        return 'mock'
+
+class TracedConcurrentMapper(ConcurrentMapper, Tracing):
+
+    @traced('map')
+    def map(self, items):
+        return super().concurrent_map(self.item, items, max_workers=2)
+
+    @traced('item')
+    def item(self, item):
+        return item
+
+class TestSpan(TestCase):
+
+    def test_child_span(self):
+        parent = Span('parent')
+        child = Span('child', parent)
+
+        self.assertTrue(parent.is_root())
+        self.assertEqual(parent.trace_id, child.trace_id)
+        self.assertEqual(parent.span_id, child.parent_span_id)
+        self.assertEqual(32, len(parent.trace_id))
+        self.assertEqual(16, len(parent.span_id))
+
+    def test_to_otlp(self):
+        parent = Span('parent')
+        sut = Span('GET /status', parent, Span.KIND_SERVER, {
+            'http.route': '/status',
+            'http.status_code': 200,
+        })
+        sut.set_error(Exception('boom'))
+        sut.end()
+
+        span = sut.to_otlp()
+
+        self.assertEqual(parent.span_id, span['parentSpanId'])
+        self.assertEqual(Span.KIND_SERVER, span['kind'])
+        self.assertEqual([
+            {'key': 'http.route', 'value': {'stringValue': '/status'}},
+            {'key': 'http.status_code', 'value': {'intValue': '200'}},
+        ], span['attributes'])
+        self.assertEqual({'code': Span.STATUS_ERROR, 'message': "Exception('boom')"}, span['status'])
+        self.assertGreaterEqual(int(span['endTimeUnixNano']), int(span['startTimeUnixNano']))
+
+class TestJsonFileSpanExporter(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'traces', 'spans.json')
+        self.sut = JsonFileSpanExporter(self.path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_spans_of_a_trace_are_written_with_their_root(self):
+        root = Span('root')
+        child = Span('child', root)
+        self.sut.start(root)
+        self.sut.start(child)
+
+        child.end()
+        self.sut.end(child)
+        written_before_root = os.path.exists(self.path)
+        root.end()
+        self.sut.end(root)
+
+        with open(self.path) as spans_file:
+            lines = spans_file.readlines()
+        spans = json.loads(lines[0])['resourceSpans'][0]['scopeSpans'][0]['spans']
+
+        self.assertFalse(written_before_root)
+        self.assertEqual(1, len(lines))
+        self.assertEqual(['child', 'root'], [span['name'] for span in spans])
+
+    def test_span_ending_after_its_root_is_written_alone(self):
+        root = Span('root')
+        late = Span('late', root)
+        self.sut.start(root)
+        root.end()
+        self.sut.end(root)
+
+        late.end()
+        self.sut.end(late)
+
+        traces = read_traces(self.path)
+
+        self.assertEqual(['root', 'late'], [span['name'] for span in traces[root.trace_id]])
+
+class TestTracing(TestCase):
+
+    def setUp(self):
+        self.exporter = MockSpanExporter()
+        Tracing.configure(self.exporter)
+
+    def tearDown(self):
+        Tracing.configure(None)
+
+    def test_trace_nests_spans(self):
+        sut = Tracing()
+
+        with sut.trace('parent') as parent:
+            with sut.trace('child') as child:
+                pass
+
+        self.assertEqual([child, parent], self.exporter.spans)
+        self.assertEqual(parent.span_id, child.parent_span_id)
+        self.assertIsNone(Tracing.current_span.get())
+
+    def test_trace_records_error(self):
+        with self.assertRaises(ValueError):
+            with Tracing().trace('failing'):
+                raise ValueError('boom')
+
+        self.assertEqual(Span.STATUS_ERROR, self.exporter.spans[0].status)
+
+    def test_trace_when_tracing_is_off(self):
+        Tracing.configure(None)
+
+        with Tracing().trace('span') as span:
+            pass
+
+        self.assertIsNone(span)
+        self.assertEqual([], self.exporter.spans)
+
+    def test_trace_public_methods(self):
+        sut = TracedService()
+
+        self.assertEqual('value', sut.read('value'))
+        self.assertEqual([1], list(sut.iter_values()))
+        self.assertEqual('helper', sut._helper())
+        self.assertEqual(['TracedService.read'], [span.name for span in self.exporter.spans])
+
+    def test_trace_public_methods_keeps_overrides(self):
+        sut = MockTracedService()
+
+        self.assertEqual('mock', sut.read('value'))
+        self.assertEqual([], self.exporter.spans)
+
+    def test_concurrent_map_spans_are_children_of_the_caller(self):
+        sut = TracedConcurrentMapper()
+
+        self.assertEqual([1, 2, 3], sut.map([1, 2, 3]))
+
+        spans = {span.name: span for span in self.exporter.spans}
+        self.assertEqual(4, len(self.exporter.spans))
+        for span in self.exporter.spans:
+            if span.name == 'item':
+                self.assertEqual(spans['map'].span_id, span.parent_span_id)
+
+class TestSummarizeTrace(TestCase):
+
+    def test_summarize_trace(self):
+        spans = [
+            {'name': 'sheets.spreadsheets.values.get', 'startTimeUnixNano': '0', 'endTimeUnixNano': '2000000'},
+            {'name': 'sheets.spreadsheets.values.get', 'startTimeUnixNano': '0', 'endTimeUnixNano': '3000000'},
+            {'name': 'GET /status', 'startTimeUnixNano': '0', 'endTimeUnixNano': '10000000'},
+        ]
+
+        self.assertEqual([
+            ('GET /status', 1, 10.0),
+            ('sheets.spreadsheets.values.get', 2, 5.0),
+        ], summarize_trace(spans))
@@ -1,3 +1,5 @@
+import os
+import tempfile
 from unittest import TestCase
 
 from evalytics.usecases import GetEmployeesUseCase, GetSurveysUseCase
@@ -6,8 +8,9 @@ from evalytics.usecases import GetResponseStatusUseCase
 from evalytics.usecases import GetEvalReportsUseCase
 from evalytics.usecases import GenerateEvalReportsUseCase
 from evalytics.usecases import GetPeersAssignmentUseCase
+from evalytics.usecases import RenderEvalReportsUseCase
 from evalytics.usecases import UpdatePeersAssignmentUseCase
-from evalytics.models import ReviewerResponse
+from evalytics.models import ReviewerResponse, EvalKind
 
 from tests.common.employees import employees_collection
 from tests.common.mocks import MockStorageFactory
@@ -18,6 +21,7 @@ from tests.common.mocks import MockFormsPlatformFactory, MockGoogleForms
 from tests.common.mocks import MockGmailChannel
 from tests.common.mocks import GetReviewersUseCaseMock
 from tests.common.mocks import MockReviewerResponseFilter
+from tests.common.mocks import MockJobProgress
 
 class GetEmployeesUseCaseSut(GetEmployeesUseCase, MockStorageFactory):
     'Inject a mock into the GetEmployeesUseCase dependency'
@@ -59,6 +63,13 @@ class GenerateEvalReportsUseCaseSut(
         MockReviewerResponseFilter):
     'Inject mocks into GenerateEvalReportsUseCaseS dependencies'
 
+class RenderEvalReportsUseCaseSut(
+        RenderEvalReportsUseCase,
+        MockStorageFactory,
+        MockFormsPlatformFactory,
+        MockReviewerResponseFilter):
+    'Inject mocks into RenderEvalReportsUseCase dependencies'
+
 class GetPeersAssignmentUseCaseSut(
         GetPeersAssignmentUseCase,
         MockStorageFactory,
@@ -82,6 +93,11 @@ class TestGetEmployeesUseCase(TestCase):
 
         self.assertEqual(2, len(employees))
 
+    def test_get_employees_usecase_when_force_refresh(self):
+        self.sut.get_employees(force_refresh=True)
+
+        self.assertTrue(self.sut.get_force_refresh())
+
 class TestGetSurveysUseCase(TestCase):
 
     def setUp(self):
@@ -106,6 +122,13 @@ class TestGetReviewersUseCase(TestCase):
             employees_collection().get('em_email'),
             reviewers['em_email'])
 
+    def test_stream_reviewers_usecase(self):
+        reviewers = self.sut.stream_reviewers()
+
+        self.assertEqual(
+            employees_collection().get('em_email'),
+            next(reviewers))
+
 class TestSendCommunicationUseCase(TestCase):
 
     def setUp(self):
@@ -140,6 +163,19 @@ class TestSendCommunicationUseCase(TestCase):
         self.assertIn('manager_em', evals_not_sent)
         self.assertEqual(1, len(evals_not_sent))
 
+    def test_send_email_usecase_reports_progress(self):
+        self.communication_channel.add_raise_exception_for_reviewer(
+            self.reviewers['manager_em'].uid
+        )
+        self.sut.set_communication_channel(self.communication_channel)
+        progress = MockJobProgress()
+
+        self.sut.send(self.reviewers, self.any_kind, progress)
+
+        self.assertEqual(['em_email', 'manager_em'], progress.items)
+        self.assertEqual(['em_email', 'manager_em'], sorted(progress.results.keys()))
+        self.assertEqual(['manager_em'], progress.failed)
+
 class TestGetResponseStatusUseCase(TestCase):
 
     def setUp(self):
@@ -149,6 +185,11 @@ class TestGetResponseStatusUseCase(TestCase):
     def test_get_response_status(self):
         _ = self.sut.get_response_status()
 
+    def test_stream_response_status(self):
+        _, pending, _ = self.sut.stream_response_status()
+
+        self.assertEqual([], list(pending))
+
 class TestGetEvalReportsUseCase(TestCase):
 
     def setUp(self):
@@ -215,7 +256,7 @@ class TestGenerateEvalReportsUseCase(TestCase):
         self.sut.set_storage(self.storage)
         self.sut.set_forms_platform(self.forms_platform)
 
-        created, not_created = self.sut.generate(
+        created, not_created, _ = self.sut.generate(
             area,
             managers,
             employee_uids
@@ -234,7 +275,7 @@ class TestGenerateEvalReportsUseCase(TestCase):
         self.sut.set_storage(self.storage)
         self.sut.set_forms_platform(self.forms_platform)
 
-        created, not_created = self.sut.generate(
+        created, not_created, _ = self.sut.generate(
             area,
             managers,
             employee_uids
@@ -243,6 +284,144 @@ class TestGenerateEvalReportsUseCase(TestCase):
         self.assertEqual(1, len(not_created))
         self.assertEqual(2, len(created))
 
+    def test_generate_evalreports_records_error_and_timings(self):
+        self.forms_platform.set_evaluations_response(self.evaluations_response)
+        self.storage.get_evaluations_will_raise_exception_for_reviewee('uid1')
+        self.sut.set_storage(self.storage)
+        self.sut.set_forms_platform(self.forms_platform)
+
+        created, not_created, _ = self.sut.generate('', [], [])
+
+        self.assertEqual('Exception()', not_created['uid1']['error'])
+        self.assertEqual('uid1', not_created['uid1']['employee'])
+        for report in list(created.values()) + list(not_created.values()):
+            self.assertGreaterEqual(report['elapsed_seconds'], 0)
+        for report in created.values():
+            self.assertNotIn('error', report)
+
+    def test_generate_evalreports_in_concurrent_mode(self):
+        self.forms_platform.set_evaluations_response(self.evaluations_response)
+        self.storage.get_evaluations_will_raise_exception_for_reviewee('uid2')
+        self.sut.set_storage(self.storage)
+        self.sut.set_forms_platform(self.forms_platform)
+        self.sut.set_reports_generation_mode('concurrent')
+
+        created, not_created, _ = self.sut.generate('', [], [])
+
+        self.assertEqual(['uid1', 'uid3'], sorted(created.keys()))
+        self.assertEqual(['uid2'], list(not_created.keys()))
+
+    def test_generate_evalreports_when_reports_are_up_to_date(self):
+        self.forms_platform.set_evaluations_response(self.evaluations_response)
+        self.storage.set_eval_report_up_to_date('uid1')
+        self.sut.set_storage(self.storage)
+        self.sut.set_forms_platform(self.forms_platform)
+
+        created, _, _ = self.sut.generate('', [], [])
+        forced, _, _ = self.sut.generate('', [], [], force=True)
+
+        self.assertTrue(created['uid1']['skipped'])
+        self.assertFalse(created['uid2']['skipped'])
+        self.assertFalse(forced['uid1']['skipped'])
+
+    def test_generate_evalreports_returns_permissions_summary(self):
+        self.forms_platform.set_evaluations_response(self.evaluations_response)
+        self.sut.set_storage(self.storage)
+        self.sut.set_forms_platform(self.forms_platform)
+
+        _, _, permissions = self.sut.generate('', [], [])
+
+        self.assertEqual({'issued': 0, 'skipped': 0, 'failed': {}}, permissions)
+
+    def test_generate_evalreports_reports_progress(self):
+        self.forms_platform.set_evaluations_response(self.evaluations_response)
+        self.storage.get_evaluations_will_raise_exception_for_reviewee('uid2')
+        self.sut.set_storage(self.storage)
+        self.sut.set_forms_platform(self.forms_platform)
+        self.sut.set_reports_generation_mode('concurrent')
+        progress = MockJobProgress()
+
+        created, _, _ = self.sut.generate('', [], [], progress=progress)
+
+        self.assertEqual(['uid1', 'uid2', 'uid3'], progress.items)
+        self.assertEqual(created['uid1'], progress.results['uid1'])
+        self.assertEqual(['uid2'], progress.failed)
+
+    def test_generate_evalreports_when_send_as_pdf_enabled(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.forms_platform.set_evaluations_response({
+            'uid1': [self.any_reviewer_response]
+        })
+        self.sut.set_storage(self.storage)
+        self.sut.set_forms_platform(self.forms_platform)
+        self.sut.set_send_eval_reports_as_pdf(True, directory.name)
+
+        created, _, _ = self.sut.generate('', [], [])
+
+        self.assertEqual(
+            os.path.join(directory.name, 'EVAL_PROCESS_ID', 'uid1.pdf'),
+            created['uid1']['pdf'])
+        self.assertTrue(os.path.exists(created['uid1']['pdf']))
+
+    def test_generate_evalreports_when_pdf_fails(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.forms_platform.set_evaluations_response({
+            'uid1': [ReviewerResponse(
+                'reviewee',
+                'reviewer',
+                EvalKind.PEER_TO_PEER,
+                [('Do you know how to dance?', 'Sí \U0001F57A')],
+                'filename',
+                0
+            )]
+        })
+        self.sut.set_storage(self.storage)
+        self.sut.set_forms_platform(self.forms_platform)
+        self.sut.set_send_eval_reports_as_pdf(True, directory.name)
+
+        created, not_created, _ = self.sut.generate('', [], [])
+
+        self.assertEqual({}, not_created)
+        self.assertNotIn('pdf', created['uid1'])
+        self.assertIn('UnsupportedCharacterException', created['uid1']['pdf_error'])
+
+class TestRenderEvalReportsUseCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.sut = RenderEvalReportsUseCaseSut()
+        self.sut.set_local_reports_path(self.directory.name)
+        self.sut.set_storage(MockGoogleStorage())
+        self.forms_platform = MockGoogleForms()
+        self.forms_platform.set_evaluations_response({
+            'uid1': [
+                ReviewerResponse(
+                    'uid1', 'reviewer', EvalKind.SELF, [('question', 'answer')], 'filename', 2)
+            ],
+            'uid2': None,
+        })
+        self.sut.set_forms_platform(self.forms_platform)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_render(self):
+        rendered, not_rendered = self.sut.render('', [], [], ['markdown', 'pdf'])
+
+        self.assertEqual(['uid1'], list(rendered.keys()))
+        self.assertEqual([
+            os.path.join(self.directory.name, 'EVAL_PROCESS_ID', 'uid1.md'),
+            os.path.join(self.directory.name, 'EVAL_PROCESS_ID', 'uid1.pdf'),
+        ], rendered['uid1']['files'])
+        self.assertEqual(['uid2'], list(not_rendered.keys()))
+        self.assertIn('TypeError', not_rendered['uid2']['error'])
+
+    def test_render_when_format_not_supported(self):
+        with self.assertRaises(ValueError):
+            self.sut.render('', [], [], ['docx'])
+
 class TestGetPeersAssignmentUseCase(TestCase):
 
     def setUp(self):